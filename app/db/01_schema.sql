@@ -11,6 +11,10 @@ CREATE TABLE departments (
     manager_id      INT DEFAULT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- FULLTEXT ngram bỏ mọi token chứa stopword (kể cả 'a', 'i'...), làm hỏng tìm tên tiếng Việt.
+-- Tắt stopword trước khi tạo index ft_employee_search bên dưới.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
 -- Bảng EMPLOYEES: Nhân viên
 CREATE TABLE employees (
     employee_id    INT AUTO_INCREMENT PRIMARY KEY,
@@ -24,8 +28,16 @@ CREATE TABLE employees (
     department_id  INT NOT NULL,
     position       VARCHAR(100),
     base_salary    DECIMAL(10,2) NOT NULL,
+    -- Thời điểm sửa gần nhất, để EmployeeDirectory chỉ tải lại các dòng mới đổi
+    updated_at     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     CONSTRAINT fk_employee_dept 
-        FOREIGN KEY (department_id) REFERENCES departments(department_id)
+        FOREIGN KEY (department_id) REFERENCES departments(department_id),
+    -- Phân trang keyset khi sắp xếp theo tên / lương (InnoDB tự nối thêm employee_id vào index)
+    INDEX idx_employee_name (full_name),
+    INDEX idx_employee_salary (base_salary),
+    INDEX idx_employee_updated (updated_at),
+    -- Tìm kiếm nhân viên theo tên / email / số điện thoại (n-gram, không cần khớp đầu chuỗi)
+    FULLTEXT INDEX ft_employee_search (full_name, email, phone_number) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- Bảng PROJECTS: Dự án
@@ -65,7 +77,9 @@ CREATE TABLE attendance (
     status        ENUM('Present','Absent','On Leave') NOT NULL,
     CONSTRAINT fk_attendance_emp 
         FOREIGN KEY (employee_id) REFERENCES employees(employee_id),
-    CONSTRAINT u_emp_date UNIQUE (employee_id, work_date)
+    CONSTRAINT u_emp_date UNIQUE (employee_id, work_date),
+    -- Lọc theo khoảng ngày (work_date >= ? AND work_date < ?) cho báo cáo tháng toàn công ty
+    INDEX idx_attendance_work_date (work_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- Bảng SALARY_PAYMENTS: Thanh toán lương hàng tháng
@@ -77,9 +91,17 @@ CREATE TABLE salary_payments (
     year           INT NOT NULL,
     total_amount   DECIMAL(10,2) NOT NULL,
     payment_status ENUM('Unpaid','Paid','Pending') DEFAULT 'Pending',
+    -- Kỳ lương dạng số year*100 + tháng (VD 202503), tự tính từ salary_month/year
+    period_key     INT AS (year * 100 + FIELD(salary_month,
+                       'January', 'February', 'March', 'April', 'May', 'June',
+                       'July', 'August', 'September', 'October', 'November', 'December')) STORED,
     CONSTRAINT fk_salary_emp 
         FOREIGN KEY (employee_id) REFERENCES employees(employee_id),
-	CONSTRAINT u_emp_month_year UNIQUE (employee_id, salary_month, year)
+	CONSTRAINT u_emp_month_year UNIQUE (employee_id, salary_month, year),
+    -- Lịch sử lương 1 nhân viên theo khoảng kỳ (cũng phục vụ khóa ngoại fk_salary_emp)
+    INDEX idx_salary_emp_period (employee_id, period_key),
+    -- Báo cáo xu hướng lương toàn công ty theo khoảng kỳ
+    INDEX idx_salary_period (period_key, total_amount)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 -- Bảng BONUS_DEDUCTIONS: Thưởng / Phạt
@@ -91,6 +113,30 @@ CREATE TABLE bonus_deductions (
     amount        DECIMAL(10,2) NOT NULL,
     effective_date DATE NOT NULL,
     CONSTRAINT fk_bd_emp 
+        FOREIGN KEY (employee_id) REFERENCES employees(employee_id),
+    -- Thưởng/phạt của 1 nhân viên trong 1 tháng (cũng phục vụ khóa ngoại fk_bd_emp)
+    INDEX idx_bd_emp_date (employee_id, effective_date),
+    -- Tổng thưởng/phạt của cả công ty trong 1 tháng
+    INDEX idx_bd_effective_date (effective_date, employee_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Bảng PAYROLL_MONTHLY_ROLLUP: Tổng hợp lương theo tháng (materialized)
+-- Được giữ cập nhật bởi trigger trên bonus_deductions và salary_payments (05_trigger.sql),
+-- dựng lại toàn bộ bằng CALL sp_rebuild_payroll_rollup().
+CREATE TABLE payroll_monthly_rollup (
+    employee_id      INT NOT NULL,
+    year             INT NOT NULL,
+    month_num        TINYINT NOT NULL,        -- 1..12
+    total_bonus      DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_deduction  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    bd_count         INT NOT NULL DEFAULT 0,  -- số dòng thưởng/phạt; 0 và chưa chốt lương thì xóa dòng
+    payment_id       INT NULL,                -- NULL = tháng chưa chốt lương
+    recorded_payment DECIMAL(10,2) NULL,
+    payment_status   ENUM('Unpaid','Paid','Pending') NULL,
+    PRIMARY KEY (employee_id, year, month_num),
+    -- Bảng lương của cả công ty trong 1 tháng
+    INDEX idx_rollup_period (year, month_num, employee_id),
+    CONSTRAINT fk_rollup_emp 
         FOREIGN KEY (employee_id) REFERENCES employees(employee_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
@@ -111,6 +157,18 @@ CREATE TABLE bonus_deduction_log (
     INDEX idx_log_time (log_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
+-- Bảng TABLE_VERSIONS: Bộ đếm số lần ghi của từng bảng (app tăng 1 lần sau mỗi lệnh ghi qua manager).
+-- App đọc bảng nhỏ này định kỳ để biết bảng nào vừa đổi, thay vì tải lại toàn bộ dữ liệu.
+CREATE TABLE table_versions (
+    table_name  VARCHAR(64) PRIMARY KEY,
+    version     BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO table_versions (table_name) VALUES
+    ('employees'), ('departments'), ('projects'), ('assignments'),
+    ('attendance'), ('bonus_deductions'), ('salary_payments');
+
 -- Khóa ngoại manager_id cho departments (sau khi đã có employees)
 ALTER TABLE departments 
     ADD CONSTRAINT fk_dept_manager 
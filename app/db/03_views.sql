@@ -1,5 +1,7 @@
 USE employee_manager;
 
+DROP VIEW IF EXISTS v_project_participation;
+
 CREATE VIEW v_project_participation AS
 SELECT 
     p.project_id,
@@ -27,34 +29,22 @@ JOIN departments d ON e.department_id = d.department_id;
 
 DROP VIEW IF EXISTS v_monthly_salary_summary;
 
+-- Đọc từ bảng tổng hợp payroll_monthly_rollup (trigger giữ cập nhật),
+-- không GROUP BY lại toàn bộ bonus_deductions mỗi lần đọc
 CREATE VIEW v_monthly_salary_summary AS
 SELECT 
     e.employee_id,
     e.full_name AS employee_name,
-    sp.salary_month,
-    sp.year,
+    ELT(r.month_num, 'January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December') AS salary_month,
+    r.year,
+    r.month_num,
     e.base_salary,
-    COALESCE(bd.total_bonus, 0) AS total_bonus,
-    COALESCE(bd.total_deduction, 0) AS total_deduction,
-    (e.base_salary + COALESCE(bd.total_bonus, 0) - COALESCE(bd.total_deduction, 0)) AS net_amount,
-    sp.total_amount AS recorded_payment,
-    sp.payment_status
-FROM employees e
-JOIN salary_payments sp ON e.employee_id = sp.employee_id
-LEFT JOIN (
-    SELECT 
-        employee_id, 
-        YEAR(effective_date) AS bd_year,
-        MONTH(effective_date) AS bd_month,  
-        SUM(CASE WHEN bd_type = 'Bonus' THEN amount ELSE 0 END) AS total_bonus,
-        SUM(CASE WHEN bd_type = 'Deduction' THEN amount ELSE 0 END) AS total_deduction
-    FROM bonus_deductions
-    GROUP BY employee_id, YEAR(effective_date), MONTH(effective_date)
-) bd ON e.employee_id = bd.employee_id 
-    AND sp.year = bd.bd_year 
-    AND (CASE sp.salary_month  
-            WHEN 'January' THEN 1 WHEN 'February' THEN 2 WHEN 'March' THEN 3
-            WHEN 'April' THEN 4 WHEN 'May' THEN 5 WHEN 'June' THEN 6
-            WHEN 'July' THEN 7 WHEN 'August' THEN 8 WHEN 'September' THEN 9
-            WHEN 'October' THEN 10 WHEN 'November' THEN 11 WHEN 'December' THEN 12
-        END) = bd.bd_month;
\ No newline at end of file
+    r.total_bonus,
+    r.total_deduction,
+    (e.base_salary + r.total_bonus - r.total_deduction) AS net_amount,
+    r.recorded_payment,
+    r.payment_status
+FROM payroll_monthly_rollup r
+JOIN employees e ON r.employee_id = e.employee_id
+WHERE r.payment_id IS NOT NULL;
\ No newline at end of file
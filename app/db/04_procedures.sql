@@ -355,4 +355,97 @@ BEGIN
     SELECT LAST_INSERT_ID() AS new_payment_id;
 END $$
 
+-- ============================================================
+-- PROCEDURE 12: Cộng dồn thưởng/phạt vào payroll_monthly_rollup
+-- (gọi từ trigger bonus_deductions; p_count = 1 khi thêm, -1 khi bớt)
+-- ============================================================
+DROP PROCEDURE IF EXISTS sp_rollup_apply_bd $$
+CREATE PROCEDURE sp_rollup_apply_bd (
+    IN p_emp_id INT,
+    IN p_effective_date DATE,
+    IN p_bd_type ENUM('Bonus','Deduction'),
+    IN p_amount DECIMAL(10,2),
+    IN p_count INT
+)
+BEGIN
+    DECLARE v_bonus DECIMAL(12,2) DEFAULT IF(p_bd_type = 'Bonus', p_amount * p_count, 0);
+    DECLARE v_deduction DECIMAL(12,2) DEFAULT IF(p_bd_type = 'Deduction', p_amount * p_count, 0);
+
+    INSERT INTO payroll_monthly_rollup(employee_id, year, month_num, total_bonus, total_deduction, bd_count)
+    VALUES(p_emp_id, YEAR(p_effective_date), MONTH(p_effective_date), v_bonus, v_deduction, p_count)
+    ON DUPLICATE KEY UPDATE
+        total_bonus = total_bonus + v_bonus,
+        total_deduction = total_deduction + v_deduction,
+        bd_count = bd_count + p_count;
+
+    -- Tháng không còn thưởng/phạt và chưa chốt lương thì bỏ dòng tổng hợp
+    DELETE FROM payroll_monthly_rollup
+    WHERE employee_id = p_emp_id
+      AND year = YEAR(p_effective_date) AND month_num = MONTH(p_effective_date)
+      AND bd_count = 0 AND payment_id IS NULL;
+END $$
+
+-- ============================================================
+-- PROCEDURE 13: Ghi / xóa thông tin chốt lương trong payroll_monthly_rollup
+-- (gọi từ trigger salary_payments; p_payment_id = NULL khi xóa)
+-- ============================================================
+DROP PROCEDURE IF EXISTS sp_rollup_set_payment $$
+CREATE PROCEDURE sp_rollup_set_payment (
+    IN p_emp_id INT,
+    IN p_year INT,
+    IN p_month VARCHAR(20),
+    IN p_payment_id INT,
+    IN p_amount DECIMAL(10,2),
+    IN p_status ENUM('Unpaid','Paid','Pending')
+)
+BEGIN
+    DECLARE v_month_num TINYINT DEFAULT FIELD(p_month,
+        'January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December');
+
+    INSERT INTO payroll_monthly_rollup(employee_id, year, month_num, payment_id, recorded_payment, payment_status)
+    VALUES(p_emp_id, p_year, v_month_num, p_payment_id, p_amount, p_status)
+    ON DUPLICATE KEY UPDATE
+        payment_id = p_payment_id,
+        recorded_payment = p_amount,
+        payment_status = p_status;
+
+    DELETE FROM payroll_monthly_rollup
+    WHERE employee_id = p_emp_id AND year = p_year AND month_num = v_month_num
+      AND bd_count = 0 AND payment_id IS NULL;
+END $$
+
+-- ============================================================
+-- PROCEDURE 14: Dựng lại toàn bộ payroll_monthly_rollup từ dữ liệu gốc
+-- ============================================================
+DROP PROCEDURE IF EXISTS sp_rebuild_payroll_rollup $$
+CREATE PROCEDURE sp_rebuild_payroll_rollup ()
+BEGIN
+    DELETE FROM payroll_monthly_rollup;
+
+    INSERT INTO payroll_monthly_rollup(employee_id, year, month_num, total_bonus, total_deduction, bd_count)
+    SELECT 
+        employee_id,
+        YEAR(effective_date),
+        MONTH(effective_date),
+        SUM(CASE WHEN bd_type = 'Bonus' THEN amount ELSE 0 END),
+        SUM(CASE WHEN bd_type = 'Deduction' THEN amount ELSE 0 END),
+        COUNT(*)
+    FROM bonus_deductions
+    GROUP BY employee_id, YEAR(effective_date), MONTH(effective_date);
+
+    INSERT INTO payroll_monthly_rollup(employee_id, year, month_num, payment_id, recorded_payment, payment_status)
+    SELECT sp.employee_id, sp.year, FIELD(sp.salary_month,
+               'January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December'),
+           sp.payment_id, sp.total_amount, sp.payment_status
+    FROM salary_payments sp
+    ON DUPLICATE KEY UPDATE
+        payment_id = sp.payment_id,
+        recorded_payment = sp.total_amount,
+        payment_status = sp.payment_status;
+
+    SELECT COUNT(*) AS total_rows FROM payroll_monthly_rollup;
+END $$
+
 DELIMITER ;
\ No newline at end of file
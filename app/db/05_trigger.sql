@@ -14,6 +14,7 @@ BEGIN
         NEW.bd_id, NEW.employee_id, NEW.description, NEW.bd_type, 
         'INSERT', NEW.amount, NEW.effective_date, NOW()
     );
+    CALL sp_rollup_apply_bd(NEW.employee_id, NEW.effective_date, NEW.bd_type, NEW.amount, 1);
 END $$
 
 -- 2. Trigger khi UPDATE (Cập nhật thưởng/phạt)
@@ -30,6 +31,9 @@ BEGIN
         NEW.bd_id, NEW.employee_id, NEW.description, NEW.bd_type, 
         'UPDATE', NEW.amount, OLD.amount, NEW.effective_date, NOW()
     );
+    -- Bớt giá trị cũ rồi cộng giá trị mới (nhân viên / tháng có thể đã đổi)
+    CALL sp_rollup_apply_bd(OLD.employee_id, OLD.effective_date, OLD.bd_type, OLD.amount, -1);
+    CALL sp_rollup_apply_bd(NEW.employee_id, NEW.effective_date, NEW.bd_type, NEW.amount, 1);
 END $$
 
 -- 3. Trigger khi DELETE (Xóa thưởng/phạt)
@@ -46,6 +50,40 @@ BEGIN
         OLD.bd_id, OLD.employee_id, OLD.description, OLD.bd_type, 
         'DELETE', OLD.amount, OLD.effective_date, NOW()
     );
+    CALL sp_rollup_apply_bd(OLD.employee_id, OLD.effective_date, OLD.bd_type, OLD.amount, -1);
 END $$
 
-DELIMITER ;
\ No newline at end of file
+-- 4. Trigger khi INSERT lương (Chốt lương tháng)
+DROP TRIGGER IF EXISTS trg_after_salary_insert $$
+CREATE TRIGGER trg_after_salary_insert
+AFTER INSERT ON salary_payments
+FOR EACH ROW
+BEGIN
+    CALL sp_rollup_set_payment(NEW.employee_id, NEW.year, NEW.salary_month,
+                               NEW.payment_id, NEW.total_amount, NEW.payment_status);
+END $$
+
+-- 5. Trigger khi UPDATE lương
+DROP TRIGGER IF EXISTS trg_after_salary_update $$
+CREATE TRIGGER trg_after_salary_update
+AFTER UPDATE ON salary_payments
+FOR EACH ROW
+BEGIN
+    CALL sp_rollup_set_payment(OLD.employee_id, OLD.year, OLD.salary_month, NULL, NULL, NULL);
+    CALL sp_rollup_set_payment(NEW.employee_id, NEW.year, NEW.salary_month,
+                               NEW.payment_id, NEW.total_amount, NEW.payment_status);
+END $$
+
+-- 6. Trigger khi DELETE lương
+DROP TRIGGER IF EXISTS trg_after_salary_delete $$
+CREATE TRIGGER trg_after_salary_delete
+AFTER DELETE ON salary_payments
+FOR EACH ROW
+BEGIN
+    CALL sp_rollup_set_payment(OLD.employee_id, OLD.year, OLD.salary_month, NULL, NULL, NULL);
+END $$
+
+DELIMITER ;
+
+-- Seed data được nạp trước khi có trigger: dựng payroll_monthly_rollup 1 lần
+CALL sp_rebuild_payroll_rollup();
\ No newline at end of file
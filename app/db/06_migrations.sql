@@ -0,0 +1,94 @@
+-- ============================================================
+-- MIGRATIONS: chỉ dùng cho database tạo từ bản schema cũ.
+-- Database mới tạo từ 01_schema.sql đã có sẵn các thay đổi này.
+-- ============================================================
+USE employee_manager;
+
+-- 1. salary_payments.period_key (year*100 + tháng) + index theo kỳ.
+--    Cột STORED nên ALTER tự tính giá trị cho các dòng đã có.
+ALTER TABLE salary_payments
+    ADD COLUMN period_key INT AS (year * 100 + FIELD(salary_month,
+        'January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December')) STORED
+        AFTER payment_status,
+    ADD INDEX idx_salary_emp_period (employee_id, period_key),
+    ADD INDEX idx_salary_period (period_key, total_amount);
+
+-- 2. payroll_monthly_rollup (tổng hợp lương theo tháng).
+--    Sau khi tạo bảng, chạy lại 03_views.sql, 04_procedures.sql, 05_trigger.sql
+--    (05 gọi sp_rebuild_payroll_rollup() để nạp dữ liệu cũ vào bảng).
+CREATE TABLE IF NOT EXISTS payroll_monthly_rollup (
+    employee_id      INT NOT NULL,
+    year             INT NOT NULL,
+    month_num        TINYINT NOT NULL,
+    total_bonus      DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_deduction  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    bd_count         INT NOT NULL DEFAULT 0,
+    payment_id       INT NULL,
+    recorded_payment DECIMAL(10,2) NULL,
+    payment_status   ENUM('Unpaid','Paid','Pending') NULL,
+    PRIMARY KEY (employee_id, year, month_num),
+    INDEX idx_rollup_period (year, month_num, employee_id),
+    CONSTRAINT fk_rollup_emp 
+        FOREIGN KEY (employee_id) REFERENCES employees(employee_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- 3. employees.updated_at (delta refresh cho EmployeeDirectory).
+--    Các dòng đã có nhận thời điểm chạy migration.
+ALTER TABLE employees
+    ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        AFTER base_salary,
+    ADD INDEX idx_employee_updated (updated_at);
+
+-- 4. table_versions (bộ đếm thay đổi theo bảng, app dùng để bỏ qua lần tải lại khi không có gì đổi).
+--    App tăng version sau mỗi lệnh ghi (VersionManager.bump_versions); bỏ các trigger FOR EACH ROW
+--    bản cũ vì chúng khóa dòng đếm suốt transaction ghi và chạy lại cho từng dòng của lệnh ghi hàng loạt.
+DROP TRIGGER IF EXISTS trg_employees_version_insert;
+DROP TRIGGER IF EXISTS trg_employees_version_update;
+DROP TRIGGER IF EXISTS trg_employees_version_delete;
+DROP TRIGGER IF EXISTS trg_departments_version_insert;
+DROP TRIGGER IF EXISTS trg_departments_version_update;
+DROP TRIGGER IF EXISTS trg_departments_version_delete;
+DROP TRIGGER IF EXISTS trg_projects_version_insert;
+DROP TRIGGER IF EXISTS trg_projects_version_update;
+DROP TRIGGER IF EXISTS trg_projects_version_delete;
+DROP TRIGGER IF EXISTS trg_assignments_version_insert;
+DROP TRIGGER IF EXISTS trg_assignments_version_update;
+DROP TRIGGER IF EXISTS trg_assignments_version_delete;
+DROP TRIGGER IF EXISTS trg_attendance_version_insert;
+DROP TRIGGER IF EXISTS trg_attendance_version_update;
+DROP TRIGGER IF EXISTS trg_attendance_version_delete;
+DROP TRIGGER IF EXISTS trg_bonus_deductions_version_insert;
+DROP TRIGGER IF EXISTS trg_bonus_deductions_version_update;
+DROP TRIGGER IF EXISTS trg_bonus_deductions_version_delete;
+DROP TRIGGER IF EXISTS trg_salary_payments_version_insert;
+DROP TRIGGER IF EXISTS trg_salary_payments_version_update;
+DROP TRIGGER IF EXISTS trg_salary_payments_version_delete;
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name  VARCHAR(64) PRIMARY KEY,
+    version     BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT IGNORE INTO table_versions (table_name) VALUES
+    ('employees'), ('departments'), ('projects'), ('assignments'),
+    ('attendance'), ('bonus_deductions'), ('salary_payments');
+
+-- 5. Index cho tìm kiếm, phân trang keyset và báo cáo theo tháng (01_schema.sql đã có sẵn).
+--    FULLTEXT ngram bỏ mọi token chứa stopword: tắt stopword trước khi tạo ft_employee_search.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE employees
+    ADD INDEX idx_employee_name (full_name),
+    ADD INDEX idx_employee_salary (base_salary);
+
+ALTER TABLE employees
+    ADD FULLTEXT INDEX ft_employee_search (full_name, email, phone_number) WITH PARSER ngram;
+
+ALTER TABLE attendance
+    ADD INDEX idx_attendance_work_date (work_date);
+
+ALTER TABLE bonus_deductions
+    ADD INDEX idx_bd_emp_date (employee_id, effective_date),
+    ADD INDEX idx_bd_effective_date (effective_date, employee_id);
\ No newline at end of file
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from app.services.employee_directory import get_directory
+from app.ui.async_loader import get_loader
+
 class AssignmentDialog(tk.Toplevel):
     def __init__(self, master, managers: dict, project_id: int):
         super().__init__(master)
@@ -11,9 +14,9 @@ class AssignmentDialog(tk.Toplevel):
         self.emp_mgr = managers["employee"]
         self.project_id = project_id
 
-        self.emps = self.emp_mgr.get_all_employees(limit=10000, offset=0)
-        self.emp_map = {f'{e["employee_id"]} - {e["full_name"]}': e["employee_id"] for e in self.emps}
-        self.search_list = list(self.emp_map.keys())
+        # Danh bạ dùng chung: chỉ query DB ở lần mở đầu hoặc sau khi bảng employees đổi
+        self.directory = get_directory()
+        self.search_list = []
 
         self.emp_var = tk.StringVar(value="")
         
@@ -53,6 +56,26 @@ class AssignmentDialog(tk.Toplevel):
         self.grab_set()
         self.transient(master)
 
+        self._load_employees()
+
+    def _load_employees(self):
+        # Tải danh bạ ở worker thread, điền combobox khi xong
+        get_loader(self).submit(
+            "assignment_employees", lambda: self.directory.load().labels(),
+            on_success=self._set_employees,
+            on_error=self._on_load_error
+        )
+
+    def _set_employees(self, labels):
+        if not self.winfo_exists():     # dialog đã đóng trước khi tải xong
+            return
+        self.search_list = labels
+        self.cb_emp["values"] = self.search_list
+
+    def _on_load_error(self, err):
+        if self.winfo_exists():
+            messagebox.showerror("Error", f"Cannot load employees: {err}", parent=self)
+
     def on_key_release(self, event):
         if event.keysym in ['Up', 'Down', 'Left', 'Right', 'Return', 'Tab', 'Escape']:
             return
@@ -62,7 +85,7 @@ class AssignmentDialog(tk.Toplevel):
         if typed == '':
             data = self.search_list
         else:
-            data = [item for item in self.search_list if typed.lower() in item.lower()]
+            data = self.directory.search(typed)
 
         self.cb_emp['values'] = data
 
@@ -75,7 +98,7 @@ class AssignmentDialog(tk.Toplevel):
     def on_save(self):
         try:
             selected_text = self.emp_var.get()
-            emp_id = self.emp_map.get(selected_text)
+            emp_id = self.directory.id_from_label(selected_text)
             
             if not emp_id:
                 raise ValueError("Nhân viên không hợp lệ. Vui lòng chọn từ danh sách.")
@@ -1,23 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import date
-import unicodedata  # Thư viện xử lý tiếng Việt
 
 from app.models.utils.helpers import parse_display_date, parse_currency_input, to_db_money, format_display_date
-
-def remove_accents(input_str):
-    """
-    Chuyển đổi chuỗi có dấu thành không dấu
-    """
-    if not input_str:
-        return ""
-    s = str(input_str)
-    # Xử lý chữ Đ/đ
-    s = s.replace("đ", "d").replace("Đ", "D")
-    # Chuẩn hóa unicode
-    s = unicodedata.normalize('NFKD', s)
-    # Lọc bỏ dấu
-    return "".join(c for c in s if not unicodedata.combining(c))
+from app.services.employee_directory import get_directory
+from app.ui.async_loader import get_loader
 
 class BonusDeductionDialog(tk.Toplevel):
     def __init__(self, master, managers: dict):
@@ -28,9 +15,9 @@ class BonusDeductionDialog(tk.Toplevel):
         self.emp_mgr = managers["employee"]
         self.bd_mgr = managers["bonus_deduction"]
 
-        self.emps = self.emp_mgr.get_all_employees(limit=10000, offset=0)
-        self.emp_map = {f'{e["employee_id"]} - {e["full_name"]}': e["employee_id"] for e in self.emps}
-        self.search_list = list(self.emp_map.keys())
+        # Danh bạ dùng chung: chỉ query DB ở lần mở đầu hoặc sau khi bảng employees đổi
+        self.directory = get_directory()
+        self.search_list = []
 
         self.emp_var = tk.StringVar(value="")
         
@@ -81,6 +68,26 @@ class BonusDeductionDialog(tk.Toplevel):
         self.grab_set()
         self.transient(master)
 
+        self._load_employees()
+
+    def _load_employees(self):
+        # Tải danh bạ ở worker thread, điền combobox khi xong
+        get_loader(self).submit(
+            "bonus_deduction_employees", lambda: self.directory.load().labels(),
+            on_success=self._set_employees,
+            on_error=self._on_load_error
+        )
+
+    def _set_employees(self, labels):
+        if not self.winfo_exists():     # dialog đã đóng trước khi tải xong
+            return
+        self.search_list = labels
+        self.cb_emp["values"] = self.search_list
+
+    def _on_load_error(self, err):
+        if self.winfo_exists():
+            messagebox.showerror("Error", f"Cannot load employees: {err}", parent=self)
+
     def on_key_release(self, event):
         """Lọc danh sách khi gõ (hỗ trợ không dấu)"""
         if event.keysym in ['Up', 'Down', 'Left', 'Right', 'Return', 'Tab', 'Escape']:
@@ -91,14 +98,8 @@ class BonusDeductionDialog(tk.Toplevel):
         if typed == '':
             data = self.search_list
         else:
-            kw = remove_accents(typed).lower()
-            
-            data = []
-            for item in self.search_list:
-                item_norm = remove_accents(item).lower()
-                
-                if kw in item_norm:
-                    data.append(item)
+            # Tên không dấu đã tính sẵn trong danh bạ
+            data = self.directory.search(typed)
 
         self.cb_emp['values'] = data
 
@@ -112,7 +113,7 @@ class BonusDeductionDialog(tk.Toplevel):
     def on_save(self):
         try:
             emp_name = self.emp_var.get()
-            emp_id = self.emp_map.get(emp_name)
+            emp_id = self.directory.id_from_label(emp_name)
             
             if not emp_id:
                 raise ValueError("Invalid employee. Please select from the list.")
@@ -1,18 +1,259 @@
+import threading
+import time
+import atexit
 import mysql.connector
+from mysql.connector.errors import PoolError
+
+from ..utils.instrumentation import instrumentation
+
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",            # YOUR USERNAME
+    "password": "T&t121106",   # YOUR PASSWORD
+    "database": "employee_manager",
+    "charset": "utf8mb4",
+    "use_unicode": True,
+}
+
+# Câu lệnh khởi tạo session, chỉ chạy 1 lần cho mỗi connection vật lý
+SESSION_INIT = "SET NAMES utf8mb4 COLLATE utf8mb4_0900_ai_ci"
+
+POOL_SIZE = 8                 # số connection tối đa mở cùng lúc
+ACQUIRE_TIMEOUT = 10.0        # giây chờ khi pool đã hết connection
+IDLE_TIMEOUT = 300.0          # connection rảnh quá lâu sẽ bị đóng
+HEALTH_CHECK_AFTER = 30.0     # rảnh quá mốc này thì ping trước khi cho mượn
+
+
+class PooledConnection:
+    """Proxy bọc connection thật; close() trả connection về pool thay vì đóng"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._borrowed_at = time.perf_counter()
+        self._returned = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        # Trong lời gọi manager đang được đo thì trả cursor có đo thời gian / đếm dòng
+        return instrumentation.wrap_cursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._returned:
+            return
+        self._returned = True
+        self._pool.release(self._raw, time.perf_counter() - self._borrowed_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Pool connection có giới hạn, thread-safe, kiểm tra sức khỏe và dọn connection rảnh"""
+
+    def __init__(self, config: dict, size: int = POOL_SIZE,
+                 acquire_timeout: float = ACQUIRE_TIMEOUT,
+                 idle_timeout: float = IDLE_TIMEOUT,
+                 health_check_after: float = HEALTH_CHECK_AFTER):
+        self.config = dict(config)
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition()
+        self._idle = []            # [(raw_conn, last_used)], dùng như stack (LIFO)
+        self._open = 0             # tổng connection đang mở (idle + đang mượn)
+        self._closed = False
+        self._stats = {
+            "borrows": 0, "created": 0, "discarded": 0, "evicted": 0, "timeouts": 0,
+            "wait_total": 0.0, "wait_max": 0.0, "hold_total": 0.0, "hold_max": 0.0,
+        }
+
+    # -------------------- Mượn / trả --------------------
+    def acquire(self) -> PooledConnection:
+        start = time.perf_counter()
+        deadline = start + self.acquire_timeout
+
+        while True:
+            raw = None
+            idle_for = 0.0
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                self._evict_idle()
+
+                while not self._idle and self._open >= self.size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolError(f"No free database connection after {self.acquire_timeout:.0f}s")
+                    self._cond.wait(remaining)
+                    self._evict_idle()
+
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    idle_for = time.monotonic() - last_used
+                else:
+                    self._open += 1
+                    create = True
+
+            # Mở connection / ping nằm ngoài lock để không chặn thread khác
+            if create:
+                try:
+                    raw = self._create()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            elif idle_for > self.health_check_after and not self._is_alive(raw):
+                self._discard(raw)
+                continue
+
+            waited = time.perf_counter() - start
+            with self._cond:
+                self._stats["borrows"] += 1
+                self._stats["wait_total"] += waited
+                self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+            return PooledConnection(self, raw)
+
+    def release(self, raw, held: float):
+        try:
+            # Trả lại session sạch: đọc hết kết quả treo và đóng transaction cũ.
+            # Với REPEATABLE READ, transaction mở sẵn sẽ giữ snapshot cũ cho lần mượn sau.
+            if getattr(raw, "unread_result", False):
+                raw.consume_results()
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+
+        with self._cond:
+            self._stats["hold_total"] += held
+            self._stats["hold_max"] = max(self._stats["hold_max"], held)
+            if self._closed:
+                self._open -= 1
+                self._close_quietly(raw)
+            else:
+                self._idle.append((raw, time.monotonic()))
+            self._cond.notify()
+
+    # -------------------- Nội bộ --------------------
+    def _create(self):
+        raw = mysql.connector.connect(**self.config)
+        cursor = raw.cursor()
+        cursor.execute(SESSION_INIT)
+        cursor.close()
+        with self._cond:
+            self._stats["created"] += 1
+        return raw
+
+    def _is_alive(self, raw) -> bool:
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, raw):
+        self._close_quietly(raw)
+        with self._cond:
+            self._open -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+
+    def _evict_idle(self):
+        """Đóng connection rảnh quá IDLE_TIMEOUT (gọi khi đang giữ lock)"""
+        now = time.monotonic()
+        keep = []
+        for raw, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close_quietly(raw)
+                self._open -= 1
+                self._stats["evicted"] += 1
+            else:
+                keep.append((raw, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _close_quietly(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    # -------------------- Quản lý --------------------
+    def stats(self) -> dict:
+        with self._cond:
+            s = dict(self._stats)
+            s["size"] = self.size
+            s["open"] = self._open
+            s["idle"] = len(self._idle)
+            s["in_use"] = self._open - len(self._idle)
+        borrows = s["borrows"] or 1
+        s["wait_avg"] = s["wait_total"] / borrows
+        s["hold_avg"] = s["hold_total"] / borrows
+        return s
+
+    def close_all(self):
+        with self._cond:
+            self._closed = True
+            for raw, _ in self._idle:
+                self._close_quietly(raw)
+                self._open -= 1
+            self._idle = []
+            self._cond.notify_all()
+
 
 class DatabaseConnection:
+    _pool = None
+    _config = DB_CONFIG
+    _lock = threading.Lock()
+
     @staticmethod
     def get_connection():
-        config = {
-            "host": "localhost",
-            "user": "root",            # YOUR USERNAME
-            "password": "T&t121106",   # YOUR PASSWORD
-            "database": "employee_manager",
-            "charset": "utf8mb4",
-            "use_unicode": True,
-        }
-        conn = mysql.connector.connect(**config)
-        cursor = conn.cursor()
-        cursor.execute("SET NAMES utf8mb4 COLLATE utf8mb4_0900_ai_ci")
-        cursor.close()
+        """Mượn connection từ pool. Gọi conn.close() để trả lại như trước."""
+        start = time.perf_counter()
+        conn = DatabaseConnection.get_pool().acquire()
+        instrumentation.note_acquire(time.perf_counter() - start)
         return conn
+
+    @staticmethod
+    def get_pool() -> ConnectionPool:
+        if DatabaseConnection._pool is None:
+            with DatabaseConnection._lock:
+                if DatabaseConnection._pool is None:
+                    DatabaseConnection._pool = ConnectionPool(DatabaseConnection._config)
+        return DatabaseConnection._pool
+
+    @staticmethod
+    def configure(**overrides):
+        """
+        Đổi thông số kết nối so với DB_CONFIG (vd database="employee_manager_bench" cho benchmark).
+        Pool cũ được đóng, lần mượn sau sẽ mở connection theo cấu hình mới.
+        """
+        DatabaseConnection.close_all()
+        with DatabaseConnection._lock:
+            DatabaseConnection._config = {**DB_CONFIG, **overrides}
+
+    @staticmethod
+    def pool_stats() -> dict:
+        return DatabaseConnection.get_pool().stats()
+
+    @staticmethod
+    def close_all():
+        with DatabaseConnection._lock:
+            if DatabaseConnection._pool is not None:
+                DatabaseConnection._pool.close_all()
+                DatabaseConnection._pool = None
+
+
+atexit.register(DatabaseConnection.close_all)
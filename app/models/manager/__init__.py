@@ -6,6 +6,8 @@ from .attendance import AttendanceManager
 from .salary import SalaryManager
 from .bonus_deduction import BonusDeductionManager
 from .query import QueryManager
+from .dashboard import DashboardManager
+from .versions import VersionManager
 
 
 __all__ = [
@@ -16,5 +18,7 @@ __all__ = [
     'AttendanceManager',
     'SalaryManager',
     'BonusDeductionManager',
-    'QueryManager'
+    'QueryManager',
+    'DashboardManager',
+    'VersionManager'
 ]
\ No newline at end of file
@@ -2,13 +2,17 @@ from typing import List, Dict
 import mysql.connector
 
 from ..config.database import DatabaseConnection
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
 from ..utils.helpers import parse_stored_procedure_error
 from ..utils.exceptions import *
 
+@instrument_manager
 class AssignmentManager:
     """Manage project assignments"""
     
     @staticmethod
+    @invalidates("assignments")
     def create_assignment(employee_id: int, project_id: int, 
                             role: str, hours_worked: float = 0) -> Dict:
         """Assign using stored procedure sp_assign_project"""
@@ -40,6 +44,7 @@ class AssignmentManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("assignments")
     def update_assignment(assignment_id: int, role: str, hours_worked: float) -> Dict:
         """Cập nhật việc phân công"""
         conn = None
@@ -72,6 +77,7 @@ class AssignmentManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("assignments")
     def delete_assignment(assignment_id: int) -> Dict:
         """Xóa phân công"""
         conn = None
@@ -99,6 +105,7 @@ class AssignmentManager:
                 conn.close()
     
     @staticmethod
+    @cached("assignments", "projects")
     def get_assignments_by_employee(employee_id: int) -> List[Dict]:
         """Có tất cả phân công của 1 nhân viên"""
         conn = None
@@ -126,6 +133,7 @@ class AssignmentManager:
                 conn.close()
     
     @staticmethod
+    @cached("assignments", "employees")
     def get_assignments_by_project(project_id: int) -> List[Dict]:
         """Có tất cả phân công của 1 dự án"""
         conn = None
@@ -1,15 +1,34 @@
-from typing import List, Dict, Optional
-from datetime import date, time
+from typing import List, Dict, Optional, Iterable, Callable
+from datetime import date, time, datetime
 import mysql.connector
 
 from ..config.database import DatabaseConnection
-from ..utils.helpers import parse_stored_procedure_error
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
+from ..utils.helpers import (
+    parse_stored_procedure_error, period_filter, parse_display_date, parse_display_time
+)
 from ..utils.exceptions import *
 
+ATTENDANCE_STATUSES = ("Present", "Absent", "On Leave")
+IMPORT_BATCH_SIZE = 500
+
+@instrument_manager
 class AttendanceManager:
     """Manage employee attendance"""
+
+    # Upsert theo khóa UNIQUE (employee_id, work_date); executemany gộp thành INSERT nhiều dòng
+    _UPSERT_SQL = """
+        INSERT INTO attendance (employee_id, work_date, check_in, check_out, status)
+        VALUES (%s, %s, %s, %s, %s) AS new
+        ON DUPLICATE KEY UPDATE
+            check_in = new.check_in,
+            check_out = new.check_out,
+            status = new.status
+    """
     
     @staticmethod
+    @invalidates("attendance")
     def mark_attendance(employee_id: int, work_date: date, 
                         check_in: Optional[time], check_out: Optional[time],
                         status: str) -> Dict:
@@ -42,6 +61,7 @@ class AttendanceManager:
                 conn.close()
     
     @staticmethod
+    @cached("attendance", "employees", "departments")
     def get_attendance_by_employee(employee_id: int, month: int, year: int) -> List[Dict]:
         """Get attendance for employee using v_employee_attendance view"""
         conn = None
@@ -50,15 +70,15 @@ class AttendanceManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = period_filter("work_date", month, year)
+            query = f"""
                 SELECT *
                 FROM v_employee_attendance
                 WHERE employee_id = %s 
-                AND MONTH(work_date) = %s 
-                AND YEAR(work_date) = %s
+                AND {date_sql}
                 ORDER BY work_date
             """
-            cursor.execute(query, (employee_id, month, year))
+            cursor.execute(query, (employee_id, *date_params))
             return cursor.fetchall()
             
         except mysql.connector.Error as err:
@@ -70,6 +90,7 @@ class AttendanceManager:
                 conn.close()
     
     @staticmethod
+    @cached("attendance", "employees", "departments")
     def get_monthly_attendance_summary(month: int, year: int) -> List[Dict]:
         """Get monthly attendance summary by department"""
         conn = None
@@ -78,7 +99,8 @@ class AttendanceManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
+            date_sql, date_params = period_filter("a.work_date", month, year)
+            query = f"""
                 SELECT 
                     d.department_name,
                     COUNT(DISTINCT a.employee_id) as total_employees,
@@ -88,10 +110,10 @@ class AttendanceManager:
                 FROM attendance a
                 JOIN employees e ON a.employee_id = e.employee_id
                 JOIN departments d ON e.department_id = d.department_id
-                WHERE MONTH(a.work_date) = %s AND YEAR(a.work_date) = %s
+                WHERE {date_sql}
                 GROUP BY d.department_id, d.department_name
             """
-            cursor.execute(query, (month, year))
+            cursor.execute(query, date_params)
             return cursor.fetchall()
             
         except mysql.connector.Error as err:
@@ -100,4 +122,137 @@ class AttendanceManager:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
\ No newline at end of file
+                conn.close()
+    
+    @staticmethod
+    def _parse_import_row(record: Dict, today: date) -> tuple:
+        """
+        Validate 1 dòng import (giống các check trong sp_mark_attendance, trừ employee tồn tại).
+        Trả về tuple (employee_id, work_date, check_in, check_out, status) để ghi DB.
+        """
+        if record.get("_error"):
+            raise ValidationError(record["_error"])  # dòng không đọc được từ file
+
+        try:
+            employee_id = int(str(record.get("employee_id", "")).strip())
+        except ValueError:
+            raise ValidationError("employee_id must be an integer")
+
+        raw_date = record.get("work_date")
+        if isinstance(raw_date, date):
+            work_date = raw_date
+        else:
+            raw_date = str(raw_date or "").strip()
+            try:
+                work_date = datetime.strptime(raw_date, "%Y-%m-%d").date()
+            except ValueError:
+                work_date = parse_display_date(raw_date)
+        if work_date > today:
+            raise ValidationError("Cannot mark attendance for future date")
+
+        times = []
+        for key in ("check_in", "check_out"):
+            value = record.get(key)
+            if value is None or isinstance(value, time):
+                times.append(value)
+            else:
+                value = str(value).strip()
+                times.append(parse_display_time(value) if value else None)
+        check_in, check_out = times
+        if check_in is not None and check_out is not None and check_out <= check_in:
+            raise ValidationError("Check-out time must be after Check-in time")
+
+        status = str(record.get("status") or "").strip()
+        matched = [s for s in ATTENDANCE_STATUSES if s.lower() == status.lower()]
+        if not matched:
+            raise ValidationError(f"Invalid status '{status}' (expected {', '.join(ATTENDANCE_STATUSES)})")
+
+        return (employee_id, work_date, check_in, check_out, matched[0])
+
+    @staticmethod
+    @invalidates("attendance")
+    def bulk_import_attendance(records: Iterable[Dict], batch_size: int = IMPORT_BATCH_SIZE,
+                               on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Import chấm công số lượng lớn (thay cho gọi sp_mark_attendance từng dòng).
+        records: iterable các dict {employee_id, work_date, check_in, check_out, status},
+        có thể kèm "line" (số dòng trong file) để báo lỗi. Đọc theo dạng stream,
+        validate bằng Python rồi upsert theo batch, mỗi batch 1 transaction.
+        Nếu cả batch lỗi thì ghi lại từng dòng để biết chính xác dòng nào hỏng.
+        Trả về {"imported": int, "failed": int, "errors": [(line, message), ...]}
+        """
+        if batch_size < 1:
+            raise ValidationError("batch_size must be at least 1")
+
+        conn = None
+        cursor = None
+        summary = {"imported": 0, "failed": 0, "errors": []}
+        today = date.today()
+
+        def fail(line, message):
+            summary["failed"] += 1
+            summary["errors"].append((line, message))
+
+        def flush(batch):
+            # 1 query kiểm tra employee tồn tại cho cả batch
+            ids = sorted({row[0] for _, row in batch})
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"SELECT employee_id FROM employees WHERE employee_id IN ({placeholders})", ids)
+            existing = {r[0] for r in cursor.fetchall()}
+
+            valid = []
+            for line, row in batch:
+                if row[0] in existing:
+                    valid.append((line, row))
+                else:
+                    fail(line, f"Employee {row[0]} does not exist")
+            if valid:
+                try:
+                    cursor.executemany(AttendanceManager._UPSERT_SQL, [row for _, row in valid])
+                    conn.commit()
+                    summary["imported"] += len(valid)
+                except mysql.connector.Error:
+                    conn.rollback()
+                    # Tìm dòng lỗi: ghi lại từng dòng, mỗi dòng commit riêng
+                    for line, row in valid:
+                        try:
+                            cursor.execute(AttendanceManager._UPSERT_SQL, row)
+                            conn.commit()
+                            summary["imported"] += 1
+                        except mysql.connector.Error as err:
+                            conn.rollback()
+                            fail(line, str(err))
+
+            if on_progress:
+                on_progress(dict(summary, errors=len(summary["errors"])))
+
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor()
+
+            batch = []
+            for index, record in enumerate(records, start=1):
+                line = record.get("line", index)
+                try:
+                    batch.append((line, AttendanceManager._parse_import_row(record, today)))
+                except ValidationError as e:
+                    fail(line, str(e))
+                    continue
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+
+            summary["errors"].sort(key=lambda e: e[0])
+            return summary
+
+        except mysql.connector.Error as err:
+            if conn:
+                conn.rollback()
+            raise DatabaseError(f"Attendance import error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
@@ -3,13 +3,17 @@ from datetime import date
 import mysql.connector
 
 from ..config.database import DatabaseConnection
-from ..utils.helpers import parse_stored_procedure_error
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
+from ..utils.helpers import parse_stored_procedure_error, period_filter
 from ..utils.exceptions import *
 
+@instrument_manager
 class BonusDeductionManager:
     """Quản lý bonus và phạt"""
     
     @staticmethod
+    @invalidates("bonus_deductions")
     def create_bonus_deduction(employee_id: int, bd_type: str, amount: float,
                                 description: str, effective_date: date) -> Dict:
         """Tạo thêm bonus/phạt bằng sp_add_bonus_deduction"""
@@ -41,6 +45,7 @@ class BonusDeductionManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("bonus_deductions")
     def update_bonus_deduction(bd_id: int, description: str, amount: float) -> Dict:
         """Cập nhật bonus/phạt """
         conn = None
@@ -73,6 +78,7 @@ class BonusDeductionManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("bonus_deductions")
     def delete_bonus_deduction(bd_id: int) -> Dict:
         """Xóa bonus/phạt"""
         conn = None
@@ -100,6 +106,7 @@ class BonusDeductionManager:
                 conn.close()
     
     @staticmethod
+    @cached("bonus_deductions", "employees")
     def get_bonus_deduction_by_employee(employee_id: int, 
                                         month: Optional[int] = None,
                                         year: Optional[int] = None) -> List[Dict]:
@@ -119,8 +126,9 @@ class BonusDeductionManager:
             params = [employee_id]
             
             if month and year:
-                query += " AND MONTH(bd.effective_date) = %s AND YEAR(bd.effective_date) = %s"
-                params.extend([month, year])
+                date_sql, date_params = period_filter("bd.effective_date", month, year)
+                query += f" AND {date_sql}"
+                params.extend(date_params)
             
             query += " ORDER BY bd.effective_date DESC"
             
@@ -136,6 +144,7 @@ class BonusDeductionManager:
                 conn.close()
     
     @staticmethod
+    @cached("bonus_deductions")
     def get_bonus_deduction_log(bd_id: Optional[int] = None,
                                 employee_id: Optional[int] = None,
                                 limit: int = 100) -> List[Dict]:
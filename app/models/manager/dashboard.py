@@ -0,0 +1,105 @@
+from typing import Dict
+import mysql.connector
+
+from ..config.database import DatabaseConnection
+from ..utils.cache import cached
+from ..utils.instrumentation import instrument_manager
+from ..utils.exceptions import *
+
+@instrument_manager
+class DashboardManager:
+    """Thống kê tổng hợp cho Dashboard (vài câu aggregate, không N+1)"""
+
+    @staticmethod
+    @cached("employees", "departments", "projects", "assignments")
+    def get_dashboard_stats(top_n: int = 8, salary_bins: int = 8) -> Dict:
+        """
+        Trả về toàn bộ số liệu Dashboard trong 1 dict:
+        KPI, số nhân viên theo phòng ban, phân bố role, top lương, histogram lương.
+        Lương giữ nguyên đơn vị DB (chưa nhân MONEY_SCALE).
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            # 1. KPI + min/max lương để chia bucket
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM employees) AS total_employees,
+                    (SELECT COUNT(*) FROM departments) AS total_departments,
+                    (SELECT COUNT(*) FROM projects) AS total_projects,
+                    (SELECT COUNT(*) FROM assignments) AS active_assignments,
+                    (SELECT AVG(base_salary) FROM employees) AS avg_salary,
+                    (SELECT MIN(base_salary) FROM employees) AS min_salary,
+                    (SELECT MAX(base_salary) FROM employees) AS max_salary
+            """)
+            kpi = cursor.fetchone()
+
+            # 2. Nhân viên theo phòng ban
+            cursor.execute("""
+                SELECT d.department_name, COUNT(*) AS total
+                FROM employees e
+                JOIN departments d ON e.department_id = d.department_id
+                GROUP BY d.department_id, d.department_name
+                ORDER BY total DESC
+            """)
+            employees_by_dept = {r["department_name"]: r["total"] for r in cursor.fetchall()}
+
+            # 3. Phân bố role trong assignments
+            cursor.execute("""
+                SELECT COALESCE(role, 'Unknown') AS role, COUNT(*) AS total
+                FROM assignments
+                GROUP BY COALESCE(role, 'Unknown')
+                ORDER BY total DESC
+            """)
+            role_distribution = {r["role"]: r["total"] for r in cursor.fetchall()}
+
+            # 4. Top lương cao nhất
+            cursor.execute("""
+                SELECT full_name, base_salary
+                FROM employees
+                ORDER BY base_salary DESC, employee_id
+                LIMIT %s
+            """, (top_n,))
+            top_employees = [(r["full_name"], float(r["base_salary"])) for r in cursor.fetchall()]
+
+            # 5. Histogram lương: chia [min, max] thành salary_bins khoảng đều nhau
+            salary_hist = {"edges": [], "counts": []}
+            if kpi["min_salary"] is not None:
+                lo = float(kpi["min_salary"])
+                hi = float(kpi["max_salary"])
+                width = (hi - lo) / salary_bins if hi > lo else 1.0
+                cursor.execute("""
+                    SELECT LEAST(FLOOR((base_salary - %s) / %s), %s) AS bucket, COUNT(*) AS total
+                    FROM employees
+                    GROUP BY bucket
+                """, (lo, width, salary_bins - 1))
+                counts = [0] * salary_bins
+                for r in cursor.fetchall():
+                    counts[int(r["bucket"])] = r["total"]
+                salary_hist = {
+                    "edges": [lo + i * width for i in range(salary_bins + 1)],
+                    "counts": counts,
+                }
+
+            return {
+                "total_employees": kpi["total_employees"] or 0,
+                "total_departments": kpi["total_departments"] or 0,
+                "total_projects": kpi["total_projects"] or 0,
+                "active_assignments": kpi["active_assignments"] or 0,
+                "avg_salary": float(kpi["avg_salary"] or 0),
+                "employees_by_dept": employees_by_dept,
+                "role_distribution": role_distribution,
+                "top_employees": top_employees,
+                "salary_hist": salary_hist,
+            }
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Dashboard query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
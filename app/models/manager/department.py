@@ -2,13 +2,17 @@ import mysql.connector
 from typing import List, Dict
 
 from ..config.database import DatabaseConnection
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
 from ..utils.helpers import parse_stored_procedure_error
 from ..utils.exceptions import *
 
+@instrument_manager
 class DepartmentManager:
     """Manage departments with CRUD operations"""
     
     @staticmethod
+    @invalidates("departments")
     def create_department(department_name: str, location: str) -> Dict:
         """Create new department using sp_add_department"""
         conn = None
@@ -37,6 +41,7 @@ class DepartmentManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("departments")
     def update_department(department_id: int, department_name: str, location: str) -> Dict:
         """Cập nhật department bằng sp_update_department"""
         conn = None
@@ -61,6 +66,7 @@ class DepartmentManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("departments")
     def delete_department(department_id: int) -> Dict:
         """Xóa department với constraint check"""
         conn = None
@@ -95,6 +101,7 @@ class DepartmentManager:
                 conn.close()
     
     @staticmethod
+    @cached("departments", "employees")
     def get_all_departments() -> List[Dict]:
         """Có department bằng cách đếm nhân viên"""
         conn = None
@@ -1,15 +1,19 @@
 from datetime import date
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import mysql.connector
 
 from ..config.database import DatabaseConnection
-from ..utils.helpers import parse_stored_procedure_error
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
+from ..utils.helpers import parse_stored_procedure_error, like_escape, keyset_page
 from ..utils.exceptions import *
 
+@instrument_manager
 class EmployeeManager:
     """Manage employees with CRUD operations"""
     
     @staticmethod
+    @invalidates("employees")
     def create_employee(full_name: str, gender: str, date_of_birth: date,
                         phone: str, email: str, address: str, hire_date: date,
                         department_id: int, position: str, base_salary: float) -> Dict:
@@ -43,6 +47,7 @@ class EmployeeManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("employees")
     def update_employee(employee_id: int, full_name: str, phone: str,
                         email: str, address: str, position: str, base_salary: float) -> Dict:
         """Cập nhật thông tin nhân viên bằng sp_update_employee"""
@@ -70,6 +75,7 @@ class EmployeeManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("employees")
     def delete_employee(employee_id: int) -> Dict:
         """Xóa nhân viên bằng sp_delete_employee"""
         conn = None
@@ -96,6 +102,32 @@ class EmployeeManager:
                 conn.close()
     
     @staticmethod
+    def _list_query(sort_by: str, sort_order: str) -> str:
+        col_map = {
+            "employee_id": "e.employee_id",
+            "full_name": "e.full_name",
+            "gender": "e.gender",
+            "phone_number": "e.phone_number",
+            "email": "e.email",
+            "department_name": "d.department_name",
+            "position": "e.position",
+            "base_salary_vnd": "e.base_salary"
+        }
+
+        db_col = col_map.get(sort_by, "e.employee_id")
+
+        direction = "DESC" if sort_order.upper() == "DESC" else "ASC"
+
+        return f"""
+            SELECT e.*, d.department_name, d.location
+            FROM employees e
+            JOIN departments d ON e.department_id = d.department_id
+            ORDER BY {db_col} {direction}, e.employee_id {direction}
+            LIMIT %s OFFSET %s
+        """
+
+    @staticmethod
+    @cached("employees", "departments")
     def get_all_employees(limit: int = 100, offset: int = 0, 
                           sort_by: str = "employee_id", sort_order: str = "ASC") -> List[Dict]:
         conn = None
@@ -104,31 +136,77 @@ class EmployeeManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            col_map = {
+            query = EmployeeManager._list_query(sort_by, sort_order)
+            cursor.execute(query, (limit, offset))
+            return cursor.fetchall()
+            
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    @cached("employees", "departments")
+    def get_employees_after(after: Optional[Tuple] = None, limit: int = 15,
+                            sort_by: str = "employee_id", sort_order: str = "ASC") -> Dict:
+        """
+        Phân trang kiểu keyset (seek): after = (sort_key, employee_id) của dòng cuối trang trước,
+        None cho trang đầu. Trang N tốn như trang 1 vì không phải bỏ qua OFFSET dòng.
+        Trả về {"rows": [...], "has_next": bool, "next_cursor": (sort_key, employee_id) | None},
+        trang đầu có thêm "total" (tổng số nhân viên, tính trong cùng query).
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            # Cột có thể NULL được COALESCE để so sánh keyset không bị lọt dòng
+            sort_exprs = {
                 "employee_id": "e.employee_id",
                 "full_name": "e.full_name",
                 "gender": "e.gender",
-                "phone_number": "e.phone_number",
+                "phone_number": "COALESCE(e.phone_number, '')",
                 "email": "e.email",
                 "department_name": "d.department_name",
-                "position": "e.position",
+                "position": "COALESCE(e.position, '')",
                 "base_salary_vnd": "e.base_salary"
             }
-            
-            db_col = col_map.get(sort_by, "e.employee_id")
-            
-            direction = "DESC" if sort_order.upper() == "DESC" else "ASC"
+            expr = sort_exprs.get(sort_by, "e.employee_id")
+            desc = sort_order.upper() == "DESC"
+            direction = "DESC" if desc else "ASC"
+            op = "<" if desc else ">"
+
+            # Trang đầu: COUNT(*) OVER() tính trước LIMIT -> tổng số dòng, không cần query COUNT riêng.
+            # Trang sau có điều kiện seek nên không đếm được tổng; màn hình giữ tổng của trang đầu.
+            total_col = ", COUNT(*) OVER() AS total_count" if after is None else ""
+            where_sql = ""
+            params = []
+            if after is not None:
+                after_key, after_id = after
+                if expr == "e.employee_id":
+                    where_sql = f"WHERE e.employee_id {op} %s"
+                    params = [after_id]
+                else:
+                    where_sql = f"WHERE ({expr} {op} %s OR ({expr} = %s AND e.employee_id {op} %s))"
+                    params = [after_key, after_key, after_id]
 
             query = f"""
-                SELECT e.*, d.department_name, d.location
+                SELECT e.*, d.department_name, d.location, {expr} AS sort_key{total_col}
                 FROM employees e
                 JOIN departments d ON e.department_id = d.department_id
-                ORDER BY {db_col} {direction}
-                LIMIT %s OFFSET %s
+                {where_sql}
+                ORDER BY {expr} {direction}, e.employee_id {direction}
+                LIMIT %s
             """
-            cursor.execute(query, (limit, offset))
-            return cursor.fetchall()
-            
+            # Lấy dư 1 dòng để biết còn trang sau hay không
+            cursor.execute(query, (*params, limit + 1))
+            rows = cursor.fetchall()
+            return keyset_page(rows, limit, with_total=after is None)
+
         except mysql.connector.Error as err:
             raise DatabaseError(f"Query error: {err}")
         finally:
@@ -138,6 +216,7 @@ class EmployeeManager:
                 conn.close()
     
     @staticmethod
+    @cached("employees", "departments")
     def get_employee_by_id(employee_id: int) -> Optional[Dict]:
         """Lấy nhân viên bằng ID"""
         conn = None
@@ -164,26 +243,108 @@ class EmployeeManager:
                 conn.close()
     
     @staticmethod
+    def _search_query(keyword: str, with_total: bool = False) -> Tuple[str, list]:
+        """
+        SQL tìm nhân viên qua FULLTEXT ngram index ft_employee_search (xem 01_schema.sql).
+        Mỗi từ trong keyword phải xuất hiện (AND), kết quả xếp theo độ liên quan.
+        """
+        terms = [t.replace('"', '') for t in keyword.split()]
+        ft_terms = [t for t in terms if len(t) >= 2]   # ngram_token_size mặc định = 2
+
+        conditions = []
+        params = []
+        if ft_terms:
+            against = " ".join(f'+"{t}"' for t in ft_terms)
+            score_sql = "MATCH(e.full_name, e.email, e.phone_number) AGAINST (%s IN BOOLEAN MODE)"
+            conditions.append(score_sql)
+            params.append(against)
+        else:
+            # Keyword 1 ký tự: ngắn hơn token ngram -> tìm theo đầu tên
+            score_sql = "0"
+            conditions.append("e.full_name LIKE %s")
+            params.append(like_escape(keyword.strip()) + "%")
+
+        if keyword.strip().isdigit():
+            conditions.append("e.employee_id = %s")
+            params.append(int(keyword.strip()))
+
+        total_col = ", COUNT(*) OVER() AS total_count" if with_total else ""
+        where_sql = " OR ".join(conditions)
+        score_params = params[:1] if ft_terms else []
+
+        query = f"""
+            SELECT e.*, d.department_name, {score_sql} AS score{total_col}
+            FROM employees e
+            JOIN departments d ON e.department_id = d.department_id
+            WHERE {where_sql}
+            ORDER BY score DESC, e.full_name, e.employee_id
+        """
+        return query, score_params + params
+
+    @staticmethod
+    @cached("employees", "departments")
     def search_employees(keyword: str) -> List[Dict]:
-        """Tìm nhân viên bằng tên, email, số đth"""
+        """
+        Tìm nhân viên bằng tên, email, số đth (xếp theo độ liên quan), trả về mọi kết quả.
+        Cần phân trang thì dùng search_employees_page (có tổng số dòng).
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            if keyword and keyword.strip():
+                query, params = EmployeeManager._search_query(keyword)
+            else:
+                # Keyword rỗng: giữ như bản cũ (LIKE '%%'), trả về mọi nhân viên theo tên
+                query, params = """
+                    SELECT e.*, d.department_name
+                    FROM employees e
+                    JOIN departments d ON e.department_id = d.department_id
+                    ORDER BY e.full_name, e.employee_id
+                """, []
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            for r in rows:
+                r.pop("score", None)
+            return rows
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Search error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    @cached("employees", "departments")
+    def search_employees_page(keyword: str, limit: int = 15, offset: int = 0) -> Dict:
+        """Tìm nhân viên có phân trang: {"rows": [...], "total": n}"""
+        if not keyword or not keyword.strip():
+            return {"rows": [], "total": 0}
+
         conn = None
         cursor = None
         try:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            query = """
-                SELECT e.*, d.department_name
-                FROM employees e
-                JOIN departments d ON e.department_id = d.department_id
-                WHERE e.full_name LIKE %s 
-                OR e.email LIKE %s 
-                OR e.phone_number LIKE %s
-                ORDER BY e.full_name
-            """
-            search_pattern = f"%{keyword}%"
-            cursor.execute(query, (search_pattern, search_pattern, search_pattern))
-            return cursor.fetchall()
+            query, params = EmployeeManager._search_query(keyword, with_total=True)
+            cursor.execute(query + " LIMIT %s OFFSET %s", (*params, limit, offset))
+            rows = cursor.fetchall()
+
+            total = rows[0]["total_count"] if rows else 0
+            if not rows and offset > 0:
+                count_query, count_params = EmployeeManager._search_query(keyword)
+                cursor.execute(f"SELECT COUNT(*) AS total FROM ({count_query}) t", count_params)
+                total = cursor.fetchone()["total"]
+            for r in rows:
+                r.pop("total_count", None)
+                r.pop("score", None)
+
+            return {"rows": rows, "total": total}
             
         except mysql.connector.Error as err:
             raise DatabaseError(f"Search error: {err}")
@@ -192,18 +353,45 @@ class EmployeeManager:
                 cursor.close()
             if conn:
                 conn.close()
+
     @staticmethod
-    def count_employees() -> int:
-        """Đếm tổng số nhân viên hiện có"""
+    def get_directory_rows(since=None) -> Dict:
+        """
+        Dữ liệu gọn cho EmployeeDirectory: id, tên, phòng ban, chức vụ, email.
+        since = mốc updated_at lần tải trước -> chỉ lấy các dòng sửa từ mốc đó (delta).
+        Trả về {"rows": [...], "total": số nhân viên hiện có, "max_updated": mốc mới}
+        """
         conn = None
         cursor = None
         try:
             conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM employees")
-            return cursor.fetchone()[0]
-        except mysql.connector.Error:
-            return 0
+            cursor = conn.cursor(dictionary=True)
+
+            # Lấy tổng + mốc trước, để dòng sửa chen giữa 2 câu chỉ bị tải lại lần sau chứ không bị sót
+            cursor.execute("SELECT COUNT(*) AS total, MAX(updated_at) AS max_updated FROM employees")
+            summary = cursor.fetchone()
+
+            query = """
+                SELECT employee_id, full_name, department_id, position, email
+                FROM employees
+            """
+            params = ()
+            if since is not None:
+                # >= vì updated_at chỉ chính xác tới giây
+                query += " WHERE updated_at >= %s"
+                params = (since,)
+            cursor.execute(query + " ORDER BY employee_id", params)
+
+            return {
+                "rows": cursor.fetchall(),
+                "total": summary["total"],
+                "max_updated": summary["max_updated"],
+            }
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
         finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
\ No newline at end of file
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
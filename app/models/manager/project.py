@@ -3,13 +3,17 @@ from typing import List, Dict, Optional
 import mysql.connector
 
 from ..config.database import DatabaseConnection
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
 from ..utils.helpers import parse_stored_procedure_error
 from ..utils.exceptions import *
 
+@instrument_manager
 class ProjectManager:
     """Manage projects with CRUD operations"""
     
     @staticmethod
+    @invalidates("projects")
     def create_project(project_name: str, start_date: date, end_date: Optional[date],
                         budget: float, department_id: int) -> Dict:
         """Tạo dự án mới bằng sp_add_project"""
@@ -41,6 +45,7 @@ class ProjectManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("projects")
     def update_project(project_id: int, project_name: str, end_date: Optional[date]) -> Dict:
         """Cập nhật dự án bằng sp_update_project"""
         conn = None
@@ -65,6 +70,7 @@ class ProjectManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("projects", "assignments")
     def delete_project(project_id: int) -> Dict:
         """Xóa dự án"""
         conn = None
@@ -93,6 +99,7 @@ class ProjectManager:
                 conn.close()
     
     @staticmethod
+    @cached("projects", "assignments", "departments")
     def get_all_projects(status: Optional[str] = None) -> List[Dict]:
         """Có tất cả dự án bằng v_project_participation view
         
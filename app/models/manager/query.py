@@ -1,16 +1,101 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Callable
 import mysql.connector
 from decimal import Decimal
 import csv
+import gzip
 
 from ..config.database import DatabaseConnection
+from ..utils.cache import cached
+from ..utils.instrumentation import instrument_manager
 from ..utils.exceptions import *
 
 
+EXPORT_BATCH_SIZE = 2000   # số dòng mỗi lần fetchmany khi export
+
+
+# SQL của các báo cáo trên màn hình Queries; dùng chung cho hiển thị và export CSV
+REPORT_QUERIES = {
+    "query1": """
+        SELECT 
+            e.employee_id,
+            e.full_name,
+            e.position,
+            e.base_salary,              -- lương cơ bản từ employees
+            p.project_name,
+            a.role AS project_role,
+            a.hours_worked,
+            d.department_name
+        FROM employees e
+        INNER JOIN assignments a ON e.employee_id = a.employee_id
+        INNER JOIN projects p ON a.project_id = p.project_id
+        INNER JOIN departments d ON e.department_id = d.department_id
+        ORDER BY e.full_name, p.project_name
+    """,
+    "query2": """
+        SELECT 
+            e.employee_id,
+            e.full_name,
+            e.position,
+            e.base_salary,              -- lương cơ bản từ employees
+            d.department_name,
+            p.project_name,
+            a.role AS project_role,
+            a.hours_worked,
+            CASE 
+                WHEN a.assignment_id IS NULL THEN 'No project'
+                ELSE 'Assigned to project'
+            END AS assignment_status
+        FROM employees e
+        JOIN departments d ON e.department_id = d.department_id
+        LEFT JOIN assignments a ON e.employee_id = a.employee_id
+        LEFT JOIN projects p ON a.project_id = p.project_id
+        ORDER BY e.full_name, p.project_name
+    """,
+    "query3": """
+        SELECT 
+            e.employee_id,
+            e.full_name AS employee_name,
+            e.position,
+            e.base_salary,
+            p.project_name,
+            a.role AS project_role,
+            a.hours_worked,
+            d.department_name,
+            m.full_name AS manager_name,
+            m.email AS manager_email
+        FROM employees e
+        INNER JOIN assignments a ON e.employee_id = a.employee_id
+        INNER JOIN projects p ON a.project_id = p.project_id
+        INNER JOIN departments d ON e.department_id = d.department_id
+        LEFT JOIN employees m ON d.manager_id = m.employee_id
+        ORDER BY d.department_name, p.project_name, e.full_name
+    """,
+    "query4": """
+        SELECT 
+            e.employee_id,
+            e.full_name,
+            e.position,
+            d.department_name,
+            COUNT(a.assignment_id) AS total_assignments,
+            e.base_salary,
+            (SELECT AVG(base_salary) FROM employees) AS overall_avg_base_salary,
+            (e.base_salary - (SELECT AVG(base_salary) FROM employees)) AS difference
+        FROM employees e
+        JOIN departments d ON e.department_id = d.department_id
+        LEFT JOIN assignments a ON e.employee_id = a.employee_id
+        GROUP BY e.employee_id, e.full_name, e.position, d.department_name, e.base_salary
+        HAVING e.base_salary > (SELECT AVG(base_salary) FROM employees)
+        ORDER BY e.base_salary DESC
+    """,
+}
+
+
+@instrument_manager
 class QueryManager:
     """Manages complex queries and exports"""
 
     @staticmethod
+    @cached("employees", "assignments", "projects", "departments")
     def query_employee_project_roles() -> List[Dict]:
         """
         Query 1 (INNER JOIN):
@@ -22,23 +107,7 @@ class QueryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT 
-                    e.employee_id,
-                    e.full_name,
-                    e.position,
-                    e.base_salary,              -- lương cơ bản từ employees
-                    p.project_name,
-                    a.role AS project_role,
-                    a.hours_worked,
-                    d.department_name
-                FROM employees e
-                INNER JOIN assignments a ON e.employee_id = a.employee_id
-                INNER JOIN projects p ON a.project_id = p.project_id
-                INNER JOIN departments d ON e.department_id = d.department_id
-                ORDER BY e.full_name, p.project_name
-            """
-            cursor.execute(query)
+            cursor.execute(REPORT_QUERIES["query1"])
             return cursor.fetchall()
 
         except mysql.connector.Error as err:
@@ -50,6 +119,7 @@ class QueryManager:
                 conn.close()
 
     @staticmethod
+    @cached("employees", "assignments", "projects", "departments")
     def query_all_employees_with_roles() -> List[Dict]:
         """
         Query 2 (LEFT JOIN):
@@ -61,27 +131,7 @@ class QueryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT 
-                    e.employee_id,
-                    e.full_name,
-                    e.position,
-                    e.base_salary,              -- lương cơ bản từ employees
-                    d.department_name,
-                    p.project_name,
-                    a.role AS project_role,
-                    a.hours_worked,
-                    CASE 
-                        WHEN a.assignment_id IS NULL THEN 'No project'
-                        ELSE 'Assigned to project'
-                    END AS assignment_status
-                FROM employees e
-                JOIN departments d ON e.department_id = d.department_id
-                LEFT JOIN assignments a ON e.employee_id = a.employee_id
-                LEFT JOIN projects p ON a.project_id = p.project_id
-                ORDER BY e.full_name, p.project_name
-            """
-            cursor.execute(query)
+            cursor.execute(REPORT_QUERIES["query2"])
             return cursor.fetchall()
 
         except mysql.connector.Error as err:
@@ -93,6 +143,7 @@ class QueryManager:
                 conn.close()
 
     @staticmethod
+    @cached("employees", "assignments", "projects", "departments")
     def query_employee_project_manager() -> List[Dict]:
         """
         Query 3 (Multi-table JOIN 3+):
@@ -104,26 +155,7 @@ class QueryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT 
-                    e.employee_id,
-                    e.full_name AS employee_name,
-                    e.position,
-                    e.base_salary,
-                    p.project_name,
-                    a.role AS project_role,
-                    a.hours_worked,
-                    d.department_name,
-                    m.full_name AS manager_name,
-                    m.email AS manager_email
-                FROM employees e
-                INNER JOIN assignments a ON e.employee_id = a.employee_id
-                INNER JOIN projects p ON a.project_id = p.project_id
-                INNER JOIN departments d ON e.department_id = d.department_id
-                LEFT JOIN employees m ON d.manager_id = m.employee_id
-                ORDER BY d.department_name, p.project_name, e.full_name
-            """
-            cursor.execute(query)
+            cursor.execute(REPORT_QUERIES["query3"])
             return cursor.fetchall()
 
         except mysql.connector.Error as err:
@@ -135,6 +167,7 @@ class QueryManager:
                 conn.close()
 
     @staticmethod
+    @cached("employees", "assignments", "departments")
     def query_above_average_salary() -> List[Dict]:
         """
         Query 4 (Above Avg):
@@ -147,24 +180,7 @@ class QueryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT 
-                    e.employee_id,
-                    e.full_name,
-                    e.position,
-                    d.department_name,
-                    COUNT(a.assignment_id) AS total_assignments,
-                    e.base_salary,
-                    (SELECT AVG(base_salary) FROM employees) AS overall_avg_base_salary,
-                    (e.base_salary - (SELECT AVG(base_salary) FROM employees)) AS difference
-                FROM employees e
-                JOIN departments d ON e.department_id = d.department_id
-                LEFT JOIN assignments a ON e.employee_id = a.employee_id
-                GROUP BY e.employee_id, e.full_name, e.position, d.department_name, e.base_salary
-                HAVING e.base_salary > (SELECT AVG(base_salary) FROM employees)
-                ORDER BY e.base_salary DESC
-            """
-            cursor.execute(query)
+            cursor.execute(REPORT_QUERIES["query4"])
             return cursor.fetchall()
 
         except mysql.connector.Error as err:
@@ -206,3 +222,95 @@ class QueryManager:
 
         except Exception as e:
             raise DatabaseError(f"CSV export error: {e}")
+
+    @staticmethod
+    def export_rows_csv(columns: List[str], rows: List[tuple], filename: str,
+                        compress: Optional[bool] = None) -> Dict:
+        """
+        Export các dòng đang hiển thị (tuple giá trị gốc, đúng thứ tự sort/lọc trên màn hình).
+        compress=None: tự nén gzip nếu tên file kết thúc bằng .gz.
+        """
+        if not rows:
+            raise ValidationError("No data to export")
+        if compress is None:
+            compress = filename.lower().endswith(".gz")
+        try:
+            opener = gzip.open if compress else open
+            with opener(filename, "wt", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                to_csv = QueryManager._csv_value
+                writer.writerows([to_csv(v) for v in row] for row in rows)
+
+            return {
+                "message": f"Exported {len(rows)} rows to {filename}",
+                "rows": len(rows),
+                "filename": filename,
+            }
+
+        except OSError as e:
+            raise DatabaseError(f"CSV export error: {e}")
+
+    @staticmethod
+    def _csv_value(value):
+        if isinstance(value, Decimal):
+            return float(value)
+        if value is None:
+            return ""
+        return value
+
+    @staticmethod
+    def export_report_csv(report: str, filename: str, batch_size: int = EXPORT_BATCH_SIZE,
+                          compress: Optional[bool] = None,
+                          on_progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Export thẳng 1 báo cáo (key trong REPORT_QUERIES) ra CSV, không giữ cả kết quả trong RAM:
+        cursor unbuffered đọc từ server theo từng batch fetchmany rồi ghi ngay ra file.
+        compress=None: tự nén gzip nếu tên file kết thúc bằng .gz.
+        on_progress(số dòng đã ghi) được gọi sau mỗi batch (chạy trên thread đang export).
+        """
+        if report not in REPORT_QUERIES:
+            raise ValidationError(f"Unknown report: {report}")
+        if compress is None:
+            compress = filename.lower().endswith(".gz")
+
+        conn = None
+        cursor = None
+        rows = 0
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(REPORT_QUERIES[report])
+
+            opener = gzip.open if compress else open
+            with opener(filename, "wt", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                writer.writerow(cursor.column_names)
+                to_csv = QueryManager._csv_value
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    writer.writerows([to_csv(v) for v in row] for row in batch)
+                    rows += len(batch)
+                    if on_progress:
+                        on_progress(rows)
+
+            return {
+                "message": f"Exported {rows} rows to {filename}",
+                "rows": rows,
+                "filename": filename,
+            }
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        except OSError as e:
+            raise DatabaseError(f"CSV export error: {e}")
+        finally:
+            # Dừng giữa chừng (lỗi ghi file) thì phải đọc bỏ phần còn lại trước khi đóng cursor
+            if conn and conn.unread_result:
+                conn.consume_results()
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
@@ -1,14 +1,22 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from datetime import date
 import mysql.connector
 
 from ..config.database import DatabaseConnection
-from ..utils.helpers import parse_stored_procedure_error, month_name_to_number
+from ..utils.cache import cached, invalidates
+from ..utils.instrumentation import instrument_manager
+from ..utils.helpers import (
+    parse_stored_procedure_error, month_name_to_number, period_filter,
+    remove_accents, like_contains, keyset_page, period_key, month_number_to_name
+)
 from ..utils.exceptions import *
 
+@instrument_manager
 class SalaryManager:
     """Quản lý lương và tính lương tạm tính"""
     
     @staticmethod
+    @invalidates("salary_payments")
     def record_salary_payment(employee_id: int, month: str, 
                             year: int, total_amount: float) -> Dict:
         """Ghi nhận chi trả lương (Chốt sổ)"""
@@ -40,6 +48,113 @@ class SalaryManager:
                 conn.close()
     
     @staticmethod
+    @invalidates("salary_payments")
+    def close_payroll_month(month: str, year: int) -> Dict:
+        """
+        Chốt lương cả tháng cho mọi nhân viên chưa được chốt, trong 1 transaction.
+        Thực nhận = lương cứng + thưởng - phạt của tháng (giống calculate_salary),
+        ghi bằng 1 câu INSERT ... SELECT thay vì gọi sp_record_salary_payment từng người.
+        Trả về {"inserted", "skipped" (đã chốt trước đó), "failed" (thực nhận <= 0),
+                "failed_ids", "message"}
+        """
+        month_num = month_name_to_number(month)
+        if not month_num:
+            raise ValidationError("Invalid month name")
+        if year < 2000 or year > date.today().year + 1:
+            raise ValidationError("Invalid year")
+
+        date_sql, date_params = period_filter("effective_date", month_num, year)
+
+        # Nguồn chung: thực nhận tạm tính + đã chốt chưa (anti-join với salary_payments).
+        # Không đọc payroll_monthly_rollup ở đây: trigger INSERT salary_payments ghi vào bảng đó,
+        # MySQL không cho 1 câu lệnh vừa đọc vừa để trigger ghi cùng 1 bảng.
+        source_sql = f"""
+            FROM employees e
+            LEFT JOIN (
+                SELECT 
+                    employee_id, 
+                    SUM(CASE WHEN bd_type = 'Bonus' THEN amount ELSE 0 END) as total_bonus,
+                    SUM(CASE WHEN bd_type = 'Deduction' THEN amount ELSE 0 END) as total_deduction
+                FROM bonus_deductions
+                WHERE {date_sql}
+                GROUP BY employee_id
+            ) bd ON e.employee_id = bd.employee_id
+            LEFT JOIN salary_payments sp 
+                ON e.employee_id = sp.employee_id 
+                AND sp.period_key = %s
+        """
+        source_params = (*date_params, period_key(month_num, year))
+        net_sql = "(e.base_salary + COALESCE(bd.total_bonus, 0) - COALESCE(bd.total_deduction, 0))"
+
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            # Locking read: khóa dòng employees + khoảng salary_payments của kỳ này tới khi commit,
+            # nên phiên khác chốt cùng tháng (hay thêm nhân viên) phải chờ -> 3 câu dưới nhìn cùng 1 trạng thái
+            cursor.execute("""
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(sp.payment_id IS NOT NULL), 0) AS already_paid
+                FROM employees e
+                LEFT JOIN salary_payments sp
+                    ON e.employee_id = sp.employee_id
+                    AND sp.period_key = %s
+                FOR UPDATE
+            """, (period_key(month_num, year),))
+            counts = cursor.fetchone()
+
+            # UNIQUE u_emp_month_year vẫn là chốt chặn cuối nếu 2 phiên cùng chốt 1 tháng
+            cursor.execute(f"""
+                INSERT INTO salary_payments(employee_id, salary_month, year, total_amount, payment_date, payment_status)
+                SELECT e.employee_id, %s, %s, {net_sql}, CURDATE(), 'Paid'
+                {source_sql}
+                WHERE sp.payment_id IS NULL AND {net_sql} > 0
+            """, (month, year, *source_params))
+            inserted = cursor.rowcount
+
+            # Sau INSERT, ai trong kỳ vẫn chưa có phiếu lương chính là người có thực nhận <= 0
+            # (sp_record_salary_payment cũng chặn) -> đếm từ kết quả thật thay vì tính lại net
+            cursor.execute("""
+                SELECT e.employee_id
+                FROM employees e
+                LEFT JOIN salary_payments sp
+                    ON e.employee_id = sp.employee_id
+                    AND sp.period_key = %s
+                WHERE sp.payment_id IS NULL
+                ORDER BY e.employee_id
+            """, (period_key(month_num, year),))
+            failed_ids = [r["employee_id"] for r in cursor.fetchall()]
+
+            conn.commit()
+
+            failed = len(failed_ids)
+            skipped = int(counts["already_paid"])
+            return {
+                "inserted": inserted,
+                "skipped": skipped,
+                "failed": failed,
+                "failed_ids": failed_ids,
+                "message": f"Payroll closed for {month} {year}: {inserted} recorded, "
+                           f"{skipped} already recorded, {failed} with net amount <= 0"
+            }
+
+        except mysql.connector.Error as err:
+            if conn:
+                conn.rollback()
+            if err.errno == 1062:
+                raise ValidationError("Payroll for this month is being closed by another session, please retry")
+            raise DatabaseError(f"Payroll close error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    @cached("employees", "bonus_deductions")
     def calculate_salary(employee_id: int, month: str, year: int) -> Optional[Dict]:
         """Tính toán lương thử cho 1 nhân viên (Preview)"""
         conn = None
@@ -48,30 +163,21 @@ class SalaryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            month_num = month_name_to_number(month)
-
             query = """
                 SELECT 
                     e.employee_id,
                     e.full_name as employee_name,
                     e.base_salary,
-                    COALESCE(bd.total_bonus, 0) as total_bonus,
-                    COALESCE(bd.total_deduction, 0) as total_deduction,
-                    (e.base_salary + COALESCE(bd.total_bonus, 0) - COALESCE(bd.total_deduction, 0)) as net_amount,
+                    COALESCE(r.total_bonus, 0) as total_bonus,
+                    COALESCE(r.total_deduction, 0) as total_deduction,
+                    (e.base_salary + COALESCE(r.total_bonus, 0) - COALESCE(r.total_deduction, 0)) as net_amount,
                     'Estimated' as payment_status
                 FROM employees e
-                LEFT JOIN (
-                    SELECT 
-                        employee_id, 
-                        SUM(CASE WHEN bd_type = 'Bonus' THEN amount ELSE 0 END) as total_bonus,
-                        SUM(CASE WHEN bd_type = 'Deduction' THEN amount ELSE 0 END) as total_deduction
-                    FROM bonus_deductions
-                    WHERE MONTH(effective_date) = %s AND YEAR(effective_date) = %s
-                    GROUP BY employee_id
-                ) bd ON e.employee_id = bd.employee_id
+                LEFT JOIN payroll_monthly_rollup r
+                    ON r.employee_id = e.employee_id AND r.year = %s AND r.month_num = %s
                 WHERE e.employee_id = %s
             """
-            cursor.execute(query, (month_num, year, employee_id))
+            cursor.execute(query, (year, month_name_to_number(month), employee_id))
             return cursor.fetchone()
             
         except mysql.connector.Error as err:
@@ -83,6 +189,7 @@ class SalaryManager:
                 conn.close()
     
     @staticmethod
+    @cached("employees", "salary_payments", "bonus_deductions")
     def get_salary_by_employee(employee_id: int) -> List[Dict]:
         """Lịch sử trả lương của nhân viên"""
         conn = None
@@ -95,15 +202,7 @@ class SalaryManager:
                 SELECT *
                 FROM v_monthly_salary_summary
                 WHERE employee_id = %s
-                ORDER BY year DESC, 
-                CASE salary_month
-                    WHEN 'January' THEN 1 WHEN 'February' THEN 2
-                    WHEN 'March' THEN 3 WHEN 'April' THEN 4
-                    WHEN 'May' THEN 5 WHEN 'June' THEN 6
-                    WHEN 'July' THEN 7 WHEN 'August' THEN 8
-                    WHEN 'September' THEN 9 WHEN 'October' THEN 10
-                    WHEN 'November' THEN 11 WHEN 'December' THEN 12
-                END DESC
+                ORDER BY year DESC, month_num DESC
             """
             cursor.execute(query, (employee_id,))
             return cursor.fetchall()
@@ -117,6 +216,95 @@ class SalaryManager:
                 conn.close()
     
     @staticmethod
+    def _month_query(month: str, year: int, sort_by: str, sort_order: str,
+                     keyword: str = "",
+                     employee_id: Optional[int] = None, after: Optional[Tuple] = None,
+                     keyset: bool = False) -> Tuple[str, list]:
+        """
+        SQL bảng lương tạm tính của 1 tháng (chưa có LIMIT) + tham số.
+        keyset=True thêm cột sort_key; after = (sort_key, employee_id) của dòng cuối trang trước.
+        """
+
+        # Lọc nhân viên ngay trong SQL: theo ID chính xác, hoặc keyword khớp ID / tên không dấu.
+        # Collation ai_ci bỏ qua dấu; riêng Đ/đ là chữ cái riêng nên REPLACE về D/d trước khi so.
+        conditions = []
+        filter_params = []
+        if employee_id is not None:
+            conditions.append("e.employee_id = %s")
+            filter_params = [employee_id]
+        elif keyword and keyword.strip():
+            pattern = like_contains(remove_accents(keyword.strip()))
+            conditions.append("""(CAST(e.employee_id AS CHAR) LIKE %s
+                OR REPLACE(REPLACE(e.full_name, 'đ', 'd'), 'Đ', 'D') LIKE %s COLLATE utf8mb4_0900_ai_ci)""")
+            filter_params = [pattern, pattern]
+
+        # Cột sort là biểu thức trên bảng gốc (không phải alias) để dùng được cả trong WHERE seek.
+        # employee_id / full_name / base_salary có index -> seek bằng range scan;
+        # thưởng / phạt / thực nhận tính từ rollup nên vẫn phải sort kết quả join.
+        sort_mapping = {
+            "employee_id": "e.employee_id",
+            "employee_name": "e.full_name",
+            "base_salary_vnd": "e.base_salary",
+            "total_bonus_vnd": "COALESCE(r.total_bonus, 0)",
+            "total_deduction_vnd": "COALESCE(r.total_deduction, 0)",
+            "net_amount_vnd": "(e.base_salary + COALESCE(r.total_bonus, 0) - COALESCE(r.total_deduction, 0))"
+        }
+        db_sort_col = sort_mapping.get(sort_by, "e.employee_id")
+        
+        db_sort_order = "DESC" if sort_order.upper() == "DESC" else "ASC"
+
+        seek_params = []
+        if after is not None:
+            after_key, after_id = after
+            op = "<" if db_sort_order == "DESC" else ">"
+            if db_sort_col == "e.employee_id":
+                conditions.append(f"e.employee_id {op} %s")
+                seek_params = [after_id]
+            else:
+                conditions.append(f"({db_sort_col}, e.employee_id) {op} (%s, %s)")
+                seek_params = [after_key, after_id]
+        where_sql = ("WHERE " + "\n                AND ".join(conditions)) if conditions else ""
+
+        sort_key_col = f",\n                {db_sort_col} AS sort_key" if keyset else ""
+        if keyset and after is None:
+            # Trang đầu: tổng số dòng (đã lọc) tính trước LIMIT trong cùng query
+            sort_key_col += ",\n                COUNT(*) OVER() AS total_count"
+
+        query = f"""
+            SELECT 
+                e.employee_id,
+                e.full_name as employee_name,
+                e.base_salary,
+                
+                -- Tổng thưởng / phạt trong tháng
+                COALESCE(r.total_bonus, 0) as total_bonus,
+                COALESCE(r.total_deduction, 0) as total_deduction,
+                
+                -- Công thức: Lương cứng + Thưởng - Phạt = Thực nhận (Tạm tính)
+                (e.base_salary + COALESCE(r.total_bonus, 0) - COALESCE(r.total_deduction, 0)) as net_amount,
+                
+                -- Tháng đã chốt lương thì là 'Paid', không thì là 'Estimated'
+                CASE 
+                    WHEN r.payment_id IS NOT NULL THEN 'Paid'
+                    ELSE 'Estimated'
+                END as status{sort_key_col}
+                
+            FROM employees e
+            
+            -- Tổng hợp tháng đã được trigger tính sẵn: tra theo khóa chính, không GROUP BY
+            LEFT JOIN payroll_monthly_rollup r
+                ON r.employee_id = e.employee_id
+                AND r.year = %s AND r.month_num = %s
+
+            {where_sql}
+                
+            ORDER BY {db_sort_col} {db_sort_order}, e.employee_id {db_sort_order}
+        """
+        # Tham số: (năm, số tháng, bộ lọc nhân viên, vị trí seek)
+        return query, [year, month_name_to_number(month), *filter_params, *seek_params]
+
+    @staticmethod
+    @cached("employees", "salary_payments", "bonus_deductions")
     def get_salary_by_month(month: str, year: int, limit: int = 100, offset: int = 0, sort_by: str = "employee_id", sort_order: str = "ASC") -> List[Dict]:
         conn = None
         cursor = None
@@ -124,66 +312,99 @@ class SalaryManager:
             conn = DatabaseConnection.get_connection()
             cursor = conn.cursor(dictionary=True)
             
-            month_num = month_name_to_number(month)
-
-            sort_mapping = {
-                "employee_id": "e.employee_id",
-                "employee_name": "e.full_name",
-                "base_salary_vnd": "e.base_salary",
-                "total_bonus_vnd": "total_bonus",
-                "total_deduction_vnd": "total_deduction",
-                "net_amount_vnd": "net_amount"
-            }
-            db_sort_col = sort_mapping.get(sort_by, "e.employee_id")
+            query, params = SalaryManager._month_query(month, year, sort_by, sort_order)
+            cursor.execute(query + " LIMIT %s OFFSET %s", (*params, limit, offset))
+            return cursor.fetchall()
             
-            db_sort_order = "DESC" if sort_order.upper() == "DESC" else "ASC"
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    @cached("employees", "salary_payments", "bonus_deductions")
+    def get_salary_after(month: str, year: int, after: Optional[Tuple] = None, limit: int = 15,
+                         sort_by: str = "employee_id", sort_order: str = "ASC",
+                         keyword: str = "", employee_id: Optional[int] = None) -> Dict:
+        """
+        Phân trang keyset cho bảng lương tháng: after = (sort_key, employee_id) của dòng cuối
+        trang trước (None = trang đầu). employee_id luôn là tiebreak nên thứ tự ổn định
+        kể cả khi nhiều người cùng net_amount.
+        Trả về {"rows": [...], "has_next": bool, "next_cursor": ... }, trang đầu có thêm
+        "total" = số dòng sau khi lọc keyword / employee_id (COUNT(*) OVER() trong cùng query).
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            # Điều kiện seek nằm ngay trong WHERE của query gốc (không bọc subquery),
+            # nên trang sau chỉ đọc tiếp từ vị trí cursor thay vì dựng lại cả tháng
+            query, params = SalaryManager._month_query(
+                month, year, sort_by, sort_order, keyword=keyword, employee_id=employee_id,
+                after=after, keyset=True
+            )
+            query += " LIMIT %s"
+            # Lấy dư 1 dòng để biết còn trang sau hay không
+            cursor.execute(query, (*params, limit + 1))
+            return keyset_page(cursor.fetchall(), limit, with_total=after is None)
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    @cached("salary_payments")
+    def get_payroll_trend(from_month: str, from_year: int, to_month: str, to_year: int,
+                          employee_id: Optional[int] = None) -> List[Dict]:
+        """
+        Tổng lương đã chốt theo từng kỳ trong khoảng [from, to] (tính cả 2 đầu),
+        của cả công ty hoặc 1 nhân viên. Lọc theo period_key nên là range scan trên index.
+        Mỗi dòng: {period_key, year, month, salary_month, payments, total_paid, avg_paid}
+        """
+        start = period_key(from_month, from_year)
+        end = period_key(to_month, to_year)
+        if start > end:
+            raise ValidationError("Start period must not be after end period")
+
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor(dictionary=True)
+
+            emp_sql = ""
+            params = [start, end]
+            if employee_id is not None:
+                emp_sql = "AND employee_id = %s"
+                params.append(employee_id)
 
-            query = f"""
+            cursor.execute(f"""
                 SELECT 
-                    e.employee_id,
-                    e.full_name as employee_name,
-                    e.base_salary,
-                    
-                    -- Tính tổng thưởng trong tháng
-                    COALESCE(bd.total_bonus, 0) as total_bonus,
-                    
-                    -- Tính tổng phạt trong tháng
-                    COALESCE(bd.total_deduction, 0) as total_deduction,
-                    
-                    -- Công thức: Lương cứng + Thưởng - Phạt = Thực nhận (Tạm tính)
-                    (e.base_salary + COALESCE(bd.total_bonus, 0) - COALESCE(bd.total_deduction, 0)) as net_amount,
-                    
-                    -- Kiểm tra trạng thái: Nếu có trong bảng salary_payments thì là 'Paid', không thì là 'Estimated'
-                    CASE 
-                        WHEN sp.payment_id IS NOT NULL THEN 'Paid'
-                        ELSE 'Estimated'
-                    END as status
-                    
-                FROM employees e
-                
-                -- JOIN 1: Lấy tổng thưởng/phạt theo tháng/năm đang chọn
-                LEFT JOIN (
-                    SELECT 
-                        employee_id, 
-                        SUM(CASE WHEN bd_type = 'Bonus' THEN amount ELSE 0 END) as total_bonus,
-                        SUM(CASE WHEN bd_type = 'Deduction' THEN amount ELSE 0 END) as total_deduction
-                    FROM bonus_deductions
-                    WHERE MONTH(effective_date) = %s AND YEAR(effective_date) = %s
-                    GROUP BY employee_id
-                ) bd ON e.employee_id = bd.employee_id
-                
-                -- JOIN 2: Kiểm tra xem tháng này đã chốt lương chưa
-                LEFT JOIN salary_payments sp 
-                    ON e.employee_id = sp.employee_id 
-                    AND sp.salary_month = %s AND sp.year = %s
-                    
-                ORDER BY {db_sort_col} {db_sort_order}
-                LIMIT %s OFFSET %s
-            """
-            # Truyền tham số: (tháng_số, năm, tên_tháng, năm)
-            cursor.execute(query, (month_num, year, month, year, limit, offset))
-            return cursor.fetchall()
-            
+                    period_key,
+                    COUNT(*) AS payments,
+                    SUM(total_amount) AS total_paid,
+                    AVG(total_amount) AS avg_paid
+                FROM salary_payments
+                WHERE period_key BETWEEN %s AND %s
+                {emp_sql}
+                GROUP BY period_key
+                ORDER BY period_key
+            """, params)
+            rows = cursor.fetchall()
+            for r in rows:
+                r["year"], r["month"] = divmod(r["period_key"], 100)
+                r["salary_month"] = month_number_to_name(r["month"])
+            return rows
+
         except mysql.connector.Error as err:
             raise DatabaseError(f"Query error: {err}")
         finally:
@@ -191,18 +412,33 @@ class SalaryManager:
                 cursor.close()
             if conn:
                 conn.close()
-                
+
     @staticmethod
-    def count_salary_records() -> int:
+    @invalidates("salary_payments", "bonus_deductions")
+    def rebuild_payroll_rollup() -> Dict:
+        """Dựng lại payroll_monthly_rollup từ bonus_deductions + salary_payments"""
         conn = None
         cursor = None
         try:
             conn = DatabaseConnection.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM employees")
-            return cursor.fetchone()[0]
-        except mysql.connector.Error:
-            return 0
+            cursor = conn.cursor(dictionary=True)
+
+            cursor.callproc('sp_rebuild_payroll_rollup')
+
+            total_rows = 0
+            for result in cursor.stored_results():
+                row = result.fetchone()
+                total_rows = row['total_rows']
+
+            conn.commit()
+            return {"rows": total_rows, "message": f"Payroll rollup rebuilt ({total_rows} rows)"}
+
+        except mysql.connector.Error as err:
+            if conn:
+                conn.rollback()
+            raise DatabaseError(f"Rollup rebuild error: {err}")
         finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
\ No newline at end of file
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
\ No newline at end of file
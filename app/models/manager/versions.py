@@ -0,0 +1,69 @@
+import mysql.connector
+from typing import Dict, Iterable
+
+from ..config.database import DatabaseConnection
+from ..utils.cache import query_cache
+from ..utils.instrumentation import instrument_manager
+from ..utils.exceptions import *
+
+@instrument_manager
+class VersionManager:
+    """Bộ đếm thay đổi table_versions: tăng sau mỗi lần ghi qua manager, app poll để thấy bảng nào đổi"""
+
+    @staticmethod
+    def get_versions() -> Dict[str, int]:
+        """
+        {tên bảng: version}. Chỉ 7 dòng theo khóa chính nên đủ rẻ để poll vài giây 1 lần.
+        Không cache: mục đích là thấy được thay đổi từ client khác.
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT table_name, version FROM table_versions")
+            return {name: int(version) for name, version in cursor.fetchall()}
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    @staticmethod
+    def bump_versions(tables: Iterable[str]) -> int:
+        """
+        Tăng version các bảng vừa ghi: 1 câu UPDATE trong transaction riêng, chạy sau khi lệnh ghi
+        đã commit. Khóa dòng đếm chỉ trong câu này, không phải suốt transaction ghi hay mỗi dòng
+        như trigger FOR EACH ROW (import / chốt lương hàng nghìn dòng vẫn chỉ tăng 1 lần).
+        Bảng không có trong table_versions bị bỏ qua. Trả về số bảng đã tăng.
+        """
+        tables = sorted(set(tables))
+        if not tables:
+            return 0
+        conn = None
+        cursor = None
+        try:
+            conn = DatabaseConnection.get_connection()
+            cursor = conn.cursor()
+            placeholders = ", ".join(["%s"] * len(tables))
+            cursor.execute(
+                f"UPDATE table_versions SET version = version + 1 WHERE table_name IN ({placeholders})",
+                tables
+            )
+            conn.commit()
+            return cursor.rowcount
+
+        except mysql.connector.Error as err:
+            raise DatabaseError(f"Query error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+
+# Mọi hàm @invalidates của process này tăng version sau khi ghi xong
+query_cache.add_write_listener(VersionManager.bump_versions)
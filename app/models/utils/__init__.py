@@ -3,7 +3,14 @@ from .exceptions import ValidationError, NotFoundError, DatabaseError, DeleteCon
 from .helpers import (
     month_number_to_name,
     month_name_to_number,
+    month_date_range,
+    period_filter,
+    period_key,
     format_currency_vnd,
+    remove_accents,
+    like_escape,
+    like_contains,
+    keyset_page,
     parse_stored_procedure_error,
     parse_display_date,
     format_display_date,
@@ -17,6 +24,8 @@ from .helpers import (
     validate_salary_vnd,
     ensure_email_domain
 )
+from .cache import QueryCache, query_cache, cached, invalidates
+from .instrumentation import Instrumentation, instrumentation, instrument_manager, fingerprint
 
 __all__ = [
     'ValidationError',
@@ -25,7 +34,14 @@ __all__ = [
     'DeleteConstraintError',
     'month_number_to_name',
     'month_name_to_number',
+    'month_date_range',
+    'period_filter',
+    'period_key',
     'format_currency_vnd',
+    'remove_accents',
+    'like_escape',
+    'like_contains',
+    'keyset_page',
     'parse_stored_procedure_error',
     'parse_display_date',
     'format_display_date',
@@ -37,5 +53,13 @@ __all__ = [
     'validate_phone',
     'validate_hire_date',
     'ensure_email_domain',
-    'validate_salary_vnd'
+    'validate_salary_vnd',
+    'QueryCache',
+    'query_cache',
+    'cached',
+    'invalidates',
+    'Instrumentation',
+    'instrumentation',
+    'instrument_manager',
+    'fingerprint'
 ]
\ No newline at end of file
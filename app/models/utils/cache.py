@@ -0,0 +1,229 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from .instrumentation import instrumentation
+
+CACHE_MAX_ENTRIES = 256     # số kết quả tối đa giữ trong cache (LRU)
+CACHE_TTL = 60.0            # giây; giới hạn độ cũ khi DB bị sửa từ nơi khác
+
+_MISS = object()
+
+
+def _clone(value):
+    """
+    Copy kết quả trước khi đưa ra ngoài, để caller sửa dict/list không làm hỏng cache.
+    Chỉ copy container (list/tuple/dict); giá trị bên trong (str, Decimal, date) là bất biến.
+    """
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return tuple(_clone(v) for v in value)
+    return value
+
+
+class QueryCache:
+    """
+    Cache kết quả đọc của manager: key = (hàm, tham số), giới hạn LRU + TTL,
+    mỗi entry gắn tag là các bảng nó đọc. Ghi vào bảng nào thì xóa mọi entry có tag bảng đó.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, tables, value)
+        self._by_table = {}             # table -> set(key)
+        self._versions = {}             # table -> số lần bị invalidate
+        self._db_versions = None        # table_versions đọc từ DB lần sync trước
+        self._listeners = []
+        self._write_listeners = []
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    # -------------------- Đọc / ghi --------------------
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return _MISS
+            expires_at, tables, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return _MISS
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def versions(self, tables) -> tuple:
+        """Chụp version các bảng trước khi query, dùng cho put()"""
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def put(self, key, value, tables, versions: tuple, ttl: float = None):
+        with self._lock:
+            # Bảng bị ghi trong lúc đang query -> kết quả có thể đã cũ, không lưu
+            if versions != tuple(self._versions.get(t, 0) for t in tables):
+                return
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (expires_at, tables, value)
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        """Gọi khi đang giữ lock"""
+        _, tables, _ = self._entries.pop(key)
+        for t in tables:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+
+    # -------------------- Invalidate --------------------
+    def invalidate(self, *tables):
+        """Xóa mọi entry đọc từ các bảng này và báo cho listener"""
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+                for key in list(self._by_table.pop(t, ())):
+                    if key in self._entries:
+                        self._remove(key)
+            self._stats["invalidations"] += 1
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(tables)
+            except Exception as e:
+                print(f"Cache listener error: {e}")
+
+    def sync(self, db_versions: dict) -> tuple:
+        """
+        Đối chiếu bộ đếm table_versions của DB (VersionManager.get_versions()) với lần trước,
+        invalidate các bảng đã bị ghi - kể cả ghi từ máy / client khác.
+        Trả về các bảng đã đổi; lần gọi đầu chỉ ghi nhận mốc, trả về ().
+        """
+        with self._lock:
+            previous, self._db_versions = self._db_versions, dict(db_versions)
+        if previous is None:
+            return ()
+        changed = tuple(t for t, v in db_versions.items() if previous.get(t) != v)
+        if changed:
+            self.invalidate(*changed)
+        return changed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            for t in self._versions:
+                self._versions[t] += 1
+
+    def add_listener(self, callback):
+        """callback(tables) được gọi (trên thread vừa ghi) mỗi khi có bảng bị invalidate"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def add_write_listener(self, callback):
+        """
+        callback(tables) được gọi sau mỗi hàm @invalidates của process này (không gọi khi
+        sync() thấy bảng đổi từ client khác). Dùng để tăng table_versions 1 lần / lệnh ghi.
+        """
+        with self._lock:
+            self._write_listeners.append(callback)
+
+    def notify_write(self, tables):
+        with self._lock:
+            listeners = list(self._write_listeners)
+        for listener in listeners:
+            try:
+                listener(tables)
+            except Exception as e:
+                print(f"Cache write listener error: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._entries)
+            s["max_entries"] = self.max_entries
+            s["ttl"] = self.ttl
+        lookups = s["hits"] + s["misses"]
+        s["hit_ratio"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+
+query_cache = QueryCache()
+
+
+def cached(*tables, ttl: float = None):
+    """
+    Decorator cho hàm đọc của manager (đặt dưới @staticmethod):
+        @staticmethod
+        @cached("employees", "departments")
+        def get_all_employees(...)
+    tables = các bảng mà query đọc; ghi vào bảng nào trong đó sẽ xóa kết quả đã cache.
+    """
+    tables = tuple(tables)
+
+    def decorator(fn):
+        name = fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not query_cache.enabled:
+                return fn(*args, **kwargs)
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(*args, **kwargs)   # tham số không hash được (list, dict) -> bỏ qua cache
+
+            value = query_cache.get(key)
+            if value is not _MISS:
+                instrumentation.note_cache_hit()
+                return _clone(value)
+
+            versions = query_cache.versions(tables)
+            value = fn(*args, **kwargs)
+            query_cache.put(key, _clone(value), tables, versions, ttl)
+            return value
+
+        wrapper.cache_tables = tables
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables):
+    """
+    Decorator cho hàm ghi của manager: sau khi chạy (kể cả khi lỗi, vì có thể đã commit 1 phần)
+    thì xóa cache của các bảng bị ghi và báo write listener (tăng table_versions).
+    """
+    tables = tuple(tables)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                query_cache.invalidate(*tables)
+                query_cache.notify_write(tables)
+
+        wrapper.invalidates_tables = tables
+        return wrapper
+    return decorator
@@ -1,7 +1,9 @@
 from datetime import datetime, date, time, timedelta
 from decimal import Decimal
+from typing import Tuple, List, Dict
 from .exceptions import ValidationError, NotFoundError, DatabaseError
 import re
+import unicodedata
 
 MONEY_SCALE = 10_000   # DB amount * 10,000 = VNĐ hiển thị
 EMAIL_DOMAIN = "@161Corp.com"
@@ -25,11 +27,77 @@ def month_name_to_number(month_name: str) -> int:
     }
     return months.get(month_name, 0)
 
+def month_date_range(month: int, year: int) -> Tuple[date, date]:
+    """
+    Tháng/năm -> khoảng ngày nửa mở [ngày 1 của tháng, ngày 1 tháng sau)
+    VD: (2, 2024) -> (2024-02-01, 2024-03-01)
+    """
+    month, year = int(month), int(year)
+    if not 1 <= month <= 12:
+        raise ValidationError("Month must be between 1 and 12")
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def period_filter(column: str, month: int, year: int) -> Tuple[str, Tuple[date, date]]:
+    """
+    Điều kiện lọc theo tháng dùng được index (thay cho MONTH(col) = %s AND YEAR(col) = %s)
+    Trả về (sql, params), VD: ("bd.effective_date >= %s AND bd.effective_date < %s", (start, end))
+    """
+    return f"{column} >= %s AND {column} < %s", month_date_range(month, year)
+
+def period_key(month, year: int) -> int:
+    """
+    Tháng (số hoặc tên) + năm -> khóa kỳ lương year*100 + month, khớp cột
+    salary_payments.period_key. VD: ('March', 2025) -> 202503
+    """
+    month_num = month_name_to_number(month) if isinstance(month, str) else int(month)
+    if not 1 <= month_num <= 12:
+        raise ValidationError("Invalid month")
+    return int(year) * 100 + month_num
+
 def format_currency_vnd(amount: float) -> str:
     if amount is None:
         return "0 VND"
     return f"{amount:,.0f} VND"
 
+def remove_accents(input_str) -> str:
+    """Chuyển đổi chuỗi có dấu thành không dấu (Hải Đăng -> Hai Dang)"""
+    if not input_str:
+        return ""
+    s = str(input_str)
+    s = s.replace("đ", "d").replace("Đ", "D")
+    s = unicodedata.normalize('NFKD', s)
+    return "".join(c for c in s if not unicodedata.combining(c))
+
+def like_escape(keyword: str) -> str:
+    """Escape %, _ và \\ để keyword được so khớp nguyên văn trong LIKE"""
+    return keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def like_contains(keyword: str) -> str:
+    """Keyword -> pattern LIKE '%keyword%'"""
+    return f"%{like_escape(keyword)}%"
+
+def keyset_page(rows: List[Dict], limit: int, with_total: bool = False) -> Dict:
+    """
+    Kết quả query keyset (đã lấy limit + 1 dòng, có cột sort_key) -> 1 trang
+    {"rows": [...], "has_next": bool, "next_cursor": (sort_key, employee_id) | None}
+    with_total: query có cột total_count (COUNT(*) OVER() ở trang đầu) -> thêm "total"
+    """
+    total = (rows[0]["total_count"] if rows else 0) if with_total else None
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if rows:
+        next_cursor = (rows[-1]["sort_key"], rows[-1]["employee_id"])
+    for r in rows:
+        del r["sort_key"]
+        r.pop("total_count", None)
+    page = {"rows": rows, "has_next": has_next, "next_cursor": next_cursor}
+    if with_total:
+        page["total"] = total
+    return page
+
 def parse_stored_procedure_error(error_msg: str) -> Exception:
     """Parse error message from stored procedure"""
     if "Email already exists" in error_msg:
@@ -0,0 +1,305 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+
+SLOW_QUERY_MS = 300.0       # lời gọi manager chậm hơn mốc này được ghi vào slow log
+SLOW_QUERY_LOG = os.environ.get(
+    "EIM_SLOW_QUERY_LOG",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "logs", "slow_queries.log")
+)
+STATS_WINDOW = 500          # số lời gọi gần nhất / method dùng để tính percentile
+MAX_FINGERPRINTS = 200      # số mẫu SQL khác nhau giữ thống kê
+
+# Lời gọi manager đang chạy trên thread / context hiện tại (None nếu không có)
+_current = ContextVar("manager_call", default=None)
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Chuẩn hóa câu SQL để gộp các lần chạy cùng dạng:
+    bỏ comment, hằng số -> ?, IN (%s, %s, ...) -> IN (...), gộp khoảng trắng.
+    """
+    sql = _COMMENT_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_LIST_RE.sub("(...)", sql.replace("%s", "?"))
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class _Call:
+    """Số liệu của 1 lời gọi manager (gom cả các query con)"""
+
+    __slots__ = ("method", "acquire_s", "connections", "sql_s", "rows", "statements", "cache_hit")
+
+    def __init__(self, method: str):
+        self.method = method
+        self.acquire_s = 0.0
+        self.connections = 0
+        self.sql_s = 0.0
+        self.rows = 0
+        self.statements = []     # [(fingerprint, giây)]
+        self.cache_hit = False   # @cached trả kết quả từ cache
+
+
+class _MethodStats:
+    __slots__ = ("calls", "errors", "slow", "cache_hits", "total_ms", "acquire_ms", "rows", "recent")
+
+    def __init__(self, window: int):
+        self.calls = self.errors = self.slow = self.cache_hits = self.rows = 0
+        self.total_ms = self.acquire_ms = 0.0
+        self.recent = deque(maxlen=window)
+
+
+class Instrumentation:
+    """
+    Thống kê các lời gọi manager: thời gian, thời gian chờ connection, số dòng đọc,
+    mẫu SQL đã chạy. Giữ percentile theo cửa sổ các lần gọi gần nhất và ghi lời gọi chậm ra file.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, log_path: str = SLOW_QUERY_LOG,
+                 window: int = STATS_WINDOW):
+        self.enabled = True
+        self.slow_ms = slow_ms
+        self.log_path = os.path.abspath(log_path) if log_path else None
+        self.window = window
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._methods = {}           # method -> _MethodStats
+        self._fingerprints = {}      # fingerprint -> [calls, total_ms, max_ms]
+        self._started = time.time()
+
+    def configure(self, slow_ms: float = None, log_path: str = None, enabled: bool = None):
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        if log_path is not None:
+            self.log_path = os.path.abspath(log_path) if log_path else None
+        if enabled is not None:
+            self.enabled = enabled
+
+    # -------------------- Ghi nhận --------------------
+    def wrap(self, name: str, fn):
+        """Bọc 1 hàm manager; lời gọi lồng nhau được tính vào lời gọi ngoài cùng"""
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or _current.get() is not None:
+                return fn(*args, **kwargs)
+            call = _Call(name)
+            token = _current.set(call)
+            start = time.perf_counter()
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _current.reset(token)
+                self._record(call, (time.perf_counter() - start) * 1000, failed)
+
+        wrapper.instrumented = name
+        return wrapper
+
+    def _record(self, call: _Call, wall_ms: float, failed: bool):
+        with self._lock:
+            stats = self._methods.get(call.method)
+            if stats is None:
+                stats = self._methods[call.method] = _MethodStats(self.window)
+            stats.calls += 1
+            stats.errors += failed
+            # Chỉ tính hit khi @cached báo, không lỗi và không mở connection nào
+            # (lời gọi con trúng cache nhưng hàm ngoài vẫn query thì không phải hit)
+            stats.cache_hits += call.cache_hit and not failed and call.connections == 0
+            stats.total_ms += wall_ms
+            stats.acquire_ms += call.acquire_s * 1000
+            stats.rows += call.rows
+            stats.recent.append(wall_ms)
+            for fp, seconds in call.statements:
+                entry = self._fingerprints.get(fp)
+                if entry is None:
+                    if len(self._fingerprints) >= MAX_FINGERPRINTS:
+                        continue
+                    entry = self._fingerprints[fp] = [0, 0.0, 0.0]
+                entry[0] += 1
+                entry[1] += seconds * 1000
+                entry[2] = max(entry[2], seconds * 1000)
+            slow = wall_ms >= self.slow_ms
+            stats.slow += slow
+        if slow:
+            self._log_slow(call, wall_ms, failed)
+
+    def _log_slow(self, call: _Call, wall_ms: float, failed: bool):
+        if not self.log_path:
+            return
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "method": call.method,
+            "wall_ms": round(wall_ms, 1),
+            "acquire_ms": round(call.acquire_s * 1000, 1),
+            "sql_ms": round(call.sql_s * 1000, 1),
+            "rows": call.rows,
+            "failed": failed,
+            "statements": [{"sql": fp, "ms": round(s * 1000, 1)} for fp, s in call.statements],
+        }
+        try:
+            with self._log_lock:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Slow query log error: {e}")
+
+    # -------------------- Hook từ DatabaseConnection --------------------
+    def active(self) -> bool:
+        return self.enabled and _current.get() is not None
+
+    def note_acquire(self, seconds: float):
+        call = _current.get()
+        if call is not None:
+            call.acquire_s += seconds
+            call.connections += 1
+
+    def note_cache_hit(self):
+        call = _current.get()
+        if call is not None:
+            call.cache_hit = True
+
+    def wrap_cursor(self, cursor):
+        return _CursorProxy(cursor, _current.get()) if self.active() else cursor
+
+    # -------------------- Đọc số liệu --------------------
+    def snapshot(self) -> dict:
+        """
+        {"methods": {tên: {calls, errors, slow, cache_hits, p50_ms, p95_ms, p99_ms, max_ms,
+         mean_ms, acquire_ms_avg, rows_avg}}, "statements": [...chậm nhất trước], ...}
+        """
+        with self._lock:
+            methods = {name: (s.calls, s.errors, s.slow, s.cache_hits, s.total_ms, s.acquire_ms,
+                              s.rows, sorted(s.recent))
+                       for name, s in self._methods.items()}
+            statements = [(fp, *v) for fp, v in self._fingerprints.items()]
+
+        out = {}
+        for name, (calls, errors, slow, hits, total_ms, acquire_ms, rows, recent) in methods.items():
+            out[name] = {
+                "calls": calls,
+                "errors": errors,
+                "slow": slow,
+                "cache_hits": hits,
+                "p50_ms": round(_percentile(recent, 50), 2),
+                "p95_ms": round(_percentile(recent, 95), 2),
+                "p99_ms": round(_percentile(recent, 99), 2),
+                "max_ms": round(recent[-1], 2) if recent else 0.0,
+                "mean_ms": round(total_ms / calls, 2),
+                "acquire_ms_avg": round(acquire_ms / calls, 2),
+                "rows_avg": round(rows / calls, 1),
+            }
+        statements.sort(key=lambda s: s[2], reverse=True)
+        return {
+            "since": datetime.fromtimestamp(self._started).isoformat(timespec="seconds"),
+            "slow_threshold_ms": self.slow_ms,
+            "slow_log": self.log_path,
+            "methods": out,
+            "statements": [{"sql": fp, "calls": c, "total_ms": round(t, 1), "max_ms": round(m, 1)}
+                           for fp, c, t, m in statements],
+        }
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._fingerprints.clear()
+            self._started = time.time()
+
+
+class _CursorProxy:
+    """Bọc cursor: đo thời gian từng câu lệnh và đếm dòng đọc về cho lời gọi đang chạy"""
+
+    def __init__(self, cursor, call: _Call):
+        self._cursor = cursor
+        self._call = call
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, sql_fp: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._call.sql_s += elapsed
+            self._call.statements.append((sql_fp, elapsed))
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(fingerprint(operation), self._cursor.execute, operation, params, *args, **kwargs)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        return self._timed(fingerprint(operation), self._cursor.executemany, operation, seq_params,
+                           *args, **kwargs)
+
+    def callproc(self, procname, args=(), *more, **kwargs):
+        return self._timed(f"CALL {procname}", self._cursor.callproc, procname, args, *more, **kwargs)
+
+    def stored_results(self):
+        for result in self._cursor.stored_results():
+            yield _CursorProxy(result, self._call)
+
+    def _count(self, rows):
+        if rows:
+            self._call.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self._count(self._cursor.fetchall())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._call.rows += 1
+        return row
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._call.rows += 1
+            yield row
+
+
+instrumentation = Instrumentation()
+
+
+def instrument_manager(cls):
+    """
+    Decorator cho class manager: bọc mọi @staticmethod public để đo thời gian
+        @instrument_manager
+        class EmployeeManager: ...
+    Tên trong thống kê: "EmployeeManager.get_employees_after".
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not isinstance(attr, staticmethod):
+            continue
+        setattr(cls, name, staticmethod(instrumentation.wrap(f"{cls.__name__}.{name}", attr.__func__)))
+    return cls
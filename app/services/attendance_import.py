@@ -0,0 +1,86 @@
+"""
+Import chấm công hàng loạt từ file CSV hoặc JSON lines (vd dữ liệu máy chấm công).
+
+    python -m app.services.attendance_import attendance.csv
+    python -m app.services.attendance_import badges.jsonl --batch-size 1000
+
+Mỗi dòng gồm: employee_id, work_date (YYYY-MM-DD hoặc DD/MM/YYYY),
+check_in, check_out (HH:MM, có thể bỏ trống), status (Present / Absent / On Leave).
+File được đọc dạng stream nên không phải nạp hết vào bộ nhớ.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Iterator
+
+from app.models.manager.attendance import AttendanceManager, IMPORT_BATCH_SIZE
+
+
+def read_csv(path: str) -> Iterator[Dict]:
+    """Đọc CSV có dòng tiêu đề, kèm số dòng trong file"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for record in reader:
+            record["line"] = reader.line_num
+            yield record
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Đọc JSON lines: mỗi dòng 1 object, bỏ qua dòng trống"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = {"_error": f"Invalid JSON: {e.msg}"}
+            if not isinstance(record, dict):
+                record = {"_error": "Each line must be a JSON object"}
+            record["line"] = line_no
+            yield record
+
+
+def read_records(path: str, fmt: str = None) -> Iterator[Dict]:
+    if fmt is None:
+        ext = os.path.splitext(path)[1].lower()
+        fmt = "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+    return read_jsonl(path) if fmt == "jsonl" else read_csv(path)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import attendance records")
+    parser.add_argument("path", help="CSV or JSON lines file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                        help=f"rows per transaction (default {IMPORT_BATCH_SIZE})")
+    parser.add_argument("--max-errors", type=int, default=50, help="number of row errors to print")
+    args = parser.parse_args(argv)
+
+    def progress(p):
+        print(f"\r  imported {p['imported']}, failed {p['failed']}", end="", file=sys.stderr, flush=True)
+
+    try:
+        result = AttendanceManager.bulk_import_attendance(
+            read_records(args.path, args.format),
+            batch_size=args.batch_size,
+            on_progress=progress
+        )
+    except Exception as e:
+        print(f"\nImport failed: {e}", file=sys.stderr)
+        return 2
+
+    print(file=sys.stderr)
+    print(f"Imported: {result['imported']}  Failed: {result['failed']}")
+    for line, message in result["errors"][:args.max_errors]:
+        print(f"  line {line}: {message}")
+    if len(result["errors"]) > args.max_errors:
+        print(f"  ... {len(result['errors']) - args.max_errors} more")
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
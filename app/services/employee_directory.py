@@ -0,0 +1,191 @@
+"""
+Danh bạ nhân viên dùng chung trong cả process cho các combobox chọn nhân viên
+và lọc nhân viên theo phòng ban. Tải 1 lần, sau đó chỉ tải lại các dòng đổi
+(theo employees.updated_at) khi có ghi vào bảng employees.
+"""
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from app.models.manager.employee import EmployeeManager
+from app.models.utils.cache import query_cache
+from app.models.utils.helpers import remove_accents
+
+
+def fold(text: str) -> str:
+    """Chuẩn hóa để so khớp: bỏ dấu, chữ thường (Hải Đăng -> hai dang)"""
+    return remove_accents(text).lower()
+
+
+class EmployeeDirectory:
+    """
+    Lưu dạng mảng song song theo thứ tự employee_id (mảng int + list str),
+    kèm index id -> vị trí và phòng ban -> các vị trí.
+    Nhãn "id - tên" và tên không dấu được tính sẵn 1 lần khi tải.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._ids = array("i")
+        self._dept_ids = array("i")
+        self._names: List[str] = []
+        self._positions: List[str] = []
+        self._emails: List[str] = []
+        self._labels: List[str] = []     # "id - tên", đúng format combobox cũ
+        self._folded: List[str] = []     # nhãn không dấu, chữ thường để tìm kiếm
+        self._pos: Dict[int, int] = {}
+        self._by_dept: Dict[int, List[int]] = {}
+        self._watermark = None           # MAX(updated_at) lần tải trước
+        self._loaded = False
+        self._stale = True
+        query_cache.add_listener(self._on_invalidate)
+
+    # -------------------- Tải dữ liệu --------------------
+    def _on_invalidate(self, tables):
+        if "employees" in tables:
+            self._stale = True
+
+    def load(self) -> "EmployeeDirectory":
+        """
+        Đảm bảo dữ liệu mới nhất (gọi ở worker thread nếu có thể).
+        Lần đầu tải toàn bộ; sau đó chỉ query DB khi bảng employees vừa bị ghi.
+        """
+        if self._loaded and not self._stale:
+            return self
+        with self._load_lock:
+            if self._loaded and not self._stale:
+                return self
+            self._stale = False
+            try:
+                self.refresh()
+            except Exception:
+                self._stale = True
+                raise
+        return self
+
+    def refresh(self, full: bool = False):
+        """Tải lại: delta theo updated_at, hoặc toàn bộ nếu full / chưa tải lần nào"""
+        if full or not self._loaded:
+            result = EmployeeManager.get_directory_rows()
+            self._rebuild(result["rows"])
+        else:
+            result = EmployeeManager.get_directory_rows(since=self._watermark)
+            self._apply_delta(result["rows"])
+            # Delta không thấy dòng bị xóa: số lượng lệch thì tải lại toàn bộ
+            if len(self._ids) != result["total"]:
+                result = EmployeeManager.get_directory_rows()
+                self._rebuild(result["rows"])
+        self._watermark = result["max_updated"]
+        self._loaded = True
+
+    def _rebuild(self, rows: List[Dict]):
+        ids, dept_ids = array("i"), array("i")
+        names, positions, emails, labels, folded = [], [], [], [], []
+        for r in rows:
+            ids.append(r["employee_id"])
+            dept_ids.append(r["department_id"])
+            names.append(r["full_name"])
+            positions.append(r.get("position") or "")
+            emails.append(r.get("email") or "")
+            label = f'{r["employee_id"]} - {r["full_name"]}'
+            labels.append(label)
+            folded.append(fold(label))
+
+        pos = {emp_id: i for i, emp_id in enumerate(ids)}
+        by_dept = {}
+        for i, dept_id in enumerate(dept_ids):
+            by_dept.setdefault(dept_id, []).append(i)
+
+        with self._lock:
+            self._ids, self._dept_ids = ids, dept_ids
+            self._names, self._positions, self._emails = names, positions, emails
+            self._labels, self._folded = labels, folded
+            self._pos, self._by_dept = pos, by_dept
+
+    def _apply_delta(self, rows: List[Dict]):
+        if not rows:
+            return
+        if any(r["employee_id"] not in self._pos for r in rows):
+            # Có nhân viên mới: dựng lại mảng để giữ thứ tự theo id
+            merged = {emp_id: self.get(emp_id) for emp_id in self._ids}
+            merged.update({r["employee_id"]: r for r in rows})
+            self._rebuild([merged[k] for k in sorted(merged)])
+            return
+
+        with self._lock:
+            for r in rows:
+                i = self._pos[r["employee_id"]]
+                old_dept = self._dept_ids[i]
+                if old_dept != r["department_id"]:
+                    self._by_dept[old_dept].remove(i)
+                    self._by_dept.setdefault(r["department_id"], []).append(i)
+                    self._by_dept[r["department_id"]].sort()
+                    self._dept_ids[i] = r["department_id"]
+                self._names[i] = r["full_name"]
+                self._positions[i] = r.get("position") or ""
+                self._emails[i] = r.get("email") or ""
+                self._labels[i] = f'{r["employee_id"]} - {r["full_name"]}'
+                self._folded[i] = fold(self._labels[i])
+
+    # -------------------- Tra cứu --------------------
+    def _record(self, i: int) -> Dict:
+        return {
+            "employee_id": self._ids[i],
+            "full_name": self._names[i],
+            "department_id": self._dept_ids[i],
+            "position": self._positions[i],
+            "email": self._emails[i],
+        }
+
+    def get(self, employee_id: int) -> Optional[Dict]:
+        with self._lock:
+            i = self._pos.get(employee_id)
+            return None if i is None else self._record(i)
+
+    def labels(self) -> List[str]:
+        """Toàn bộ nhãn "id - tên" cho combobox"""
+        with self._lock:
+            return list(self._labels)
+
+    def id_from_label(self, label: str) -> Optional[int]:
+        """Nhãn "id - tên" (đúng như trong danh sách) -> employee_id, không khớp thì None"""
+        head = (label or "").split(" - ", 1)[0].strip()
+        if not head.isdigit():
+            return None
+        with self._lock:
+            i = self._pos.get(int(head))
+            if i is None or self._labels[i] != label.strip():
+                return None
+            return self._ids[i]
+
+    def search(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Nhãn có chứa text (không phân biệt dấu / hoa thường)"""
+        needle = fold(text.strip())
+        with self._lock:
+            if not needle:
+                matches = list(self._labels)
+            else:
+                matches = [label for label, f in zip(self._labels, self._folded) if needle in f]
+        return matches[:limit] if limit else matches
+
+    def by_department(self, department_id: int) -> List[Dict]:
+        with self._lock:
+            return [self._record(i) for i in self._by_dept.get(department_id, ())]
+
+    def __len__(self):
+        return len(self._ids)
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_directory() -> EmployeeDirectory:
+    """Danh bạ dùng chung của process (chưa tải dữ liệu; gọi .load() trước khi dùng)"""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = EmployeeDirectory()
+    return _directory
@@ -0,0 +1,123 @@
+import itertools
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncLoader:
+    """
+    Chạy các lệnh gọi manager (truy vấn DB) trên thread pool và trả kết quả
+    về Tk main thread bằng after(). Worker KHÔNG được đụng tới widget Tk.
+
+    Mỗi request có 1 key (vd "employees"): gửi request mới cùng key thì kết quả
+    của request cũ bị bỏ qua khi về tới (stale), nên phân trang / sort liên tục
+    chỉ hiển thị kết quả cuối cùng.
+    """
+
+    POLL_MS = 30
+
+    def __init__(self, root, max_workers: int = 4):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-loader")
+        self._results = queue.SimpleQueue()
+        self._counter = itertools.count(1)
+        self._latest = {}       # key -> token của request mới nhất
+        self._futures = {}      # key -> future chưa xong
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, key: str, fn, *args, on_success=None, on_error=None, on_done=None, **kwargs) -> int:
+        """Chạy fn(*args, **kwargs) ở background. Các callback chạy trên main thread."""
+        old = self._futures.pop(key, None)
+        if old is not None:
+            old.cancel()  # chỉ hủy được nếu chưa bắt đầu chạy
+
+        token = next(self._counter)
+        self._latest[key] = token
+        self._pending += 1
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._futures[key] = future
+        future.add_done_callback(
+            lambda f: self._results.put(("result", key, token, f, on_success, on_error, on_done))
+        )
+        self._ensure_polling()
+        return token
+
+    def cancel(self, key: str):
+        """Bỏ qua kết quả của request đang chạy với key này"""
+        self._latest.pop(key, None)
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def is_loading(self, key: str) -> bool:
+        return key in self._latest
+
+    def post(self, callback, *args):
+        """Gọi callback(*args) trên main thread. An toàn khi gọi từ worker đang chạy."""
+        self._results.put(("call", callback, args))
+
+    # -------------------- Dispatcher --------------------
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                msg = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if msg[0] == "call":
+                _, callback, args = msg
+                self._safe_call(callback, *args)
+                continue
+
+            _, key, token, future, on_success, on_error, on_done = msg
+            self._pending -= 1
+            if self._latest.get(key) != token:
+                continue  # đã có request mới hơn hoặc đã bị cancel
+
+            del self._latest[key]
+            if self._futures.get(key) is future:
+                del self._futures[key]
+            if future.cancelled():
+                continue
+
+            exc = future.exception()
+            if exc is None:
+                if on_success:
+                    self._safe_call(on_success, future.result())
+            elif on_error:
+                self._safe_call(on_error, exc)
+            else:
+                print(f"Background load error ({key}): {exc}")
+
+            if on_done:
+                self._safe_call(on_done)
+
+        if self._pending > 0:
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _safe_call(callback, *args):
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"UI callback error: {e}")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_loader(widget) -> AsyncLoader:
+    """Lấy AsyncLoader dùng chung của cửa sổ gốc (tạo nếu chưa có)"""
+    root = widget._root()
+    loader = getattr(root, "_async_loader", None)
+    if loader is None:
+        loader = AsyncLoader(root)
+        root._async_loader = loader
+    return loader
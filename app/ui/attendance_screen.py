@@ -2,24 +2,29 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 
-from app.ui.widgets import SortableTreeview
+from app.ui.widgets import SortableTreeview, LoadingIndicator, wait_dialog
+from app.ui.async_loader import get_loader
 from app.dialogs.attendance_dialog import AttendanceDialog
 from app.models.utils.helpers import format_display_date, format_display_time
+from app.services.employee_directory import get_directory
 
 class AttendanceScreen(ttk.Frame):
+    TABLES = ("attendance", "employees", "departments")   # bảng mà màn hình đọc: đổi thì tải lại
+
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
         self.managers = managers
         self.emp_mgr = managers["employee"]
         self.att_mgr = managers["attendance"]
+        self.loader = get_loader(self)
 
         top = ttk.Frame(self)
         top.pack(fill="x")
         ttk.Label(top, text="ATTENDANCE", font=("Segoe UI", 14, "bold")).pack(side="left")
 
-        self.emps = self.emp_mgr.get_all_employees(limit=1000, offset=0)
-        self.emp_map = {f'{e["employee_id"]} - {e["full_name"]}': e["employee_id"] for e in self.emps}
-        self.search_list = list(self.emp_map.keys())
+        # Danh bạ nhân viên dùng chung, được tải ở background (xem _load_employees)
+        self.directory = get_directory()
+        self.search_list = []
 
         self.emp_choice = tk.StringVar(value="")
 
@@ -48,6 +53,8 @@ class AttendanceScreen(ttk.Frame):
         ttk.Combobox(top, textvariable=self.year, values=list(range(now.year-2, now.year+3)), state="readonly", width=7).pack(side="left")
 
         ttk.Button(top, text="Load", command=self.refresh).pack(side="left", padx=8)
+        self.loading = LoadingIndicator(top)
+        self.loading.pack(side="left", padx=6)
         ttk.Button(top, text="Mark", command=self.on_mark).pack(side="right")
 
         self.stats = ttk.Label(self, text="Statistics: -")
@@ -67,8 +74,19 @@ class AttendanceScreen(ttk.Frame):
             self.tree.column(c, width=w, anchor="w")
         self.tree.enable_sorting()
 
+        self._load_employees()
         self.refresh()
 
+    def _load_employees(self):
+        self.loader.submit(
+            "attendance_employees", lambda: self.directory.load().labels(),
+            on_success=self._set_employees
+        )
+
+    def _set_employees(self, labels):
+        self.search_list = labels
+        self.cb_emp["values"] = self.search_list
+
     def on_key_release(self, event):
         """Khi gõ phím: Chỉ lọc danh sách bên dưới (không mở, không chọn)"""
         if event.keysym in ['Up', 'Down', 'Left', 'Right', 'Return', 'Tab', 'Escape']:
@@ -79,7 +97,7 @@ class AttendanceScreen(ttk.Frame):
         if typed == '':
             data = self.search_list
         else:
-            data = [item for item in self.search_list if typed.lower() in item.lower()]
+            data = self.directory.search(typed)
 
         self.cb_emp['values'] = data
 
@@ -92,36 +110,51 @@ class AttendanceScreen(ttk.Frame):
 
     def _emp_id(self):
         txt = self.emp_choice.get()
-        return self.emp_map.get(txt)
+        return self.directory.id_from_label(txt)
 
     def refresh(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-
         emp_id = self._emp_id()
         if not emp_id:
+            self.loader.cancel("attendance")
+            self.loading.hide()
+            self.tree.clear()
             self.stats.config(text="Statistics: Please select a valid employee")
             return
-            
-        try:
-            rows = self.att_mgr.get_attendance_by_employee(emp_id, int(self.month.get()), int(self.year.get()))
-            present = sum(1 for r in rows if r.get("status") == "Present")
-            total = len(rows)
-            rate = (present/total*100.0) if total else 0.0
-            self.stats.config(text=f"Statistics: {present}/{total} days present - Rate: {rate:.1f}%")
-
-            for r in rows:
-                d = r.get("work_date")
-                weekday = d.strftime("%A") if d else ""
-                self.tree.insert("", "end", values=(
-                    format_display_date(d),
-                    weekday,
-                    format_display_time(r.get("check_in")),
-                    format_display_time(r.get("check_out")),
-                    r.get("status")
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+
+        self.loading.show()
+        self.loader.submit(
+            "attendance", self.att_mgr.get_attendance_by_employee,
+            emp_id, int(self.month.get()), int(self.year.get()),
+            on_success=self._render,
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self.loading.hide
+        )
+
+    def _render(self, rows):
+        self.tree.clear()
+
+        present = sum(1 for r in rows if r.get("status") == "Present")
+        total = len(rows)
+        rate = (present/total*100.0) if total else 0.0
+        self.stats.config(text=f"Statistics: {present}/{total} days present - Rate: {rate:.1f}%")
+
+        for r in rows:
+            d = r.get("work_date")
+            weekday = d.strftime("%A") if d else ""
+            self.tree.insert("", "end", values=(
+                format_display_date(d),
+                weekday,
+                format_display_time(r.get("check_in")),
+                format_display_time(r.get("check_out")),
+                r.get("status")
+            ), sort_values=(
+                d,
+                d.isoweekday() if d else None,
+                r.get("check_in"),
+                r.get("check_out"),
+                r.get("status")
+            ))
+        self.tree.resort()      # giữ cột sort người dùng đã chọn sau khi tải lại
 
     def on_mark(self):
         emp_id = self._emp_id()
@@ -129,5 +162,4 @@ class AttendanceScreen(ttk.Frame):
             messagebox.showwarning("Missing", "Please select a valid employee from the list")
             return
         dlg = AttendanceDialog(self, self.att_mgr, employee_id=emp_id)
-        self.wait_window(dlg)
-        self.refresh()
\ No newline at end of file
+        wait_dialog(self, dlg)
\ No newline at end of file
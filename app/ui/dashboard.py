@@ -1,18 +1,31 @@
 import tkinter as tk
 from tkinter import ttk
 import os
+from functools import lru_cache
+
+# Matplotlib được import trễ (lần vẽ đầu tiên) để không làm chậm lúc khởi động app
+
+from app.ui.async_loader import get_loader
+from app.ui.widgets import LoadingIndicator
+
+DEPT_SLOTS = 6          # số phòng ban hiển thị
+ROLE_SLOTS = 5          # số role trong pie
+TOP_N = 8               # số nhân viên lương cao nhất
+SALARY_BINS = 8
+
+
+@lru_cache(maxsize=1)
+def _icon_font():
+    """FontProperties cho icon KPI (dò font emoji của Windows 1 lần duy nhất)"""
+    import matplotlib.font_manager as fm
+    font_path = os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts', 'seguiemj.ttf')
+    return fm.FontProperties(fname=font_path, size=24) if os.path.exists(font_path) else fm.FontProperties(size=20)
 
-# Import Matplotlib
-import matplotlib.pyplot as plt
-import matplotlib.font_manager as fm
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.patches import FancyBboxPatch
-from matplotlib.figure import Figure
-import numpy as np
-from collections import Counter
 
 class Dashboard(ttk.Frame):
-    """Dashboard with KPIs and Charts (Simplified Rendering)"""
+    """Dashboard with KPIs and Charts (figure dựng 1 lần, refresh chỉ cập nhật dữ liệu)"""
+
+    TABLES = ("employees", "departments", "projects", "assignments")   # bảng mà dashboard đọc
 
     # Bộ màu sắc
     COLORS = {
@@ -33,10 +46,13 @@ class Dashboard(ttk.Frame):
         self.emp_mgr = managers.get("employee")
         self.dept_mgr = managers.get("department")
         self.proj_mgr = managers.get("project")
-        self.assign_mgr = managers.get("assignment")
+        self.dash_mgr = managers.get("dashboard")
+        self.loader = get_loader(self)
 
         self.canvas = None
         self.fig = None
+        self._artists = {}      # artist được tạo 1 lần, các lần refresh chỉ cập nhật dữ liệu
+        self._shown = {}        # phần dữ liệu đang hiển thị, để bỏ qua phần không đổi
 
         self._build_ui()
 
@@ -48,6 +64,8 @@ class Dashboard(ttk.Frame):
                   bootstyle="primary").pack(side="left")
         ttk.Button(top_bar, text="↻ Refresh Data", command=self.refresh_dashboard, 
                    bootstyle="outline-primary").pack(side="right")
+        self.loading = LoadingIndicator(top_bar)
+        self.loading.pack(side="right", padx=10)
 
         # Chart Container
         self.chart_frame = ttk.Frame(self)
@@ -57,187 +75,247 @@ class Dashboard(ttk.Frame):
         self.refresh_dashboard()
 
     def fetch_data(self) -> dict:
-        """Lấy dữ liệu từ DB (An toàn)"""
+        """Lấy dữ liệu từ DB (An toàn) - 1 lần gọi DashboardManager"""
         data = {
             'total_employees': 0, 'total_departments': 0, 'total_projects': 0,
-            'active_assignments': 0, 'avg_salary': 0, 
-            'employees_by_dept': {}, 'salary_list': [], 'top_employees': [], 'role_distribution': {}
+            'active_assignments': 0, 'avg_salary': 0,
+            'employees_by_dept': {}, 'salary_hist': {'edges': [], 'counts': []},
+            'top_employees': [], 'role_distribution': {}
         }
         try:
-            # 1. Employees & Salary
-            emps = self.emp_mgr.get_all_employees(limit=2000, offset=0) if self.emp_mgr else []
-            data['total_employees'] = len(emps)
-            
-            salaries = [float(e.get('base_salary', 0)) for e in emps if e.get('base_salary')]
-            if salaries:
-                data['salary_list'] = salaries
-                data['avg_salary'] = sum(salaries) / len(salaries)
-                
-            # Top Employees
-            emp_sal = [(e.get('full_name','N/A'), float(e.get('base_salary',0))) for e in emps]
-            emp_sal.sort(key=lambda x: x[1], reverse=True)
-            data['top_employees'] = emp_sal[:8]
-
-            # Depts
-            dept_counts = Counter(e.get('department_name', 'Unknown') for e in emps)
-            data['employees_by_dept'] = dict(dept_counts)
-            
-            depts = self.dept_mgr.get_all_departments() if self.dept_mgr else []
-            data['total_departments'] = len(depts)
-
-            # Projects & Roles
-            projs = self.proj_mgr.get_all_projects() if self.proj_mgr else []
-            data['total_projects'] = len(projs)
-            
-            total_assign = 0
-            roles = Counter()
-            for p in projs:
-                try:
-                    assigns = self.assign_mgr.get_assignments_by_project(p['project_id'])
-                    total_assign += len(assigns)
-                    for a in assigns: roles[a.get('role','Unknown')] += 1
-                except: pass
-            data['active_assignments'] = total_assign
-            data['role_distribution'] = dict(roles)
-
+            if self.dash_mgr:
+                data.update(self.dash_mgr.get_dashboard_stats(top_n=TOP_N, salary_bins=SALARY_BINS))
         except Exception as e:
             print(f"Data Fetch Error: {e}")
         return data
 
+    def build_view(self, data) -> dict:
+        """
+        Chuyển số liệu thành đúng những gì cần vẽ (nhãn, giá trị, đơn vị triệu VND).
+        Mỗi phần là tuple để so sánh với lần vẽ trước.
+        """
+        kpi = (
+            str(data['total_employees']), str(data['total_departments']), str(data['total_projects']),
+            str(data['active_assignments']), self._fmt_money(data['avg_salary']),
+        )
+        dept = sorted(data['employees_by_dept'].items(), key=lambda x: x[1], reverse=True)[:DEPT_SLOTS]
+        roles = sorted(data['role_distribution'].items(), key=lambda x: x[1], reverse=True)[:ROLE_SLOTS]
+        edges = [e * 10000 / 1000000 for e in data['salary_hist']['edges']]    # Triệu VND
+        hist = tuple(zip(edges[:-1], [b - a for a, b in zip(edges[:-1], edges[1:])],
+                         data['salary_hist']['counts']))
+        top = tuple((name, salary * 10000 / 1000000) for name, salary in data['top_employees'][:TOP_N])
+        return {'kpi': kpi, 'dept': tuple(dept), 'roles': tuple(roles), 'hist': hist, 'top': top}
+
+    def _load(self):
+        view = self.build_view(self.fetch_data())
+        # Import sẵn phần nặng của Matplotlib ở worker để main thread không phải chờ
+        import matplotlib.figure, matplotlib.patches, matplotlib.font_manager
+        _icon_font()
+        return view
+
     def refresh_dashboard(self):
-        # 1. Lấy dữ liệu mới nhất
-        data = self.fetch_data()
+        # 1. Lấy dữ liệu mới nhất ở background, vẽ lại khi có kết quả
+        self.loading.show()
+        self.loader.submit("dashboard", self._load, on_success=self._render, on_done=self.loading.hide)
+
+    def refresh(self):
+        self.refresh_dashboard()
 
-        # 2. Kiểm tra nếu biểu đồ chưa từng được tạo (Lần đầu tiên chạy)
+    def _render(self, view):
+        # 2. Lần đầu: dựng figure + toàn bộ artist
         if self.fig is None:
-            self.fig = Figure(figsize=(11, 6), dpi=100, facecolor=self.COLORS['bg_main'])
-            self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
-            self.canvas.get_tk_widget().pack(fill="both", expand=True)
-        else:
-            self.fig.clear()
+            self._build_figure()
 
-        # 3. Vẽ lại nội dung lên khung có sẵn
-        self._draw_kpi_sidebar(self.fig, data)
-        self._draw_charts(self.fig, data)
+        # 3. Chỉ cập nhật phần có dữ liệu thay đổi
+        updaters = {
+            'kpi': self._update_kpi, 'dept': self._update_dept, 'roles': self._update_roles,
+            'hist': self._update_hist, 'top': self._update_top,
+        }
+        changed = False
+        for key, update in updaters.items():
+            if self._shown.get(key) != view[key]:
+                update(view[key])
+                self._shown[key] = view[key]
+                changed = True
 
-        # 4. Cập nhật hiển thị
-        self.canvas.draw()
+        # 4. Vẽ lại khi Tk rảnh (không đổi gì thì không vẽ)
+        if changed:
+            self.canvas.draw_idle()
 
-    def _draw_kpi_sidebar(self, fig, data):
-        """Vẽ thanh KPI bên trái"""
-        # Cấu hình Font Icon
-        font_path = os.path.join(os.environ.get('WINDIR', 'C:/Windows'), 'Fonts', 'seguiemj.ttf')
-        prop = fm.FontProperties(fname=font_path, size=24) if os.path.exists(font_path) else fm.FontProperties(size=20)
+    # -------------------- Dựng figure (1 lần) --------------------
+    def _build_figure(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.fig = Figure(figsize=(11, 6), dpi=100, facecolor=self.COLORS['bg_main'])
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        self._build_kpi_sidebar(self.fig)
+        self._build_charts(self.fig)
+
+    def _build_kpi_sidebar(self, fig):
+        """Thanh KPI bên trái: khung, icon, tiêu đề cố định; chỉ giữ lại Text của giá trị"""
+        from matplotlib.patches import FancyBboxPatch
+
+        prop = _icon_font()
         metrics = [
-            ("TOTAL EMPLOYEES", str(data['total_employees']), "👥"),
-            ("DEPARTMENTS", str(data['total_departments']), "🏢"),
-            ("PROJECTS", str(data['total_projects']), "🚀"),
-            ("ASSIGNMENTS", str(data['active_assignments']), "📌"),
-            ("AVG SALARY", self._fmt_money(data['avg_salary']), "💰")
+            ("TOTAL EMPLOYEES", "👥"),
+            ("DEPARTMENTS", "🏢"),
+            ("PROJECTS", "🚀"),
+            ("ASSIGNMENTS", "📌"),
+            ("AVG SALARY", "💰")
         ]
 
         # Vị trí Sidebar
         x, y_start, w, h = 0.02, 0.90, 0.20, 0.16
         gap = 0.02
 
-        for i, (title, val, icon) in enumerate(metrics):
+        values = []
+        for i, (title, icon) in enumerate(metrics):
             y = y_start - i * (h + gap)
-            
+
             # Vẽ nền thẻ (Dùng Patch)
-            bbox = FancyBboxPatch((x, y - h + 0.02), w, h, boxstyle="round,pad=0.01", 
+            bbox = FancyBboxPatch((x, y - h + 0.02), w, h, boxstyle="round,pad=0.01",
                                   fc='white', ec='#d1d5db', transform=fig.transFigure, zorder=1)
             fig.patches.append(bbox)
-            
+
             # Vẽ thanh màu bên trái
-            bar = FancyBboxPatch((x, y - h + 0.03), 0.005, h - 0.02, 
+            bar = FancyBboxPatch((x, y - h + 0.03), 0.005, h - 0.02,
                                  boxstyle="round,pad=0", fc=self.COLORS['primary'], transform=fig.transFigure, zorder=2)
             fig.patches.append(bar)
 
             # Vẽ chữ & Icon
             cx = x + w/2
             cy = y - h/2 + 0.01
-            
+
             fig.text(cx, cy + 0.04, icon, ha='center', va='center', color=self.COLORS['secondary'], fontproperties=prop)
-            fig.text(cx, cy - 0.01, val, ha='center', va='center', fontsize=16, fontweight='bold', color='#111827')
+            values.append(fig.text(cx, cy - 0.01, "", ha='center', va='center', fontsize=16, fontweight='bold', color='#111827'))
             fig.text(cx, cy - 0.05, title, ha='center', va='center', fontsize=9, color='#6B7280')
+        self._artists['kpi'] = values
 
-    def _draw_charts(self, fig, data):
-        """Vẽ 4 biểu đồ lưới 2x2"""
+    def _build_charts(self, fig):
+        """4 biểu đồ lưới 2x2 với số slot cố định (bar rỗng = ẩn)"""
         # Layout: [x, y, width, height]
         grid = [
-            ([0.38, 0.53, 0.24, 0.35], "Employees by Department"), 
-            ([0.70, 0.53, 0.25, 0.35], "Project Roles"),           
-            ([0.38, 0.08, 0.24, 0.35], "Salary Distribution"), 
-            ([0.73, 0.08, 0.22, 0.35], "Top Earners")            
+            ([0.38, 0.53, 0.24, 0.35], "Employees by Department"),
+            ([0.70, 0.53, 0.25, 0.35], "Project Roles"),
+            ([0.38, 0.08, 0.24, 0.35], "Salary Distribution"),
+            ([0.73, 0.08, 0.22, 0.35], "Top Earners")
         ]
 
         # 1. Employees by Dept
         ax1 = fig.add_axes(grid[0][0])
         self._style_ax(ax1, grid[0][1])
-        d = data['employees_by_dept']
-        if d:
-            items = sorted(d.items(), key=lambda x: x[1], reverse=True)[:6]
-            names, vals = [x[0] for x in items], [x[1] for x in items]
-            y = np.arange(len(names))
-            ax1.barh(y, vals, color=self.COLORS['secondary'], height=0.6)
-            ax1.set_yticks(y); ax1.set_yticklabels(names); ax1.invert_yaxis()
-            for i, v in enumerate(vals): ax1.text(v + 0.1, i, str(v), va='center', fontsize=9)
-        else: self._no_data(ax1)
-
-        # 2. Roles (Pie)
+        self._artists['dept'] = self._build_barh(ax1, DEPT_SLOTS, self.COLORS['secondary'], fontsize=9)
+
+        # 2. Roles (Pie): dựng sẵn ROLE_SLOTS wedge, cập nhật góc khi có dữ liệu
         ax2 = fig.add_axes(grid[1][0])
         self._style_ax(ax2, grid[1][1], grid=False) # Tắt lưới cho Pie chart
+        wedges, labels, pcts = ax2.pie([1] * ROLE_SLOTS, labels=[""] * ROLE_SLOTS, autopct='%1.0f%%',
+                                       colors=self.COLORS['chart_colors'], startangle=90, pctdistance=0.8,
+                                       wedgeprops=dict(width=0.4, edgecolor='white'))
         ax2.axis('off') # Tắt trục
-        d = data['role_distribution']
-        if d:
-            items = sorted(d.items(), key=lambda x: x[1], reverse=True)[:5]
-            names, vals = [x[0] for x in items], [x[1] for x in items]
-            ax2.pie(vals, labels=names, autopct='%1.0f%%', colors=self.COLORS['chart_colors'], 
-                    startangle=90, pctdistance=0.8, wedgeprops=dict(width=0.4, edgecolor='white'))
-            ax2.text(0, 0, f"{sum(vals)}\nRoles", ha='center', va='center', fontweight='bold')
-        else: self._no_data(ax2)
+        center = ax2.text(0, 0, "", ha='center', va='center', fontweight='bold')
+        self._artists['roles'] = (ax2, wedges, labels, pcts, center, self._no_data_text(ax2))
 
         # 3. Salary Hist
         ax3 = fig.add_axes(grid[2][0])
         self._style_ax(ax3, grid[2][1])
-        sal = [s * 10000 / 1000000 for s in data['salary_list']] # Triệu VND
-        if sal:
-            ax3.hist(sal, bins=8, color=self.COLORS['accent'], edgecolor='white', alpha=0.8)
-            ax3.set_xlabel("Million VND", fontsize=8, color='#6B7280')
-        else: self._no_data(ax3)
+        bars = ax3.bar(range(SALARY_BINS), [0] * SALARY_BINS, width=1, align='edge',
+                       color=self.COLORS['accent'], edgecolor='white', alpha=0.8)
+        ax3.set_xlabel("Million VND", fontsize=8, color='#6B7280')
+        self._artists['hist'] = (ax3, bars, self._no_data_text(ax3))
 
         # 4. Top Earners
         ax4 = fig.add_axes(grid[3][0])
         self._style_ax(ax4, grid[3][1])
-        d = data['top_employees']
-        if d:
-            names = [x[0] for x in d]
-            vals = [x[1] * 10000 / 1000000 for x in d]
-            y = np.arange(len(names))
-            ax4.barh(y, vals, color=self.COLORS['chart_colors'][0], height=0.6)
-            ax4.set_yticks(y); ax4.set_yticklabels(names); ax4.invert_yaxis()
-            for i, v in enumerate(vals): ax4.text(v + 0.1, i, f"{v:.1f}M", va='center', fontsize=8)
-        else: self._no_data(ax4)
+        self._artists['top'] = self._build_barh(ax4, TOP_N, self.COLORS['chart_colors'][0], fontsize=8)
+
+    def _build_barh(self, ax, slots, color, fontsize):
+        y = list(range(slots))
+        bars = ax.barh(y, [0] * slots, color=color, height=0.6)
+        ax.set_yticks(y); ax.invert_yaxis()
+        texts = [ax.text(0, i, "", va='center', fontsize=fontsize) for i in y]
+        return ax, bars, texts, self._no_data_text(ax)
+
+    def _no_data_text(self, ax):
+        return ax.text(0.5, 0.5, "No Data", ha='center', va='center', color='#9CA3AF',
+                       transform=ax.transAxes, visible=False)
+
+    # -------------------- Cập nhật dữ liệu --------------------
+    def _update_kpi(self, values):
+        for text, val in zip(self._artists['kpi'], values):
+            text.set_text(val)
+
+    def _update_dept(self, items):
+        self._update_barh(self._artists['dept'], items, str)
+
+    def _update_top(self, items):
+        self._update_barh(self._artists['top'], items, lambda v: f"{v:.1f}M")
+
+    def _update_barh(self, artists, items, fmt):
+        ax, bars, texts, no_data = artists
+        names = [name for name, _ in items]
+        for i, (bar, text) in enumerate(zip(bars, texts)):
+            v = items[i][1] if i < len(items) else 0
+            bar.set_width(v)
+            text.set_position((v + 0.1, i))
+            text.set_text(fmt(v) if i < len(items) else "")
+        ax.set_yticklabels(names + [""] * (len(bars) - len(names)))
+        self._set_has_data(ax, no_data, bool(items))
+        if items:
+            ax.set_ylim(len(items) - 0.5, -0.5)     # chỉ hiện các slot đang có dữ liệu
+
+    def _update_hist(self, bins):
+        ax, bars, no_data = self._artists['hist']
+        for i, bar in enumerate(bars):
+            left, width, count = bins[i] if i < len(bins) else (0, 0, 0)
+            bar.set_x(left); bar.set_width(width); bar.set_height(count)
+        self._set_has_data(ax, no_data, bool(bins))
+
+    def _update_roles(self, items):
+        import math
+        ax, wedges, labels, pcts, center, no_data = self._artists['roles']
+        total = sum(v for _, v in items)
+        # Tính lại góc giống ax.pie(startangle=90, labeldistance=1.1, pctdistance=0.8)
+        theta = 90.0
+        for i, (wedge, label, pct) in enumerate(zip(wedges, labels, pcts)):
+            name, v = items[i] if i < len(items) else ("", 0)
+            span = 360.0 * v / total if total else 0.0
+            wedge.set_theta1(theta); wedge.set_theta2(theta + span)
+            mid = math.radians(theta + span / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            label.set_text(name)
+            pct.set_position((0.8 * x, 0.8 * y))
+            pct.set_text(f"{100.0 * v / total:1.0f}%" if v else "")
+            for artist in (wedge, label, pct):
+                artist.set_visible(v > 0)
+            theta += span
+        center.set_text(f"{total}\nRoles" if items else "")
+        no_data.set_visible(not items)
+
+    def _set_has_data(self, ax, no_data, has_data):
+        no_data.set_visible(not has_data)
+        ax.xaxis.set_visible(has_data); ax.yaxis.set_visible(has_data)
+        if has_data:
+            ax.relim(); ax.autoscale_view()
 
     def _style_ax(self, ax, title, grid=True):
         """Style chuẩn cho biểu đồ - Nền trắng trực tiếp"""
         ax.set_facecolor('white')  # [QUAN TRỌNG] Đặt nền trắng trực tiếp cho trục
         ax.set_title(title, fontsize=11, fontweight='bold', color='#111827', pad=10)
-        
+
         # Xóa viền
         for s in ax.spines.values(): s.set_visible(False)
-        
+
         # Grid mờ
         if grid:
             ax.grid(axis='x', visible=False)
             ax.grid(axis='y', linestyle=':', alpha=0.5)
             ax.tick_params(axis='both', colors='#6B7280', labelsize=8, length=0)
 
-    def _no_data(self, ax):
-        ax.text(0.5, 0.5, "No Data", ha='center', va='center', color='#9CA3AF')
-        ax.set_xticks([]); ax.set_yticks([])
-
     def _fmt_money(self, val):
         if not val: return "0"
         vnd = val * 10000
@@ -1,20 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from app.ui.widgets import SortableTreeview
+from app.ui.widgets import SortableTreeview, LoadingIndicator, wait_dialog
+from app.ui.async_loader import get_loader
 from app.dialogs.department_dialog import DepartmentDialog
+from app.services.employee_directory import get_directory
 
 class DepartmentScreen(ttk.Frame):
+    TABLES = ("departments", "employees")   # bảng mà màn hình đọc: đổi thì tải lại
+
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
         self.managers = managers
         self.dept_mgr = managers["department"]
         self.emp_mgr = managers["employee"]
+        self.loader = get_loader(self)
 
         top = ttk.Frame(self)
         top.pack(fill="x")
 
         ttk.Label(top, text="DEPARTMENT", font=("Segoe UI", 14, "bold")).pack(side="left")
+        self.loading = LoadingIndicator(top)
+        self.loading.pack(side="left", padx=10)
         ttk.Button(top, text="Add", command=self.on_add).pack(side="right")
         ttk.Button(top, text="Edit", command=self.on_edit).pack(side="right", padx=6)
         ttk.Button(top, text="Delete", command=self.on_delete).pack(side="right")
@@ -70,19 +77,24 @@ class DepartmentScreen(ttk.Frame):
         self.refresh()
 
     def refresh(self):
-        try:
-            for i in self.dept_tree.get_children():
-                self.dept_tree.delete(i)
-            depts = self.dept_mgr.get_all_departments()
-            for d in depts:
-                self.dept_tree.insert("", "end", values=(
-                    d.get("department_id"),
-                    d.get("department_name"),
-                    d.get("location"),
-                    d.get("employee_count") or 0
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.loading.show()
+        self.loader.submit(
+            "departments", self.dept_mgr.get_all_departments,
+            on_success=self._render_departments,
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self.loading.hide
+        )
+
+    def _render_departments(self, depts):
+        self.dept_tree.clear()
+        for d in depts:
+            self.dept_tree.insert("", "end", values=(
+                d.get("department_id"),
+                d.get("department_name"),
+                d.get("location"),
+                d.get("employee_count") or 0
+            ))
+        self.dept_tree.resort()     # giữ cột sort người dùng đã chọn sau khi tải lại
 
     def _selected_dept_id(self):
         sel = self.dept_tree.selection()
@@ -91,29 +103,36 @@ class DepartmentScreen(ttk.Frame):
         return int(self.dept_tree.item(sel[0], "values")[0])
 
     def show_employees(self):
-        for i in self.emp_tree.get_children():
-            self.emp_tree.delete(i)
+        self.emp_tree.clear()
 
         dept_id = self._selected_dept_id()
         if not dept_id:
+            self.loader.cancel("department_employees")
             return
-        try:
-            emps = self.emp_mgr.get_all_employees(limit=10000, offset=0)
-            emps = [e for e in emps if int(e.get("department_id")) == dept_id]
-            for e in emps:
-                self.emp_tree.insert("", "end", values=(
-                    e.get("employee_id"),
-                    e.get("full_name"),
-                    e.get("position"),
-                    e.get("email")
-                ))
-        except Exception as e:
-            messagebox.showerror("Lỗi", str(e))
+        self.loader.submit(
+            "department_employees", self._load_employees, dept_id,
+            on_success=self._render_employees,
+            on_error=lambda e: messagebox.showerror("Lỗi", str(e))
+        )
+
+    def _load_employees(self, dept_id):
+        # Index theo phòng ban trong danh bạ dùng chung, không tải lại cả bảng
+        return get_directory().load().by_department(dept_id)
+
+    def _render_employees(self, emps):
+        self.emp_tree.clear()
+        for e in emps:
+            self.emp_tree.insert("", "end", values=(
+                e.get("employee_id"),
+                e.get("full_name"),
+                e.get("position"),
+                e.get("email")
+            ))
+        self.emp_tree.resort()
 
     def on_add(self):
         dlg = DepartmentDialog(self, self.dept_mgr, mode="create")
-        self.wait_window(dlg)
-        self.refresh()
+        wait_dialog(self, dlg)
 
     def on_edit(self):
         dept_id = self._selected_dept_id()
@@ -126,8 +145,7 @@ class DepartmentScreen(ttk.Frame):
                 messagebox.showerror("Error", "Department not found")
                 return
             dlg = DepartmentDialog(self, self.dept_mgr, mode="edit", dept=dept)
-            self.wait_window(dlg)
-            self.refresh()
+            wait_dialog(self, dlg)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -0,0 +1,277 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+
+from app.ui.widgets import SortableTreeview
+from app.ui.async_loader import get_loader
+from app.models.config.database import DatabaseConnection
+from app.models.utils.cache import query_cache
+from app.models.utils.instrumentation import instrumentation
+
+REFRESH_MS = 1000       # cập nhật số liệu khi đang mở màn hình
+MEMORY_TOP_MS = 15000   # take_snapshot() nặng và giữ GIL: auto refresh chỉ chụp top allocation thưa hơn
+TOP_ALLOCATIONS = 15
+
+
+def _log_dir() -> str:
+    path = instrumentation.log_path
+    return os.path.dirname(path) if path else os.path.abspath("logs")
+
+
+class DiagnosticsScreen(ttk.Frame):
+    """
+    Màn hình ẩn (Ctrl+Shift+D) để xem vì sao máy người dùng chạy chậm:
+    thời gian từng hàm manager, pool connection, cache, độ trễ Tk, bộ nhớ, và chụp cProfile.
+    """
+
+    def __init__(self, master, managers: dict):
+        super().__init__(master, padding=10)
+        self._profiler = None
+        self.loader = get_loader(self)
+        self._memory_top_at = 0.0     # monotonic lần chụp top allocation gần nhất
+
+        top = ttk.Frame(self)
+        top.pack(fill="x")
+        ttk.Label(top, text="DIAGNOSTICS", font=("Segoe UI", 14, "bold")).pack(side="left")
+
+        self.auto = tk.BooleanVar(value=True)
+        ttk.Checkbutton(top, text="Auto refresh", variable=self.auto).pack(side="left", padx=(16, 4))
+        ttk.Button(top, text="Refresh", command=lambda: self.refresh(memory_top=True)).pack(side="left", padx=4)
+        ttk.Button(top, text="Reset stats", command=self.reset_stats).pack(side="left", padx=4)
+        ttk.Button(top, text="Export snapshot", command=self.export_snapshot).pack(side="left", padx=4)
+
+        self.profile_secs = tk.IntVar(value=10)
+        self.btn_profile = ttk.Button(top, text="Capture profile", command=self.start_profile)
+        self.btn_profile.pack(side="right")
+        ttk.Spinbox(top, from_=1, to=300, textvariable=self.profile_secs, width=5).pack(side="right", padx=4)
+        ttk.Label(top, text="Seconds:").pack(side="right")
+
+        # -------- Tóm tắt --------
+        summary = ttk.Frame(self)
+        summary.pack(fill="x", pady=(10, 6))
+        self.lbl_pool = ttk.Label(summary, font=("Segoe UI", 10))
+        self.lbl_cache = ttk.Label(summary, font=("Segoe UI", 10))
+        self.lbl_loop = ttk.Label(summary, font=("Segoe UI", 10))
+        self.lbl_stalls = ttk.Label(summary, font=("Segoe UI", 10))
+        self.lbl_memory = ttk.Label(summary, font=("Segoe UI", 10))
+        self.lbl_profile = ttk.Label(summary, font=("Segoe UI", 10), foreground="#555555")
+        for lbl in (self.lbl_pool, self.lbl_cache, self.lbl_loop, self.lbl_stalls, self.lbl_memory,
+                    self.lbl_profile):
+            lbl.pack(anchor="w")
+
+        # -------- Bảng chi tiết --------
+        tabs = ttk.Notebook(self)
+        tabs.pack(fill="both", expand=True)
+
+        calls = ttk.Frame(tabs)
+        cols = ("method", "calls", "errors", "slow", "cache_hits", "p50_ms", "p95_ms", "p99_ms",
+                "max_ms", "acquire_ms_avg", "rows_avg")
+        self.calls_tree = self._make_tree(calls, cols, {"method": 300})
+        tabs.add(calls, text="Manager calls")
+
+        sql = ttk.Frame(tabs)
+        self.sql_tree = self._make_tree(sql, ("sql", "calls", "total_ms", "max_ms"), {"sql": 800})
+        tabs.add(sql, text="SQL")
+
+        memory = ttk.Frame(tabs)
+        bar = ttk.Frame(memory)
+        bar.pack(fill="x", pady=4)
+        self.btn_trace = ttk.Button(bar, text="Start memory tracing", command=self.toggle_tracemalloc)
+        self.btn_trace.pack(side="left")
+        ttk.Label(bar, text="Tracing slows the app down; stop it when done.").pack(side="left", padx=8)
+        self.mem_tree = self._make_tree(memory, ("location", "size_kb", "count"), {"location": 600})
+        tabs.add(memory, text="Memory")
+
+        self._update_trace_button()
+        self.refresh(memory_top=True)
+        self.after(REFRESH_MS, self._tick)
+
+    def _make_tree(self, parent, cols, widths):
+        tree = SortableTreeview(parent, columns=cols, show="headings", height=12)
+        tree.pack(fill="both", expand=True)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=widths.get(c, 90), anchor="w" if c in widths else "center")
+        tree.enable_sorting()
+        return tree
+
+    # -------------------- Cập nhật --------------------
+    def _tick(self):
+        # Lần gom trước chưa xong (máy đang bận) thì bỏ qua nhịp này, không xếp hàng thêm
+        if (self.auto.get() and getattr(self.winfo_toplevel(), "current_screen", None) == "diagnostics"
+                and not self.loader.is_loading("diagnostics")):
+            self.refresh()
+        self.after(REFRESH_MS, self._tick)
+
+    @staticmethod
+    def collect(detector=None, memory_top: bool = True) -> dict:
+        """
+        Gom số liệu (chạy ở worker thread, không đụng widget). detector lấy sẵn trên main thread.
+        memory_top=False bỏ qua take_snapshot(), chỉ lấy dung lượng đang trace.
+        """
+        data = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "pool": DatabaseConnection.pool_stats(),
+            "cache": query_cache.stats(),
+            "instrumentation": instrumentation.snapshot(),
+        }
+        # Độ trễ event loop lấy từ heartbeat của StallDetector (không chạy vòng after() thứ 2)
+        if detector is not None:
+            data["event_loop"] = detector.lag_stats()
+            data["stalls"] = detector.stats()
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            data["memory"] = {"current_kb": round(current / 1024), "peak_kb": round(peak / 1024)}
+            if memory_top:
+                stats = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+                data["memory"]["top"] = [
+                    {"location": str(s.traceback), "size_kb": round(s.size / 1024, 1), "count": s.count}
+                    for s in stats
+                ]
+        return data
+
+    def refresh(self, memory_top: bool = False):
+        """Gom số liệu ở background rồi vẽ lại trên main thread (request mới thay request cũ)"""
+        now = time.monotonic()
+        memory_top = memory_top or now - self._memory_top_at >= MEMORY_TOP_MS / 1000
+        if memory_top:
+            self._memory_top_at = now
+        self.loader.submit(
+            "diagnostics", self.collect, self._detector(), memory_top,
+            on_success=self._render,
+            on_error=lambda e: print(f"Diagnostics error: {e}")
+        )
+
+    def _render(self, data):
+        if not self.winfo_exists():
+            return
+        p = data["pool"]
+        self.lbl_pool.config(text=(
+            f"Pool: {p['in_use']}/{p['size']} in use, {p['idle']} idle, {p['open']} open | "
+            f"wait avg {p['wait_avg'] * 1000:.1f} ms, max {p['wait_max'] * 1000:.0f} ms | "
+            f"timeouts {p['timeouts']}, created {p['created']}, discarded {p['discarded']}"
+        ))
+        c = data["cache"]
+        self.lbl_cache.config(text=(
+            f"Cache: {c['size']}/{c['max_entries']} entries, hit ratio {c['hit_ratio']:.0%} "
+            f"({c['hits']} hits / {c['misses']} misses), {c['invalidations']} invalidations"
+        ))
+        loop = data.get("event_loop")
+        self.lbl_loop.config(text=(
+            f"UI event loop lag (last {loop['window_s']}s): "
+            f"avg {loop['avg_lag_ms']} ms, max {loop['max_lag_ms']} ms"
+            if loop else "UI event loop lag: off (EIM_STALL_MS=0)"
+        ))
+        stalls = data.get("stalls")
+        if stalls:
+            last = stalls["recent"][-1] if stalls["recent"] else None
+            self.lbl_stalls.config(text=(
+                f"UI stalls over {stalls['threshold_ms']} ms: {stalls['count']}, worst {stalls['worst_ms']} ms"
+                + (f", last on '{last['screen']}' at {last['time'][11:19]}" if last else "")
+                + f" | stacks in {stalls['log']}"
+            ))
+        else:
+            self.lbl_stalls.config(text="UI stall detector: off")
+        mem = data.get("memory")
+        self.lbl_memory.config(text=(
+            f"Python memory (traced): {mem['current_kb']:,} KB, peak {mem['peak_kb']:,} KB"
+            if mem else "Python memory: tracing off"
+        ))
+
+        # Nạp lại rồi giữ thứ tự sort người dùng đã chọn (mặc định: chậm nhất trước)
+        self.calls_tree.clear()
+        methods = data["instrumentation"]["methods"]
+        for name, m in sorted(methods.items(), key=lambda kv: kv[1]["p95_ms"], reverse=True):
+            self.calls_tree.insert("", "end", values=(name, *(m[k] for k in self.calls_tree["columns"][1:])))
+        self.calls_tree.resort()
+
+        self.sql_tree.clear()
+        for s in data["instrumentation"]["statements"]:
+            self.sql_tree.insert("", "end", values=(s["sql"], s["calls"], s["total_ms"], s["max_ms"]))
+        self.sql_tree.resort()
+
+        # Lần refresh không chụp top allocation thì giữ bảng cũ (trừ khi đã tắt tracing)
+        if mem is None or "top" in mem:
+            self.mem_tree.clear()
+            for a in (mem or {}).get("top", []):
+                self.mem_tree.insert("", "end", values=(a["location"], a["size_kb"], a["count"]))
+            self.mem_tree.resort()
+
+    def _detector(self):
+        detector = getattr(self.winfo_toplevel(), "stall_detector", None)
+        return detector if detector is not None and detector.threshold > 0 else None
+
+    def reset_stats(self):
+        instrumentation.reset()
+        detector = self._detector()
+        if detector is not None:
+            detector.lags.clear()
+        if tracemalloc.is_tracing():
+            tracemalloc.clear_traces()
+        self.refresh(memory_top=True)
+
+    def export_snapshot(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json", filetypes=[("JSON", "*.json")],
+            initialfile=f"diagnostics_{datetime.now():%Y%m%d_%H%M%S}.json"
+        )
+        if not path:
+            return
+        self.loader.submit(
+            "diagnostics_export", self._write_snapshot, path, self._detector(),
+            on_success=lambda _: messagebox.showinfo("OK", f"Saved: {path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Could not save snapshot: {e}")
+        )
+
+    @classmethod
+    def _write_snapshot(cls, path, detector):
+        data = cls.collect(detector)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+
+    # -------------------- Bộ nhớ --------------------
+    def toggle_tracemalloc(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        else:
+            tracemalloc.start()
+        self._update_trace_button()
+        self.refresh(memory_top=True)
+
+    def _update_trace_button(self):
+        self.btn_trace.config(text="Stop memory tracing" if tracemalloc.is_tracing() else "Start memory tracing")
+
+    # -------------------- cProfile --------------------
+    def start_profile(self):
+        """Chụp cProfile của UI thread (nơi gây đơ) trong N giây, lưu file .prof vào thư mục logs"""
+        if self._profiler is not None:
+            return
+        try:
+            seconds = max(1, int(self.profile_secs.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Invalid", "Seconds must be a number")
+            return
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        self.btn_profile.config(state="disabled")
+        self.lbl_profile.config(text=f"Profiling the UI thread for {seconds}s - use the app normally...")
+        self.after(seconds * 1000, self._finish_profile)
+
+    def _finish_profile(self):
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        self.btn_profile.config(state="normal")
+        path = os.path.join(_log_dir(), f"profile_{datetime.now():%Y%m%d_%H%M%S}.prof")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            self.lbl_profile.config(text="")
+            messagebox.showerror("Error", f"Could not save profile: {e}")
+            return
+        self.lbl_profile.config(text=f"Profile saved: {path} (open with snakeviz or python -m pstats)")
@@ -1,12 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import math
 
-from app.ui.widgets import SortableTreeview, PaginationBar
+from app.ui.widgets import SortableTreeview, PaginationBar, LoadingIndicator, wait_dialog
+from app.ui.async_loader import get_loader
 from app.dialogs.employee_dialog import EmployeeDialog
 from app.models.utils.helpers import to_vnd, format_currency_vnd
 
 class EmployeeScreen(ttk.Frame):
     PAGE_SIZE = 15
+    TABLES = ("employees", "departments")   # bảng mà màn hình đọc: đổi thì tải lại
 
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
@@ -15,8 +18,11 @@ class EmployeeScreen(ttk.Frame):
         style.configure("BigRow.Treeview.Heading", font=("Segoe UI", 13, "bold"))
         self.managers = managers
         self.emp_mgr = managers["employee"]
+        self.loader = get_loader(self)
 
         self.page = 0
+        self._cursors = [None]  # _cursors[i] = keyset cursor để tải trang i (không dùng khi search)
+        self._total = None      # tổng số dòng, có ở trang đầu (keyset) hoặc mọi trang (search)
         self.search_mode = False
         self.search_keyword = ""
 
@@ -36,6 +42,8 @@ class EmployeeScreen(ttk.Frame):
         self.entry_search.bind('<Return>', self.on_search)
         
         ttk.Button(actions, text="Clear", command=self.on_clear).pack(side="left", padx=6)
+        self.loading = LoadingIndicator(actions)
+        self.loading.pack(side="left", padx=6)
 
         ttk.Button(actions, text="Add", command=self.on_add).pack(side="right")
         ttk.Button(actions, text="Edit", command=self.on_edit).pack(side="right", padx=6)
@@ -92,48 +100,70 @@ class EmployeeScreen(ttk.Frame):
         return {"employee_id": int(values[0])}
 
     def refresh(self):
-        try:
-            for i in self.tree.get_children():
-                self.tree.delete(i)
-            total_records = 0
-            
-            if self.search_mode and self.search_keyword.strip():
-                rows = self.emp_mgr.search_employees(self.search_keyword.strip())
-                self.pager.set_page(0)
-                self.pager.update_state(can_prev=False, can_next=False)
-                
-            else:
-                sort_order = "DESC" if self.sort_desc else "ASC"
-                rows = self.emp_mgr.get_all_employees(
-                    limit=self.PAGE_SIZE, 
-                    offset=self.page * self.PAGE_SIZE,
-                    sort_by=self.sort_col,
-                    sort_order=sort_order
-                )
-                self.pager.set_page(self.page)
-                total_records = self.emp_mgr.count_employees()
-                import math
-                max_page = math.ceil(total_records / self.PAGE_SIZE) - 1
-                if max_page < 0: max_page = 0
-                can_prev = (self.page > 0)
-                can_next = (self.page < max_page)
-                
-                self.pager.update_state(can_prev, can_next)
-
-            for r in rows:
-                salary_vnd = format_currency_vnd(to_vnd(r.get("base_salary")))
-                self.tree.insert("", "end", values=(
-                    r.get("employee_id"),
-                    r.get("full_name"),
-                    r.get("gender"),
-                    r.get("phone_number"),
-                    r.get("email"),
-                    r.get("department_name"),
-                    r.get("position"),
-                    salary_vnd
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load employees: {e}")
+        search = self.search_keyword.strip() if self.search_mode else ""
+        sort_order = "DESC" if self.sort_desc else "ASC"
+        after = self._cursors[self.page] if not search else None
+        # Khóa pager tới khi trang về, tránh bấm Next khi cursor chưa có
+        self.pager.update_state(False, False)
+        self.loading.show()
+        self.loader.submit(
+            "employees", self._load, search, self.page, after, self.sort_col, sort_order,
+            on_success=self._render, on_error=self._on_load_error, on_done=self.loading.hide
+        )
+
+    def _load(self, search, page, after, sort_col, sort_order):
+        """Chạy ở worker thread - chỉ gọi manager, không đụng widget"""
+        if search:
+            return self.emp_mgr.search_employees_page(
+                search, limit=self.PAGE_SIZE, offset=page * self.PAGE_SIZE
+            )
+        return self.emp_mgr.get_employees_after(
+            after=after,
+            limit=self.PAGE_SIZE,
+            sort_by=sort_col,
+            sort_order=sort_order
+        )
+
+    def _render(self, result):
+        if "has_next" not in result:
+            # Search: phân trang OFFSET, có tổng số dòng
+            max_page = math.ceil(result["total"] / self.PAGE_SIZE) - 1
+            if max_page < 0: max_page = 0
+            can_next = (self.page < max_page)
+        else:
+            # Keyset: trang rỗng (vd vừa xóa dòng cuối) -> lùi lại 1 trang
+            if not result["rows"] and self.page > 0:
+                self.page -= 1
+                self.refresh()
+                return
+            del self._cursors[self.page + 1:]
+            if result["has_next"]:
+                self._cursors.append(result["next_cursor"])
+            can_next = result["has_next"]
+
+        if "total" in result:
+            self._total = result["total"]
+
+        self.tree.clear()
+        self.pager.set_page(self.page, self._total, self.PAGE_SIZE)
+        self.pager.update_state(self.page > 0, can_next)
+
+        for r in result["rows"]:
+            salary_vnd = format_currency_vnd(to_vnd(r.get("base_salary")))
+            self.tree.insert("", "end", values=(
+                r.get("employee_id"),
+                r.get("full_name"),
+                r.get("gender"),
+                r.get("phone_number"),
+                r.get("email"),
+                r.get("department_name"),
+                r.get("position"),
+                salary_vnd
+            ))
+
+    def _on_load_error(self, e):
+        self.pager.update_state(self.page > 0, False)
+        messagebox.showerror("Error", f"Could not load employees: {e}")
 
     def on_sort(self, col):
         if self.sort_col == col:
@@ -142,26 +172,22 @@ class EmployeeScreen(ttk.Frame):
             self.sort_col = col
             self.sort_desc = False
         
-        self.page = 0
-        self.refresh()
+        self.reset_paging()
 
     def on_search(self, event=None):
         self.search_keyword = self.kw.get()
         self.search_mode = True
-        self.page = 0
-        self.refresh()
+        self.reset_paging()
 
     def on_clear(self):
         self.kw.set("")
         self.search_mode = False
         self.search_keyword = ""
-        self.page = 0
-        self.refresh()
+        self.reset_paging()
 
     def on_add(self):
         dlg = EmployeeDialog(self, self.managers, mode="create")
-        self.wait_window(dlg)
-        self.refresh()
+        wait_dialog(self, dlg)
 
     def on_edit(self):
         sel = self._selected()
@@ -171,8 +197,7 @@ class EmployeeScreen(ttk.Frame):
         try:
             emp = self.emp_mgr.get_employee_by_id(sel["employee_id"])
             dlg = EmployeeDialog(self, self.managers, mode="edit", employee=emp)
-            self.wait_window(dlg)
-            self.refresh()
+            wait_dialog(self, dlg)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -190,15 +215,19 @@ class EmployeeScreen(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def reset_paging(self):
+        self.page = 0
+        self._cursors = [None]
+        self._total = None
+        self.refresh()
+
     def prev_page(self):
-        if self.search_mode:
-            return
         if self.page > 0:
             self.page -= 1
             self.refresh()
 
     def next_page(self):
-        if self.search_mode:
-            return
+        if not self.search_mode and len(self._cursors) <= self.page + 1:
+            return  # chưa có cursor cho trang sau
         self.page += 1
         self.refresh()
\ No newline at end of file
@@ -1,16 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from app.ui.widgets import SortableTreeview
+from app.ui.widgets import SortableTreeview, LoadingIndicator, wait_dialog
+from app.ui.async_loader import get_loader
 from app.dialogs.project_dialog import ProjectDialog
 from app.dialogs.assignment_dialog import AssignmentDialog
 from app.models.utils.helpers import to_vnd, format_currency_vnd, format_display_date
 
 class ProjectScreen(ttk.Frame):
+    TABLES = ("projects", "assignments", "departments")   # bảng mà màn hình đọc: đổi thì tải lại
+
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
         self.managers = managers
         self.proj_mgr = managers["project"]
+        self.loader = get_loader(self)
 
         top = ttk.Frame(self)
         top.pack(fill="x")
@@ -22,6 +26,8 @@ class ProjectScreen(ttk.Frame):
         ttk.Combobox(top, textvariable=self.status, values=["all", "ongoing", "completed"], state="readonly", width=12)\
             .pack(side="left")
         ttk.Button(top, text="Apply", command=self.refresh).pack(side="left", padx=6)
+        self.loading = LoadingIndicator(top)
+        self.loading.pack(side="left", padx=6)
 
         ttk.Button(top, text="Assign Employee", command=self.on_assign).pack(side="right")
         ttk.Button(top, text="Delete", command=self.on_delete).pack(side="right", padx=6)
@@ -68,37 +74,50 @@ class ProjectScreen(ttk.Frame):
         return int(self.tree.item(sel[0], "values")[0])
 
     def refresh(self):
-        try:
-            for i in self.tree.get_children():
-                self.tree.delete(i)
-
-            s = self.status.get()
-            status = None if s == "all" else s
-            rows = self.proj_mgr.get_all_projects(status=status)
-
-            for r in rows:
-                start = format_display_date(r.get("start_date"))
-                end = format_display_date(r.get("end_date")) if r.get("end_date") else ""
-                budget = format_currency_vnd(to_vnd(r.get("budget")))
-                st = "Ongoing" if (r.get("end_date") is None) else "Completed"
-                self.tree.insert("", "end", values=(
-                    r.get("project_id"),
-                    r.get("project_name"),
-                    start,
-                    end,
-                    budget,
-                    st,
-                    r.get("department_name"),
-                    r.get("total_employees") or 0,
-                    r.get("total_hours_worked") or 0
-                ))
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        s = self.status.get()
+        status = None if s == "all" else s
+        self.loading.show()
+        self.loader.submit(
+            "projects", self.proj_mgr.get_all_projects, status=status,
+            on_success=self._render,
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self.loading.hide
+        )
+
+    def _render(self, rows):
+        self.tree.clear()
+
+        for r in rows:
+            start = format_display_date(r.get("start_date"))
+            end = format_display_date(r.get("end_date")) if r.get("end_date") else ""
+            budget = format_currency_vnd(to_vnd(r.get("budget")))
+            st = "Ongoing" if (r.get("end_date") is None) else "Completed"
+            self.tree.insert("", "end", values=(
+                r.get("project_id"),
+                r.get("project_name"),
+                start,
+                end,
+                budget,
+                st,
+                r.get("department_name"),
+                r.get("total_employees") or 0,
+                r.get("total_hours_worked") or 0
+            ), sort_values=(
+                r.get("project_id"),
+                r.get("project_name"),
+                r.get("start_date"),
+                r.get("end_date"),
+                r.get("budget"),
+                st,
+                r.get("department_name"),
+                r.get("total_employees") or 0,
+                r.get("total_hours_worked") or 0
+            ))
+        self.tree.resort()      # giữ cột sort người dùng đã chọn sau khi tải lại
 
     def on_add(self):
         dlg = ProjectDialog(self, self.managers, mode="create")
-        self.wait_window(dlg)
-        self.refresh()
+        wait_dialog(self, dlg)
 
     def on_edit(self):
         pid = self._selected_project()
@@ -111,8 +130,7 @@ class ProjectScreen(ttk.Frame):
                 messagebox.showerror("Error", "Project not found")
                 return
             dlg = ProjectDialog(self, self.managers, mode="edit", project=proj)
-            self.wait_window(dlg)
-            self.refresh()
+            wait_dialog(self, dlg)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -136,5 +154,4 @@ class ProjectScreen(ttk.Frame):
             messagebox.showwarning("Missing", "Select a project to assign")
             return
         dlg = AssignmentDialog(self, self.managers, project_id=pid)
-        self.wait_window(dlg)
-        self.refresh()
\ No newline at end of file
+        wait_dialog(self, dlg)
\ No newline at end of file
@@ -1,11 +1,42 @@
+import shlex
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from app.ui.widgets import SortableTreeview
+from app.ui.widgets import VirtualTreeview, LoadingIndicator
+from app.ui.async_loader import get_loader
+from app.models.utils.helpers import remove_accents
+
+FILTER_DELAY_MS = 250   # chờ ngừng gõ rồi mới lọc
+
+
+def _fold(value) -> str:
+    return remove_accents(value).lower()
+
+
+def _parse_filter(text: str):
+    """
+    "nguyen it"          -> mọi từ đều phải có trong dòng (AND)
+    "position:dev hanoi" -> "dev" nằm trong cột có tên chứa "position", "hanoi" ở cột bất kỳ
+    Cụm có dấu cách đặt trong ngoặc kép: full_name:"van an"
+    Trả về (các từ chung, [(tên cột, từ), ...]) đã bỏ dấu / chữ thường.
+    """
+    try:
+        parts = shlex.split(text)
+    except ValueError:          # ngoặc kép chưa đóng
+        parts = text.split()
+    terms, column_terms = [], []
+    for part in parts:
+        col, sep, value = part.partition(":")
+        if sep and col and value:
+            column_terms.append((col.lower(), _fold(value)))
+        elif part:
+            terms.append(_fold(part))
+    return terms, column_terms
 
 class QueriesScreen(ttk.Frame):
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
         self.query_mgr = managers["query"]
+        self.loader = get_loader(self)
 
         ttk.Label(self, text="QUERIES", font=("Segoe UI", 14, "bold")).pack(anchor="w")
 
@@ -25,16 +56,24 @@ class QueriesScreen(ttk.Frame):
         bar = ttk.Frame(self)
         bar.pack(fill="x", pady=(0,6))
         ttk.Label(bar, text="Search filter:").pack(side="left")
-        ttk.Entry(bar, textvariable=self.search, width=40).pack(side="left", padx=6)
+        entry = ttk.Entry(bar, textvariable=self.search, width=40)
+        entry.pack(side="left", padx=6)
+        entry.bind("<KeyRelease>", self._schedule_filter)
+        entry.bind("<Return>", lambda e: self.apply_filter())
         ttk.Button(bar, text="Apply", command=self.apply_filter).pack(side="left")
+        self.loading = LoadingIndicator(bar)
+        self.loading.pack(side="left", padx=10)
 
-        self.tree = SortableTreeview(self, columns=(), show="headings", height=16)
+        self.tree = VirtualTreeview(self, columns=(), height=16)
         self.tree.pack(fill="both", expand=True)
 
+        self._report = None      # key báo cáo đang hiển thị (có thể khác radio đang chọn)
         self._raw = []
+        self._index = self._build_index([])
+        self._formatter = None
+        self._filter_job = None
 
-    def _call(self):
-        k = self.q.get()
+    def _call(self, k):
         if k == "query1":
             return self.query_mgr.query_employee_project_roles()
         if k == "query2":
@@ -44,22 +83,86 @@ class QueriesScreen(ttk.Frame):
         return self.query_mgr.query_above_average_salary()
         
     def run(self):
-        try:
-            self._raw = self._call()
-            self.render(self._raw)
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.loading.show("⏳ Running query...")
+        self.loader.submit(
+            "query", self._load, self.q.get(),
+            on_success=self._on_loaded,
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self.loading.hide
+        )
 
-    def render(self, rows):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+    def _load(self, k):
+        # Chạy ở worker thread: query + dựng index tìm kiếm
+        rows = self._call(k)
+        return k, rows, self._build_index(rows)
+
+    def _on_loaded(self, result):
+        self._report, self._raw, self._index = result
+        self.render(self._raw)
+        if self.search.get().strip():
+            self.apply_filter()
 
+    MONEY_COLUMNS = ("base_salary", "overall_avg_base_salary", "difference", "budget")
+
+    @classmethod
+    def _build_index(cls, rows) -> dict:
+        """
+        Dựng 1 lần cho mỗi lần chạy query: tuple giá trị của từng dòng và chữ đã bỏ dấu /
+        chữ thường của từng ô (tiền lấy cả dạng hiển thị "15,000,000") để lọc nhanh.
+        """
+        cols = list(rows[0].keys()) if rows else []
+        money = {c for c in cols if c in cls.MONEY_COLUMNS}
+        tuples, cells, blobs = [], [], []
+        for r in rows:
+            values = tuple(r.get(c, "") for c in cols)
+            texts = []
+            for c, v in zip(cols, values):
+                text = "" if v is None else str(v)
+                if c in money and v is not None:
+                    try:
+                        text = f"{text} {float(v):,.0f}"
+                    except (ValueError, TypeError):
+                        pass
+                texts.append(_fold(text))
+            tuples.append(values)
+            cells.append(texts)
+            blobs.append("\x1f".join(texts))
+        return {"cols": cols, "tuples": tuples, "cells": cells, "blobs": blobs}
+
+    def render(self, rows):
         if not rows:
-            self.tree["columns"] = ()
+            self.tree.set_columns(())
+            self.tree.clear()
             return
 
         cols = list(rows[0].keys())
-        self.tree["columns"] = cols
+        if cols != self.tree.columns:
+            self._setup_columns(cols)
+
+        # Giữ giá trị gốc (để sort đúng kiểu); format tiền chỉ chạy cho dòng đang hiển thị
+        money = [i for i, c in enumerate(cols) if c in self.MONEY_COLUMNS]
+
+        def formatter(values):
+            if not money:
+                return values
+            values = list(values)
+            for i in money:
+                try:
+                    values[i] = f"{float(values[i]):,.0f}"
+                except (ValueError, TypeError):
+                    pass
+            return values
+
+        self._formatter = formatter
+        if rows is self._raw:
+            # Copy: bảng sort tại chỗ, index phải giữ nguyên thứ tự để khớp cells / blobs
+            tuples = list(self._index["tuples"])
+        else:
+            tuples = [tuple(r.get(c, "") for c in cols) for r in rows]
+        self.tree.set_rows(tuples, formatter)
+
+    def _setup_columns(self, cols):
+        self.tree.set_columns(cols)
         special_widths = {
             "employee_id": 100,
             "full_name": 200,
@@ -86,41 +189,71 @@ class QueriesScreen(ttk.Frame):
             self.tree.column(c, width=w, anchor=anchor)
         self.tree.enable_sorting()
 
-        for r in rows:
-            row_values = []
-            for c in cols:
-                val = r.get(c, "")
-                if c in ["base_salary", "overall_avg_base_salary", "difference", "budget"]:
-                    try:
-                        val = f"{float(val):,.0f}"
-                    except (ValueError, TypeError):
-                        pass
-                
-                row_values.append(val)
-
-            self.tree.insert("", "end", values=row_values)
+    def _schedule_filter(self, event=None):
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(FILTER_DELAY_MS, self.apply_filter)
 
     def apply_filter(self):
-        kw = self.search.get().strip().lower()
-        if not kw:
-            self.render(self._raw)
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+
+        index = self._index
+        if not index["cols"]:
             return
-        filtered = []
-        for r in self._raw:
-            text = " ".join(str(v) for v in r.values()).lower()
-            if kw in text:
-                filtered.append(r)
-        self.render(filtered)
+        terms, column_terms = _parse_filter(self.search.get().strip())
+
+        # Cột theo 1 phần tên: "salary:" khớp base_salary; không khớp cột nào thì coi là từ chung
+        col_filters = []
+        for col, value in column_terms:
+            positions = [i for i, c in enumerate(index["cols"]) if col in c.lower()]
+            if positions:
+                col_filters.append((positions, value))
+            else:
+                terms.append(_fold(f"{col}:{value}"))
+
+        if not terms and not col_filters:
+            rows = list(index["tuples"])
+        else:
+            rows = [
+                values
+                for values, cells, blob in zip(index["tuples"], index["cells"], index["blobs"])
+                if all(t in blob for t in terms)
+                and all(any(value in cells[i] for i in positions) for positions, value in col_filters)
+            ]
+        self.tree.set_rows(rows, self._formatter)
 
     def export_csv(self):
-        if not self._raw:
-            messagebox.showwarning("Missing", "No data to export")
+        """
+        Export đúng những gì đang xem. Chưa lọc / sort thì stream cả báo cáo thẳng từ DB
+        (export_report_csv: không giữ kết quả trong RAM, có tiến độ); đã lọc hoặc sort thì
+        ghi các dòng đang hiện trên bảng theo đúng thứ tự.
+        """
+        if self._report is None or not len(self.tree):
+            messagebox.showinfo("Export CSV", "No rows to export - run a query first.")
             return
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV","*.csv")])
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV","*.csv"), ("Gzipped CSV","*.csv.gz")]
+        )
         if not path:
             return
-        try:
-            self.query_mgr.export_to_csv(self._raw, path)
-            messagebox.showinfo("OK", f"Exported: {path}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
\ No newline at end of file
+
+        if self.search.get().strip() or self.tree.is_sorted():
+            fn, args, kwargs = (self.query_mgr.export_rows_csv,
+                                (self.tree.columns, self.tree.rows(), path), {})
+        else:
+            fn, args, kwargs = (self.query_mgr.export_report_csv, (self._report, path),
+                                {"on_progress": self._on_export_progress})
+        self.loading.show("⏳ Exporting...")
+        self.loader.submit(
+            "query_export", fn, *args, **kwargs,
+            on_success=lambda res: messagebox.showinfo("OK", f"Exported {res['rows']:,} rows: {path}"),
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self.loading.hide
+        )
+
+    def _on_export_progress(self, rows):
+        # Chạy ở worker thread -> chuyển việc cập nhật label về main thread
+        self.loader.post(self.loading.show, f"⏳ Exporting... {rows:,} rows")
\ No newline at end of file
@@ -1,26 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-import math
-import unicodedata
 
-from app.ui.widgets import SortableTreeview, PaginationBar
+from app.ui.widgets import SortableTreeview, PaginationBar, LoadingIndicator, wait_dialog
+from app.ui.async_loader import get_loader
 from app.dialogs.bonus_deduction_dialog import BonusDeductionDialog
 from app.models.utils.helpers import to_vnd, format_currency_vnd
 from app.models.utils.helpers import month_number_to_name
-
-# --- Hàm hỗ trợ bỏ dấu tiếng Việt ---
-def remove_accents(input_str):
-    """Chuyển đổi chuỗi có dấu thành không dấu (Hải Đăng -> Hai Dang)"""
-    if not input_str:
-        return ""
-    s = str(input_str)
-    s = s.replace("đ", "d").replace("Đ", "D")
-    s = unicodedata.normalize('NFKD', s)
-    return "".join(c for c in s if not unicodedata.combining(c))
+from app.services.employee_directory import get_directory
 
 class SalaryScreen(ttk.Frame):
     PAGE_SIZE = 15
+    TABLES = ("employees", "salary_payments", "bonus_deductions")   # bảng mà màn hình đọc: đổi thì tải lại
     def __init__(self, master, managers: dict):
         super().__init__(master, padding=10)
         style = ttk.Style()
@@ -30,8 +21,11 @@ class SalaryScreen(ttk.Frame):
         self.managers = managers
         self.sal_mgr = managers["salary"]
         self.emp_mgr = managers["employee"]
+        self.loader = get_loader(self)
 
         self.page = 0
+        self._cursors = [None]  # _cursors[i] = keyset cursor để tải trang i
+        self._total = None      # tổng số dòng sau lọc, trả về cùng trang đầu
         self.search_keyword = ""
         self.search_exact_id = None
 
@@ -56,14 +50,15 @@ class SalaryScreen(ttk.Frame):
         cb_year.pack(side="left")
         cb_year.bind("<<ComboboxSelected>>", lambda e: self.reset_paging())
 
-        ttk.Button(top, text="Load", command=self.refresh).pack(side="left", padx=8)
+        ttk.Button(top, text="Load", command=self.reset_paging).pack(side="left", padx=8)
+        self.loading = LoadingIndicator(top)
+        self.loading.pack(side="left", padx=6)
 
         action_bar = ttk.Frame(self)
         action_bar.pack(fill="x", pady=(8, 0))
 
-        # Load danh sách nhân viên
-        self.emps = self.emp_mgr.get_all_employees(limit=1000, offset=0)
-        self.emp_map = {f'{e["employee_id"]} - {e["full_name"]}': e["employee_id"] for e in self.emps}
+        # Danh bạ nhân viên dùng chung, được tải ở background (xem _load_employees)
+        self.directory = get_directory()
 
         ttk.Label(action_bar, text="Employee (Enter to search):").pack(side="left")
         self.employee_id = tk.StringVar(value="")
@@ -72,7 +67,7 @@ class SalaryScreen(ttk.Frame):
         self.cb_emp = ttk.Combobox(
             action_bar,
             textvariable=self.employee_id,
-            values=list(self.emp_map.keys()),
+            values=[],
             state="normal", 
             width=30
         )
@@ -87,6 +82,8 @@ class SalaryScreen(ttk.Frame):
         ).pack(side="left", padx=(0, 12))
 
         ttk.Button(top, text="Add Bonus/Deduction", command=self.on_add_bd).pack(side="right", padx=6)
+        self.btn_close = ttk.Button(top, text="Close Payroll", command=self.on_close_payroll)
+        self.btn_close.pack(side="right", padx=6)
 
         cols = ("employee_id","employee_name","base_salary_vnd","total_bonus_vnd","total_deduction_vnd","net_amount_vnd")
         self.tree = SortableTreeview(self, columns=cols, show="headings", height=15, style="BigRow.Treeview")
@@ -118,10 +115,22 @@ class SalaryScreen(ttk.Frame):
         self.pager = PaginationBar(self, self.prev_page, self.next_page)
         self.pager.pack(fill="x", pady=(6,0))
 
+        self._load_employees()
         self.refresh()
 
+    def _load_employees(self):
+        self.loader.submit(
+            "salary_employees", lambda: self.directory.load().labels(),
+            on_success=self._set_employees
+        )
+
+    def _set_employees(self, labels):
+        self.cb_emp["values"] = labels
+
     def reset_paging(self):
         self.page = 0
+        self._cursors = [None]
+        self._total = None
         self.refresh()
 
     def on_sort(self, col):
@@ -131,85 +140,63 @@ class SalaryScreen(ttk.Frame):
             self.sort_col = col
             self.sort_desc = False 
         
-        self.page = 0 
-        self.refresh()
+        self.reset_paging()
 
     def refresh(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-            
-        month_name = month_number_to_name(int(self.month.get()))  
+        month_name = month_number_to_name(int(self.month.get()))
         sort_order = "DESC" if self.sort_desc else "ASC"
+        # Khóa pager tới khi trang về, tránh bấm Next khi cursor chưa có
+        self.pager.update_state(False, False)
+        self.loading.show()
+        self.loader.submit(
+            "salary", self._load,
+            month_name, int(self.year.get()), self._cursors[self.page], self.sort_col, sort_order,
+            self.search_keyword, self.search_exact_id,
+            on_success=self._render,
+            on_error=self._on_load_error,
+            on_done=self.loading.hide
+        )
 
-        try:
-            if not self.search_keyword and self.search_exact_id is None:
-                rows = self.sal_mgr.get_salary_by_month(
-                    month_name,
-                    int(self.year.get()),
-                    limit=self.PAGE_SIZE,
-                    offset=self.page * self.PAGE_SIZE,
-                    sort_by=self.sort_col,    
-                    sort_order=sort_order
-                )
-                total_records = self.sal_mgr.count_salary_records()
-            
-            else:
-                all_rows = self.sal_mgr.get_salary_by_month(
-                    month_name,
-                    int(self.year.get()),
-                    limit=100000, 
-                    offset=0,
-                    sort_by=self.sort_col,
-                    sort_order=sort_order
-                )
-                
-                filtered_rows = []
-                kw_normalized = remove_accents(self.search_keyword).lower()
-
-                for r in all_rows:
-                    if self.search_exact_id is not None:
-                        if r.get("employee_id") == self.search_exact_id:
-                            filtered_rows.append(r)
-                    
-                    elif self.search_keyword:
-                        emp_id_str = str(r.get("employee_id", ""))
-                        raw_name = r.get("employee_name", "")
-                        name_normalized = remove_accents(raw_name).lower()
-                        
-                        if (kw_normalized in emp_id_str) or (kw_normalized in name_normalized):
-                            filtered_rows.append(r)
-                
-                total_records = len(filtered_rows)
-                start_idx = self.page * self.PAGE_SIZE
-                end_idx = start_idx + self.PAGE_SIZE
-                rows = filtered_rows[start_idx:end_idx]
-
-            self.pager.set_page(self.page)
-            
-            max_page = math.ceil(total_records / self.PAGE_SIZE) - 1
-            if max_page < 0: max_page = 0
-            
-            if self.page > max_page and total_records > 0:
-                self.page = max_page
-                self.refresh()
-                return
-
-            can_prev = (self.page > 0)
-            can_next = (self.page < max_page)
-            self.pager.update_state(can_prev, can_next)
-            
-            for r in rows:
-                self.tree.insert("", "end", values=(
-                    r.get("employee_id"),
-                    r.get("employee_name"),
-                    format_currency_vnd(to_vnd(r.get("base_salary"))),
-                    format_currency_vnd(to_vnd(r.get("total_bonus"))),
-                    format_currency_vnd(to_vnd(r.get("total_deduction"))),
-                    format_currency_vnd(to_vnd(r.get("net_amount"))),
-                ))
-                
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+    def _load(self, month_name, year, after, sort_col, sort_order, keyword, exact_id):
+        """Chạy ở worker thread - lọc, sắp xếp, phân trang (keyset) đều làm trong SQL"""
+        return self.sal_mgr.get_salary_after(
+            month_name,
+            year,
+            after=after,
+            limit=self.PAGE_SIZE,
+            sort_by=sort_col,
+            sort_order=sort_order,
+            keyword=keyword,
+            employee_id=exact_id
+        )
+
+    def _render(self, result):
+        # Trang rỗng (dữ liệu vừa thay đổi) -> lùi lại 1 trang
+        if not result["rows"] and self.page > 0:
+            self.page -= 1
+            self.refresh()
+            return
+
+        del self._cursors[self.page + 1:]
+        if result["has_next"]:
+            self._cursors.append(result["next_cursor"])
+
+        if "total" in result:
+            self._total = result["total"]
+
+        self.tree.clear()
+        self.pager.set_page(self.page, self._total, self.PAGE_SIZE)
+        self.pager.update_state(self.page > 0, result["has_next"])
+
+        for r in result["rows"]:
+            self.tree.insert("", "end", values=(
+                r.get("employee_id"),
+                r.get("employee_name"),
+                format_currency_vnd(to_vnd(r.get("base_salary"))),
+                format_currency_vnd(to_vnd(r.get("total_bonus"))),
+                format_currency_vnd(to_vnd(r.get("total_deduction"))),
+                format_currency_vnd(to_vnd(r.get("net_amount"))),
+            ))
 
     def prev_page(self):
         if self.page > 0:
@@ -217,9 +204,15 @@ class SalaryScreen(ttk.Frame):
             self.refresh()
 
     def next_page(self):
+        if len(self._cursors) <= self.page + 1:
+            return  # chưa có cursor cho trang sau
         self.page += 1
         self.refresh()
 
+    def _on_load_error(self, e):
+        self.pager.update_state(self.page > 0, False)
+        messagebox.showerror("Error", str(e))
+
     def on_find_employee(self, event=None):
         raw_text = self.employee_id.get().strip()
         
@@ -227,8 +220,7 @@ class SalaryScreen(ttk.Frame):
         self.search_exact_id = None
         
         if not raw_text:
-            self.page = 0
-            self.refresh()
+            self.reset_paging()
             return
 
         if " - " in raw_text:
@@ -242,22 +234,49 @@ class SalaryScreen(ttk.Frame):
         if self.search_exact_id is None:
             self.search_keyword = raw_text
             
-        self.page = 0
-        self.refresh()
+        self.reset_paging()
 
     def on_reset_search(self):
         self.employee_id.set("")
         self.search_keyword = ""
         self.search_exact_id = None
-        self.page = 0
-        self.refresh()
+        self.reset_paging()
 
     def _get_selected_emp_id(self):
         txt = self.employee_id.get()
         if not txt: return None
-        return self.emp_map.get(txt)
+        return self.directory.id_from_label(txt)
 
     def on_add_bd(self):
         dlg = BonusDeductionDialog(self, self.managers)
-        self.wait_window(dlg)
-        self.refresh()
\ No newline at end of file
+        wait_dialog(self, dlg)
+
+    def on_close_payroll(self):
+        month_name = month_number_to_name(int(self.month.get()))
+        year = int(self.year.get())
+        if not messagebox.askyesno(
+            "Confirm", f"Close payroll for {month_name} {year}?\n"
+                       "Every employee not yet recorded this month will be marked Paid."
+        ):
+            return
+        self.btn_close.configure(state="disabled")
+        self.loading.show()
+        self.loader.submit(
+            "salary_close", self.sal_mgr.close_payroll_month, month_name, year,
+            on_success=self._on_payroll_closed,
+            on_error=lambda e: messagebox.showerror("Error", str(e)),
+            on_done=self._on_close_done
+        )
+
+    def _on_payroll_closed(self, result):
+        msg = result["message"]
+        if result["failed_ids"]:
+            ids = ", ".join(str(i) for i in result["failed_ids"][:20])
+            msg += f"\n\nNot recorded (net <= 0): {ids}"
+        messagebox.showinfo("Payroll", msg)
+        self.refresh()
+
+    def _on_close_done(self):
+        self.btn_close.configure(state="normal")
+        if not self.loader.is_loading("salary"):  # refresh() sau khi chốt vẫn đang tải
+            self.loading.hide()
@@ -0,0 +1,151 @@
+"""
+Phát hiện UI bị đơ: main thread gửi heartbeat bằng after(), 1 thread giám sát kiểm tra
+heartbeat có đều không. Quá ngưỡng thì chụp stack Python của main thread (đang kẹt ở đâu)
+và ghi ra logs/ui_stalls.log kèm tên màn hình đang mở.
+"""
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from app.models.utils.instrumentation import instrumentation
+
+STALL_THRESHOLD_MS = float(os.environ.get("EIM_STALL_MS", 500))   # 0 = tắt
+HEARTBEAT_MS = 100
+MAX_SAMPLES = 5         # số lần chụp stack tối đa cho 1 lần đơ (mỗi lần cách nhau 1 ngưỡng)
+RECENT_STALLS = 50
+LAG_WINDOW = 100        # số mẫu độ trễ heartbeat giữ lại (~10 giây)
+
+
+def _default_log_path() -> str:
+    base = os.path.dirname(instrumentation.log_path) if instrumentation.log_path else os.path.abspath("logs")
+    return os.path.join(base, "ui_stalls.log")
+
+
+class StallDetector:
+
+    def __init__(self, root, screen_name=lambda: None, threshold_ms: float = STALL_THRESHOLD_MS,
+                 heartbeat_ms: int = HEARTBEAT_MS, log_path: str = None):
+        self.root = root
+        self.screen_name = screen_name
+        self.threshold = threshold_ms / 1000
+        self.heartbeat_ms = heartbeat_ms
+        self.log_path = log_path or _default_log_path()
+        self.recent = deque(maxlen=RECENT_STALLS)
+        self.lags = deque(maxlen=LAG_WINDOW)     # ms heartbeat đến trễ so với lịch after()
+        self._total = 0              # tổng số lần đơ từ lúc start (recent chỉ giữ RECENT_STALLS lần)
+        self._worst_ms = 0
+
+        self._main_ident = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._stall = None           # lần đơ đang diễn ra (monitor thread tạo, main thread kết thúc)
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()     # main thread và monitor thread cùng ghi 1 file
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.threshold <= 0 or self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self.root.after(self.heartbeat_ms, self._beat)
+        self._thread = threading.Thread(target=self._monitor, name="ui-stall-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # -------------------- Main thread --------------------
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            previous, self._last_beat = self._last_beat, now
+            stall, self._stall = self._stall, None
+        self.lags.append(max(0.0, (now - previous) * 1000 - self.heartbeat_ms))
+        if stall is not None:
+            # Event loop chạy lại: ghi tổng thời gian đơ
+            stall["duration_ms"] = round((now - stall["_started"]) * 1000)
+            with self._lock:
+                self._worst_ms = max(self._worst_ms, stall["duration_ms"])
+            self._write({"event": "stall_end", "time": stall["time"], "screen": stall["screen"],
+                         "duration_ms": stall["duration_ms"], "samples": len(stall["stacks"])})
+        if not self._stop.is_set():
+            self.root.after(self.heartbeat_ms, self._beat)
+
+    # -------------------- Monitor thread --------------------
+    def _monitor(self):
+        interval = self.heartbeat_ms / 1000
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            with self._lock:
+                # Heartbeat đến trễ hơn chu kỳ after() + ngưỡng -> main thread đang bị chặn
+                blocked = now - self._last_beat - interval
+                stall = self._stall
+                if blocked < self.threshold:
+                    continue
+                if stall is None:
+                    stall = self._stall = {
+                        "time": datetime.now().isoformat(timespec="milliseconds"),
+                        "screen": self._screen(),
+                        "stacks": [],
+                        "_started": self._last_beat + interval,
+                    }
+                    self.recent.append(stall)
+                    self._total += 1
+                elif len(stall["stacks"]) >= MAX_SAMPLES or blocked < self.threshold * (len(stall["stacks"]) + 1):
+                    continue
+            stack = self._main_stack()
+            stall["stacks"].append(stack)
+            self._write({"event": "stall", "time": stall["time"], "screen": stall["screen"],
+                         "blocked_ms": round(blocked * 1000), "sample": len(stall["stacks"]),
+                         "stack": stack})
+
+    def _main_stack(self) -> list:
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return []
+        return [line.rstrip() for line in traceback.format_stack(frame)]
+
+    def _screen(self):
+        try:
+            return self.screen_name()
+        except Exception:
+            return None
+
+    def _write(self, entry: dict):
+        try:
+            with self._log_lock:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Stall log error: {e}")
+
+    # -------------------- Đọc số liệu --------------------
+    def lag_stats(self) -> dict:
+        """Độ trễ event loop trong LAG_WINDOW heartbeat gần nhất"""
+        lags = list(self.lags)
+        return {
+            "samples": len(lags),
+            "window_s": round(len(lags) * self.heartbeat_ms / 1000),
+            "avg_lag_ms": round(sum(lags) / len(lags), 1) if lags else 0.0,
+            "max_lag_ms": round(max(lags), 1) if lags else 0.0,
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            stalls = [dict(s, stacks=len(s["stacks"])) for s in self.recent]
+            total, worst = self._total, self._worst_ms
+        for s in stalls:
+            s.pop("_started", None)
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "count": total,
+            "worst_ms": worst,
+            "recent": stalls[-10:],
+            "log": self.log_path,
+        }
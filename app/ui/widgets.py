@@ -1,10 +1,19 @@
 import tkinter as tk
 from tkinter import ttk
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from app.models.utils.helpers import remove_accents
+from app.models.utils.cache import query_cache
 
 class SortableTreeview(ttk.Treeview):
     def __init__(self, master, **kw):
         super().__init__(master, **kw)
         self._sort_desc = {}
+        self._row_count = 0     # số dòng cấp 1, để tô màu zebra không cần đếm lại
+        self._sort_values = {}  # iid -> tuple giá trị gốc (cùng thứ tự cột) dùng để sort
+        self._last_sort = None  # (cột, desc) người dùng bấm gần nhất, để resort() sau khi nạp lại
         
         # --- CẤU HÌNH MÀU SẮC (ZEBRA STRIPES) ---
         # Màu trắng cho dòng lẻ
@@ -18,45 +27,322 @@ class SortableTreeview(ttk.Treeview):
             self.heading(col, command=lambda c=col: self._sort_by(c))
 
     def _sort_by(self, col):
-        items = [(self.set(k, col), k) for k in self.get_children("")]
         desc = self._sort_desc.get(col, False)
+        self._apply_sort(col, desc)
+        self._last_sort = (col, desc)
+        self._sort_desc[col] = not desc
 
-        def _key(x):
-            v = x[0]
-            try:
-                return float(v.replace(",", ""))
-            except Exception:
-                return v.lower() if isinstance(v, str) else v
+    def resort(self):
+        """Sắp xếp lại theo cột người dùng chọn gần nhất (gọi sau khi nạp lại dữ liệu)"""
+        if self._last_sort is not None and self.get_children(""):
+            self._apply_sort(*self._last_sort)
 
-        items.sort(key=_key, reverse=desc)
-        for idx, (_, k) in enumerate(items):
-            self.move(k, "", idx)
-            
-            # --- CẬP NHẬT MÀU SAU KHI SẮP XẾP ---
-            # Tính toán lại dòng chẵn/lẻ để tô màu lại cho đúng thứ tự mới
-            tag = 'even' if idx % 2 == 0 else 'odd'
-            self.item(k, tags=(tag,))
-            # ------------------------------------
+    def _apply_sort(self, col, desc):
+        idx = list(self["columns"]).index(col)
 
-        self._sort_desc[col] = not desc
+        # Tính key 1 lần cho mỗi dòng: ưu tiên giá trị gốc truyền qua sort_values,
+        # không có thì parse chuỗi đang hiển thị ("15,000,000 VND", "25/12/2024", ...)
+        keyed = []
+        for k in self.get_children(""):
+            typed = self._sort_values.get(k)
+            if typed is not None:
+                keyed.append((_typed_sort_key(typed[idx]), k))
+            else:
+                keyed.append((_display_sort_key(self.set(k, col)), k))
+        keyed.sort(key=lambda x: x[0], reverse=desc)
+        order = [k for _, k in keyed]
+
+        # Đặt lại thứ tự bằng 1 lệnh Tk thay vì move() từng dòng
+        self.tk.call(self._w, "children", "", order)
+        self._restripe(order)
+
+    def _restripe(self, order):
+        """Tô lại màu zebra theo thứ tự mới (giữ nguyên các tag khác của dòng)"""
+        self.tk.call(self._w, "tag", "remove", "even")
+        self.tk.call(self._w, "tag", "remove", "odd")
+        if order[0::2]:
+            self.tk.call(self._w, "tag", "add", "even", order[0::2])
+        if order[1::2]:
+            self.tk.call(self._w, "tag", "add", "odd", order[1::2])
 
     # --- TỰ ĐỘNG TÔ MÀU KHI THÊM DỮ LIỆU ---
-    def insert(self, parent, index, iid=None, **kw):
-        # Đếm số dòng hiện có để quyết định màu cho dòng mới
-        current_rows = self.get_children(parent)
-        row_idx = len(current_rows)
+    def insert(self, parent, index, iid=None, sort_values=None, **kw):
+        """
+        sort_values: tuple giá trị gốc (số, Decimal, date, ...) theo thứ tự cột,
+        dùng khi values là chuỗi đã format (tiền, ngày) để sort đúng kiểu.
+        """
+        # Dòng cấp 1 dùng bộ đếm (không gọi get_children mỗi lần -> nạp n dòng là O(n))
+        if parent == "":
+            row_idx = self._row_count
+            self._row_count += 1
+        else:
+            row_idx = len(self.get_children(parent))
         
         tag = 'even' if row_idx % 2 == 0 else 'odd'
         
         # Thêm tag màu vào danh sách tag của dòng đó
         if 'tags' in kw:
-            kw['tags'] = kw['tags'] + (tag,)
+            kw['tags'] = tuple(kw['tags']) + (tag,)
         else:
             kw['tags'] = (tag,)
             
-        return super().insert(parent, index, iid, **kw)
+        item = super().insert(parent, index, iid, **kw)
+        if sort_values is not None:
+            self._sort_values[item] = tuple(sort_values)
+        return item
     # ---------------------------------------
 
+    def delete(self, *items):
+        super().delete(*items)
+        for k in items:
+            self._sort_values.pop(k, None)
+        self._row_count = len(self.get_children(""))
+
+    def clear(self):
+        """Xóa toàn bộ dòng bằng 1 lệnh Tk"""
+        super().delete(*self.get_children(""))
+        self._sort_values.clear()
+        self._row_count = 0
+
+
+def _text_key(text: str) -> tuple:
+    # So sánh không dấu, không phân biệt hoa thường (giống collation utf8mb4_0900_ai_ci),
+    # bằng nhau thì mới xét dấu
+    folded = text.casefold()
+    return (3, remove_accents(folded), folded)
+
+
+def _typed_sort_key(value):
+    """
+    Key sắp xếp theo kiểu dữ liệu gốc: None lên đầu, số theo giá trị,
+    ngày giờ theo thời gian, chuỗi không phân biệt hoa thường / dấu.
+    Nhóm theo kiểu trước để cột lẫn kiểu vẫn so sánh được.
+    """
+    if value is None or value == "":
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, int(value))
+    if isinstance(value, (int, float, Decimal)):
+        return (1, value)
+    if isinstance(value, timedelta):              # cột TIME của MySQL
+        return (1, value.total_seconds())
+    if isinstance(value, (date, time)):
+        return (2, value.isoformat())
+    return _text_key(str(value))
+
+
+_NUMBER_RE = re.compile(r"^-?\d[\d,]*(\.\d+)?( VND)?$")     # phải bắt đầu bằng chữ số: "," / "-," là chữ
+
+
+def _display_sort_key(text):
+    """
+    Key cho ô chỉ có chuỗi hiển thị (đọc lại từ Tk): nhận ra số / tiền "15,000,000 VND",
+    ngày DD/MM/YYYY và giờ HH:MM để sort đúng kiểu như _typed_sort_key.
+    """
+    text = str(text).strip()
+    if not text:
+        return (0, 0)
+    if _NUMBER_RE.match(text):
+        return (1, float(text.replace(",", "").replace(" VND", "")))
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return (2, datetime.strptime(text, fmt).date().isoformat())
+        except ValueError:
+            pass
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            t = datetime.strptime(text, fmt).time()
+            return (1, t.hour * 3600 + t.minute * 60 + t.second)
+        except ValueError:
+            pass
+    return _text_key(text)
+
+
+class VirtualTreeview(ttk.Frame):
+    """
+    Bảng ảo cho kết quả lớn: dữ liệu nằm trong list Python (backing store), Treeview chỉ
+    có đúng số dòng đang nhìn thấy. Cuộn = đổi values của các dòng đó, nên 100k dòng
+    vẫn nạp / cuộn / sắp xếp ngay. formatter(row) -> tuple hiển thị chỉ chạy cho dòng đang hiện.
+    """
+
+    WHEEL_ROWS = 3
+
+    def __init__(self, master, columns=(), height=16, **kw):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height,
+                                 selectmode="browse", **kw)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree.tag_configure('odd', background='#ffffff')
+        self.tree.tag_configure('even', background='#f0f4f8')
+
+        self._columns = list(columns)
+        self._rows = []          # backing store: mỗi dòng là tuple giá trị gốc
+        self._formatter = None
+        self._slots = []         # iid của các dòng Treeview đang dùng để hiển thị
+        self._top = 0            # index (trong _rows) của dòng trên cùng
+        self._visible = height
+        self._selected = None    # index (trong _rows) của dòng đang chọn
+        self._sort_desc = {}
+        self._sorted = False     # người dùng đã sort (thứ tự khác thứ tự nạp vào)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self._scroll(self.WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self._rows)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self._rows)))
+
+    # -------------------- Cột --------------------
+    def set_columns(self, columns):
+        self.tree.delete(*self._slots)
+        self._slots = []
+        self._columns = list(columns)
+        self.tree["columns"] = self._columns
+        self._sort_desc = {}
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def heading(self, column, **kw):
+        return self.tree.heading(column, **kw)
+
+    def column(self, column, **kw):
+        return self.tree.column(column, **kw)
+
+    def enable_sorting(self):
+        for col in self._columns:
+            self.tree.heading(col, command=lambda c=col: self.sort_by(c))
+
+    # -------------------- Dữ liệu --------------------
+    def set_rows(self, rows, formatter=None):
+        """Thay toàn bộ dữ liệu (không tạo item Tk cho từng dòng)"""
+        # Luôn copy: sort_by sắp xếp tại chỗ, không được đảo thứ tự list của nơi gọi
+        self._rows = list(rows)
+        self._sorted = False
+        self._formatter = formatter
+        self._top = 0
+        self._selected = None
+        self._render()
+
+    def clear(self):
+        self.set_rows([])
+
+    def sort_by(self, column):
+        """Sắp xếp backing store theo giá trị gốc của cột (bấm lần nữa để đảo chiều)"""
+        idx = self._columns.index(column)
+        desc = self._sort_desc.get(column, False)
+        self._rows.sort(key=lambda r: _typed_sort_key(r[idx]), reverse=desc)
+        self._sort_desc[column] = not desc
+        self._sorted = True
+        self._top = 0
+        self._selected = None
+        self._render()
+
+    def rows(self):
+        """Bản sao các dòng (giá trị gốc) theo đúng thứ tự đang hiển thị"""
+        return list(self._rows)
+
+    def is_sorted(self) -> bool:
+        """True nếu đã sort theo cột từ lần set_rows gần nhất"""
+        return self._sorted
+
+    def __len__(self):
+        return len(self._rows)
+
+    # -------------------- Hiển thị --------------------
+    def _render(self):
+        total = len(self._rows)
+        want = min(self._visible, total)
+
+        while len(self._slots) < want:
+            self._slots.append(self.tree.insert("", "end"))
+        if len(self._slots) > want:
+            self.tree.delete(*self._slots[want:])
+            del self._slots[want:]
+
+        fmt = self._formatter
+        selected_slot = None
+        for slot, iid in enumerate(self._slots):
+            idx = self._top + slot
+            row = self._rows[idx]
+            # Màu zebra theo index thật của dòng -> không đổi khi cuộn
+            self.tree.item(iid, values=fmt(row) if fmt else row,
+                           tags=('even' if idx % 2 == 0 else 'odd',))
+            if idx == self._selected:
+                selected_slot = iid
+
+        if selected_slot is not None:
+            self.tree.selection_set(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        if total:
+            self.vsb.set(self._top / total, (self._top + want) / total)
+        else:
+            self.vsb.set(0, 1)
+
+    def _scroll_to(self, top):
+        top = max(0, min(int(top), len(self._rows) - self._visible))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _scroll(self, rows):
+        self._scroll_to(self._top + rows)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self._rows))
+        elif action == "scroll":
+            step = self._visible if unit == "pages" else 1
+            self._scroll(int(amount) * step)
+
+    def _on_wheel(self, event):
+        return self._scroll(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+
+    def _on_resize(self, event):
+        if not self._slots:
+            return
+        bbox = self.tree.bbox(self._slots[0])
+        if not bbox:
+            return
+        visible = max(1, (event.height - bbox[1]) // bbox[3])
+        if visible != self._visible:
+            self._visible = visible
+            self._top = max(0, min(self._top, len(self._rows) - visible))
+            self._render()
+
+    def _on_select(self, event):
+        sel = self.tree.selection()
+        if sel and sel[0] in self._slots:
+            self._selected = self._top + self._slots.index(sel[0])
+
+    def _move_selection(self, delta):
+        if not self._rows:
+            return "break"
+        current = self._top if self._selected is None else self._selected
+        target = max(0, min(current + delta, len(self._rows) - 1))
+        self._selected = target
+        if target < self._top:
+            self._top = target
+        elif target >= self._top + self._visible:
+            self._top = target - self._visible + 1
+        self._render()
+        return "break"
+
+
 class PaginationBar(ttk.Frame):
     def __init__(self, master, on_prev, on_next):
         super().__init__(master)
@@ -75,5 +361,34 @@ class PaginationBar(ttk.Frame):
         self.btn_prev.configure(state="normal" if can_prev else "disabled")
         self.btn_next.configure(state="normal" if can_next else "disabled")
 
-    def set_page(self, page_idx: int):
-        self.lbl.config(text=f"Page {page_idx + 1}")
\ No newline at end of file
+    def set_page(self, page_idx: int, total: int = None, page_size: int = None):
+        """total = tổng số dòng (nếu biết) -> "Page 2 / 11 (160 rows)" """
+        text = f"Page {page_idx + 1}"
+        if total is not None and page_size:
+            pages = max(1, -(-total // page_size))
+            text += f" / {pages} ({total:,} rows)"
+        self.lbl.config(text=text)
+
+class LoadingIndicator(ttk.Label):
+    """Nhãn 'Loading...' hiện khi đang tải dữ liệu ở background"""
+
+    def __init__(self, master, text="⏳ Loading...", **kw):
+        super().__init__(master, text="", **kw)
+        self._text = text
+
+    def show(self, text=None):
+        self.configure(text=text or self._text)
+
+    def hide(self):
+        self.configure(text="")
+
+
+def wait_dialog(screen, dlg):
+    """
+    Chờ dialog đóng, chỉ refresh screen khi dialog đã ghi vào bảng mà screen hiển thị
+    (screen.TABLES). Bấm Cancel / đóng dialog thì không tải lại.
+    """
+    before = query_cache.versions(screen.TABLES)
+    screen.wait_window(dlg)
+    if query_cache.versions(screen.TABLES) != before:
+        screen.refresh()
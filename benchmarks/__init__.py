@@ -0,0 +1,4 @@
+"""
+Benchmark cho tầng manager: sinh dữ liệu giả lập theo scale (datagen), đo thời gian
+các hàm đọc / ghi (run) và so sánh 2 lần chạy (compare). Xem mục "Benchmarks" trong README.md.
+"""
@@ -0,0 +1,97 @@
+"""
+So sánh 2 file kết quả của benchmarks.run.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+    python -m benchmarks.compare before.json after.json --threshold 15 --metric p95_ms
+
+Case chậm hơn quá --threshold % (theo p50 hoặc p95) được đánh dấu REGRESSION, khi đó exit code = 1.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+DEFAULT_THRESHOLD = 10.0    # %
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _change(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(base: Dict, new: Dict, metrics=("p50_ms", "p95_ms"),
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """1 dòng cho mỗi case có ở cả 2 file: giá trị trước / sau, % thay đổi, có regression không"""
+    rows = []
+    base_results, new_results = base["results"], new["results"]
+    for name in sorted(set(base_results) | set(new_results)):
+        b, n = base_results.get(name), new_results.get(name)
+        row = {"case": name, "status": ""}
+        if b is None or n is None:
+            row["status"] = "only in base" if n is None else "new"
+        elif "error" in b or "error" in n:
+            row["status"] = "error"
+        else:
+            for m in metrics:
+                row[m] = (b.get(m), n.get(m), _change(b.get(m), n.get(m)))
+            worst = max((row[m][2] for m in metrics if row[m][2] is not None), default=None)
+            if worst is not None and worst > threshold:
+                row["status"] = "REGRESSION"
+            elif worst is not None and worst < -threshold:
+                row["status"] = "faster"
+        rows.append(row)
+    return rows
+
+
+def _warn_if_different(base: Dict, new: Dict):
+    """Kết quả chỉ so được khi cùng cỡ dữ liệu / seed"""
+    for key in ("table_counts", "seed", "repeat", "mysql_version"):
+        if base.get(key) != new.get(key):
+            print(f"warning: '{key}' differs between runs ({base.get(key)} vs {new.get(key)})",
+                  file=sys.stderr)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"regression threshold in percent (default {DEFAULT_THRESHOLD:g})")
+    parser.add_argument("--metric", action="append", choices=METRICS,
+                        help="metrics to compare (repeatable, default p50_ms and p95_ms)")
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    _warn_if_different(base, new)
+    metrics = tuple(args.metric or ("p50_ms", "p95_ms"))
+    rows = compare(base, new, metrics, args.threshold)
+
+    print(f"base: {args.base} ({base.get('git_commit')})   new: {args.new} ({new.get('git_commit')})")
+    header = f"{'case':<46}" + "".join(f" {m + ' before':>14} {'after':>10} {'change':>8}" for m in metrics)
+    print(header + "  status")
+    for row in rows:
+        line = f"{row['case']:<46}"
+        for m in metrics:
+            if m in row:
+                b, n, c = row[m]
+                line += f" {b or 0:>14.2f} {n or 0:>10.2f} {'' if c is None else f'{c:+.1f}%':>8}"
+            else:
+                line += f" {'':>14} {'':>10} {'':>8}"
+        print(f"{line}  {row['status']}")
+
+    regressions = [r["case"] for r in rows if r["status"] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
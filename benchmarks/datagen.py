@@ -0,0 +1,380 @@
+"""
+Sinh dữ liệu giả lập có thể lặp lại (cùng seed + cùng tham số -> cùng dữ liệu) và nạp hàng loạt
+vào 1 database MySQL riêng cho benchmark.
+
+    python -m benchmarks.datagen --database employee_manager_bench --scale s
+    python -m benchmarks.datagen --database employee_manager_bench --employees 50000 --months 24
+
+Database đích phải có sẵn schema (01, 03, 04, 05 trong app/db), xem mục Benchmarks trong README.
+Các bảng bị TRUNCATE trước khi nạp.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.models.config.database import DatabaseConnection
+from app.models.utils.helpers import month_number_to_name, remove_accents
+
+# Số nhân viên theo mức scale
+SCALES = {
+    "xs": 1_000,
+    "s": 10_000,
+    "m": 100_000,
+    "l": 500_000,
+}
+
+DEFAULT_SEED = 161
+DEFAULT_MONTHS = 12             # số tháng lịch sử thưởng/phạt + lương
+DEFAULT_ATTENDANCE_MONTHS = 3   # chấm công chỉ cho vài tháng gần nhất (22 dòng / người / tháng)
+LOAD_BATCH_SIZE = 2000
+
+# Thứ tự TRUNCATE (bảng con trước)
+TABLES = (
+    "bonus_deduction_log", "payroll_monthly_rollup", "salary_payments", "bonus_deductions",
+    "attendance", "assignments", "projects", "employees", "departments",
+)
+
+DEPARTMENTS = [
+    ("Human Resources", "Hà Nội HQ"),
+    ("Finance", "Hà Nội HQ"),
+    ("IT", "Hà Nội HQ"),
+    ("Sales", "Ho Chi Minh City"),
+    ("Research and Development", "Hà Nội HQ"),
+    ("Marketing", "Ho Chi Minh City"),
+    ("Legal", "Hà Nội HQ"),
+]
+LOCATIONS = ["Hà Nội HQ", "Ho Chi Minh City", "Đà Nẵng", "Hải Phòng", "Cần Thơ"]
+
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng",
+                "Bùi", "Đỗ", "Hồ", "Ngô", "Dương", "Lý", "Mai", "Tô", "Đinh", "Trịnh"]
+MIDDLE_NAMES = ["Văn", "Thị", "Hữu", "Đức", "Minh", "Ngọc", "Thanh", "Quang", "Thu", "Hoài",
+                "Gia", "Đình", "Tuấn", "Bảo", "Hải", "Xuân", "Kim", "Trọng", ""]
+GIVEN_NAMES = ["An", "Anh", "Ân", "Bình", "Châu", "Chi", "Dũng", "Dương", "Đăng", "Đạt",
+               "Giang", "Hà", "Hải", "Hạnh", "Hiếu", "Hoa", "Hùng", "Huy", "Khánh", "Lan",
+               "Linh", "Long", "Mai", "Minh", "Nam", "Ngân", "Nhung", "Phong", "Phúc", "Quân",
+               "Quỳnh", "Sơn", "Tâm", "Thảo", "Thành", "Trang", "Trung", "Tú", "Vy", "Yến"]
+CITIES = ["Hà Nội", "Ho Chi Minh City", "Đà Nẵng", "Hải Phòng", "Cần Thơ", "Huế", "Nha Trang"]
+
+# (chức vụ, lương thấp, lương cao) - lương lưu theo đơn vị trong DB như 02_seed.sql
+POSITIONS = [
+    ("Intern", 400, 600), ("Staff", 900, 1400), ("Specialist", 1200, 1800),
+    ("Senior Specialist", 1600, 2400), ("Team Lead", 2000, 3000), ("Manager", 2500, 4000),
+]
+POSITION_WEIGHTS = [8, 35, 30, 15, 8, 4]
+ROLES = ["Developer", "Analyst", "Tester", "Coordinator", "Consultant", "Project Manager"]
+PROJECT_WORDS = ["System", "Platform", "Campaign", "Audit", "Upgrade", "Research", "Portal", "Migration"]
+BONUS_REASONS = ["Performance bonus", "Project milestone", "Overtime", "Referral bonus", "Sales target"]
+DEDUCTION_REASONS = ["Late penalty", "Unpaid leave", "Lost equipment", "Policy violation"]
+
+
+def _rng(seed: int, table: str, key: int) -> random.Random:
+    # Mỗi (bảng, nhân viên) có RNG riêng: bảng lương sinh lại được đúng thưởng/phạt đã nạp
+    return random.Random(f"{seed}:{table}:{key}")
+
+
+def _month_starts(end: date, months: int) -> List[date]:
+    """Ngày đầu của `months` tháng, kết thúc ở tháng chứa `end`"""
+    y, m = end.year, end.month
+    starts = []
+    for _ in range(months):
+        starts.append(date(y, m, 1))
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return starts[::-1]
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+class Dataset:
+    """Tham số của 1 bộ dữ liệu; các hàm *_rows() sinh tuple theo đúng thứ tự cột INSERT"""
+
+    def __init__(self, employees: int, seed: int = DEFAULT_SEED, months: int = DEFAULT_MONTHS,
+                 attendance_months: int = DEFAULT_ATTENDANCE_MONTHS, end: Optional[date] = None):
+        if employees < 1:
+            raise ValueError("employees must be at least 1")
+        self.employees = employees
+        self.seed = seed
+        # Tháng cuối là tháng trước tháng hiện tại: mọi ngày đều đã qua, không vướng check "future date"
+        self.end = end or (date.today().replace(day=1) - timedelta(days=1))
+        self.months = _month_starts(self.end, months)
+        self.attendance_months = self.months[-min(attendance_months, months):] if attendance_months else []
+        self.departments = max(len(DEPARTMENTS), employees // 2000)
+        self.projects = max(10, employees // 25)
+
+    def _employee_basics(self, emp_id: int):
+        """Phòng ban, chức vụ, lương, ngày vào làm (dùng lại ở nhiều bảng)"""
+        rng = _rng(self.seed, "employees", emp_id)
+        dept_id = rng.randint(1, self.departments)
+        position, low, high = rng.choices(POSITIONS, POSITION_WEIGHTS)[0]
+        salary = rng.randint(low // 10, high // 10) * 10
+        hire_date = min(self.months[0] - timedelta(days=rng.randint(-60, 8 * 365)), self.end)
+        return rng, dept_id, position, salary, hire_date
+
+    # -------------------- Từng bảng --------------------
+    def department_rows(self) -> Iterator[tuple]:
+        for dept_id in range(1, self.departments + 1):
+            if dept_id <= len(DEPARTMENTS):
+                name, location = DEPARTMENTS[dept_id - 1]
+            else:
+                name = f"Division {dept_id}"
+                location = LOCATIONS[dept_id % len(LOCATIONS)]
+            yield (dept_id, name, location)
+
+    def employee_rows(self) -> Iterator[tuple]:
+        for emp_id in range(1, self.employees + 1):
+            rng, dept_id, position, salary, hire_date = self._employee_basics(emp_id)
+            parts = [rng.choice(FAMILY_NAMES), rng.choice(MIDDLE_NAMES), rng.choice(GIVEN_NAMES)]
+            full_name = " ".join(p for p in parts if p)
+            gender = "F" if parts[1] == "Thị" else rng.choice("MF")
+            email = f"{remove_accents(full_name).lower().replace(' ', '')}{emp_id}@161Corp.com"
+            dob = date(rng.randint(1965, 2003), rng.randint(1, 12), rng.randint(1, 28))
+            yield (emp_id, full_name, gender, dob, f"09{emp_id:08d}", email, rng.choice(CITIES),
+                   hire_date, dept_id, position, salary)
+
+    def project_rows(self) -> Iterator[tuple]:
+        for project_id in range(1, self.projects + 1):
+            rng = _rng(self.seed, "projects", project_id)
+            start = self.months[0] - timedelta(days=rng.randint(0, 2 * 365))
+            end = start + timedelta(days=rng.randint(60, 720)) if rng.random() < 0.4 else None
+            name = f"{rng.choice(PROJECT_WORDS)} {rng.choice(PROJECT_WORDS)} #{project_id}"
+            budget = rng.randint(10, 300) * 1000
+            yield (project_id, name, start, end, budget, rng.randint(1, self.departments))
+
+    def assignment_rows(self) -> Iterator[tuple]:
+        for emp_id in range(1, self.employees + 1):
+            rng = _rng(self.seed, "assignments", emp_id)
+            count = rng.choices([0, 1, 2, 3], [20, 45, 25, 10])[0]
+            for project_id in sorted(rng.sample(range(1, self.projects + 1), count)):
+                yield (emp_id, project_id, rng.choice(ROLES), self.months[0],
+                       round(rng.uniform(0, 400), 2))
+
+    def attendance_rows(self) -> Iterator[tuple]:
+        days = []
+        for start in self.attendance_months:
+            d, stop = start, _next_month(start)
+            while d < stop:
+                if d.weekday() < 5:
+                    days.append(d)
+                d += timedelta(days=1)
+
+        for emp_id in range(1, self.employees + 1):
+            hire_date = self._employee_basics(emp_id)[4]
+            rng = _rng(self.seed, "attendance", emp_id)
+            for d in days:
+                if d < hire_date:
+                    continue
+                status = rng.choices(("Present", "Absent", "On Leave"), (92, 4, 4))[0]
+                if status == "Present":
+                    check_in = dtime(8, rng.randint(0, 59))
+                    check_out = dtime(rng.randint(17, 18), rng.randint(0, 59))
+                    yield (emp_id, d, check_in, check_out, status)
+                else:
+                    yield (emp_id, d, None, None, status)
+
+    def _bonus_for(self, emp_id: int) -> List[tuple]:
+        rng = _rng(self.seed, "bonus_deductions", emp_id)
+        rows = []
+        for start in self.months:
+            for _ in range(rng.choices([0, 1, 2], [60, 30, 10])[0]):
+                if rng.random() < 0.6:
+                    bd_type, reason, amount = "Bonus", rng.choice(BONUS_REASONS), rng.randint(5, 100) * 10
+                else:
+                    bd_type, reason, amount = "Deduction", rng.choice(DEDUCTION_REASONS), rng.randint(2, 30) * 10
+                rows.append((emp_id, reason, bd_type, amount, start + timedelta(days=rng.randint(0, 27))))
+        return rows
+
+    def bonus_rows(self) -> Iterator[tuple]:
+        for emp_id in range(1, self.employees + 1):
+            yield from self._bonus_for(emp_id)
+
+    def salary_rows(self) -> Iterator[tuple]:
+        # Tháng cuối để trống (chưa chốt) cho benchmark close_payroll_month
+        closed = self.months[:-1]
+        for emp_id in range(1, self.employees + 1):
+            _, _, _, salary, hire_date = self._employee_basics(emp_id)
+            net = {}
+            for _, _, bd_type, amount, eff in self._bonus_for(emp_id):
+                key = (eff.year, eff.month)
+                net[key] = net.get(key, 0) + (amount if bd_type == "Bonus" else -amount)
+            rng = _rng(self.seed, "salary_payments", emp_id)
+            for start in closed:
+                if _next_month(start) <= hire_date:
+                    continue
+                total = salary + net.get((start.year, start.month), 0)
+                if total <= 0:
+                    continue
+                status = rng.choices(("Paid", "Pending", "Unpaid"), (85, 10, 5))[0]
+                yield (emp_id, _next_month(start) + timedelta(days=4),
+                       month_number_to_name(start.month), start.year, total, status)
+
+
+# (bảng, câu INSERT, hàm sinh dòng)
+_LOADS = [
+    ("departments", "INSERT INTO departments (department_id, department_name, location) VALUES (%s, %s, %s)",
+     Dataset.department_rows),
+    ("employees", """INSERT INTO employees (employee_id, full_name, gender, date_of_birth, phone_number, email,
+                     address, hire_date, department_id, position, base_salary)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+     Dataset.employee_rows),
+    ("projects", """INSERT INTO projects (project_id, project_name, start_date, end_date, budget, department_id)
+                    VALUES (%s, %s, %s, %s, %s, %s)""",
+     Dataset.project_rows),
+    ("assignments", """INSERT INTO assignments (employee_id, project_id, role, assigned_date, hours_worked)
+                       VALUES (%s, %s, %s, %s, %s)""",
+     Dataset.assignment_rows),
+    ("attendance", """INSERT INTO attendance (employee_id, work_date, check_in, check_out, status)
+                      VALUES (%s, %s, %s, %s, %s)""",
+     Dataset.attendance_rows),
+    ("bonus_deductions", """INSERT INTO bonus_deductions (employee_id, description, bd_type, amount, effective_date)
+                            VALUES (%s, %s, %s, %s, %s)""",
+     Dataset.bonus_rows),
+    ("salary_payments", """INSERT INTO salary_payments (employee_id, payment_date, salary_month, year,
+                           total_amount, payment_status)
+                           VALUES (%s, %s, %s, %s, %s, %s)""",
+     Dataset.salary_rows),
+]
+
+
+def load(dataset: Dataset, batch_size: int = LOAD_BATCH_SIZE,
+         on_progress: Optional[Callable[[str, int], None]] = None) -> Dict:
+    """
+    Xóa dữ liệu cũ rồi nạp dataset vào database đang cấu hình (DatabaseConnection.configure).
+    Mỗi batch là 1 INSERT nhiều dòng + commit. Trigger lương / log thưởng phạt vẫn chạy như thật.
+    Trả về {"tables": {bảng: {"rows", "seconds", "rows_per_sec"}}, "seconds": tổng}
+    """
+    conn = DatabaseConnection.get_connection()
+    cursor = conn.cursor()
+    report = {"tables": {}}
+    started = time.perf_counter()
+    try:
+        # Dữ liệu sinh ra đã đúng khóa ngoại / unique -> tắt kiểm tra để nạp nhanh hơn
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.execute("SET SESSION unique_checks = 0")
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+
+        for table, sql, rows_fn in _LOADS:
+            t0 = time.perf_counter()
+            count = 0
+            batch = []
+            for row in rows_fn(dataset):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    conn.commit()
+                    count += len(batch)
+                    batch = []
+                    if on_progress:
+                        on_progress(table, count)
+            if batch:
+                cursor.executemany(sql, batch)
+                conn.commit()
+                count += len(batch)
+            if on_progress:
+                on_progress(table, count)
+            seconds = time.perf_counter() - t0
+            report["tables"][table] = {
+                "rows": count,
+                "seconds": round(seconds, 3),
+                "rows_per_sec": round(count / seconds, 1) if seconds else None,
+            }
+
+        # Trưởng phòng = nhân viên có id nhỏ nhất của phòng
+        cursor.execute("""
+            UPDATE departments d
+            JOIN (SELECT department_id, MIN(employee_id) AS manager_id
+                  FROM employees GROUP BY department_id) m ON m.department_id = d.department_id
+            SET d.manager_id = m.manager_id
+        """)
+        # Nạp thẳng bằng SQL (không qua manager) -> tự tăng table_versions 1 lần để app đang mở tải lại
+        cursor.execute("UPDATE table_versions SET version = version + 1")
+        conn.commit()
+
+        for table in TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+    finally:
+        # Connection quay lại pool -> phải bật lại kiểm tra cho các lần mượn sau
+        try:
+            cursor.execute("SET SESSION foreign_key_checks = 1")
+            cursor.execute("SET SESSION unique_checks = 1")
+        except Exception:
+            pass
+        cursor.close()
+        conn.close()
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def add_dataset_args(parser: argparse.ArgumentParser):
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=SCALES, default="xs",
+                      help="; ".join(f"{k} = {v:,} employees" for k, v in SCALES.items()))
+    size.add_argument("--employees", type=int, help="exact number of employees (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--months", type=int, default=DEFAULT_MONTHS,
+                        help=f"months of bonus / salary history (default {DEFAULT_MONTHS})")
+    parser.add_argument("--attendance-months", type=int, default=DEFAULT_ATTENDANCE_MONTHS,
+                        help=f"months of daily attendance (default {DEFAULT_ATTENDANCE_MONTHS})")
+
+
+def add_connection_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--database", default="employee_manager_bench",
+                        help="target database (default employee_manager_bench)")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+
+
+def configure_connection(args):
+    overrides = {k: getattr(args, k) for k in ("database", "host", "port", "user", "password")
+                 if getattr(args, k) is not None}
+    DatabaseConnection.configure(**overrides)
+
+
+def dataset_from_args(args) -> Dataset:
+    return Dataset(args.employees or SCALES[args.scale], seed=args.seed,
+                   months=args.months, attendance_months=args.attendance_months)
+
+
+def guard_database(args, action: str = "wipe") -> bool:
+    """Không cho TRUNCATE / ghi vào database của ứng dụng nếu không có --force"""
+    if args.database == "employee_manager" and not args.force:
+        print(f"Refusing to {action} the application database 'employee_manager'; "
+              "use a separate --database or pass --force", file=sys.stderr)
+        return False
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate and bulk-load benchmark data")
+    add_dataset_args(parser)
+    add_connection_args(parser)
+    parser.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="allow loading into employee_manager")
+    args = parser.parse_args(argv)
+    if not guard_database(args):
+        return 2
+
+    configure_connection(args)
+    dataset = dataset_from_args(args)
+
+    def progress(table, rows):
+        print(f"\r  {table}: {rows:,} rows", end="", file=sys.stderr, flush=True)
+
+    report = load(dataset, args.batch_size, progress)
+    print(file=sys.stderr)
+    for table, t in report["tables"].items():
+        print(f"{table:<18} {t['rows']:>12,} rows  {t['seconds']:>9.1f}s  {t['rows_per_sec'] or 0:>12,.0f} rows/s")
+    print(f"Loaded in {report['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+"""
+Đo thời gian các hàm đọc / ghi của tầng manager trên database benchmark.
+
+    python -m benchmarks.run --database employee_manager_bench --load --scale s
+    python -m benchmarks.run --database employee_manager_bench --repeat 50 --only salary.
+    python -m benchmarks.compare results/before.json results/after.json
+
+Mỗi case chạy vài lần khởi động (không tính) rồi `--repeat` lần, tham số ngẫu nhiên theo seed.
+Kết quả: p50 / p95 / p99 / mean (ms) và số dòng / giây, ghi ra file JSON.
+Query cache bị tắt để đo đúng thời gian truy vấn DB.
+Các case ghi sửa dữ liệu; muốn so sánh 2 lần chạy thì nạp lại dữ liệu (--load) trước mỗi lần.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from app.models.config.database import DatabaseConnection
+from app.models.utils.cache import query_cache
+from app.models.utils.helpers import month_number_to_name, month_name_to_number
+from app.models.manager.employee import EmployeeManager
+from app.models.manager.department import DepartmentManager
+from app.models.manager.project import ProjectManager
+from app.models.manager.assignment import AssignmentManager
+from app.models.manager.attendance import AttendanceManager
+from app.models.manager.salary import SalaryManager
+from app.models.manager.bonus_deduction import BonusDeductionManager
+from app.models.manager.query import QueryManager, REPORT_QUERIES
+from app.models.manager.dashboard import DashboardManager
+from app.models.manager.versions import VersionManager
+
+from benchmarks import datagen
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class Case:
+    """
+    1 phép đo: fn(*args) với args = make_args(rng, ctx).
+    repeat = None -> dùng --repeat; các case tốn kém / không lặp lại được thì đặt cố định.
+    """
+
+    def __init__(self, name: str, kind: str, fn: Callable, make_args: Callable = None,
+                 repeat: Optional[int] = None, warmup: Optional[int] = None):
+        self.name = name
+        self.kind = kind            # "read" / "write"
+        self.fn = fn
+        self.make_args = make_args or (lambda rng, ctx: ())
+        self.repeat = repeat
+        self.warmup = warmup
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentile nội suy tuyến tính (giống numpy mặc định)"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def count_rows(result) -> int:
+    """Số dòng 1 lần gọi trả về / xử lý, để tính rows/s"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        for key in ("rows", "imported", "inserted"):
+            value = result.get(key)
+            if isinstance(value, list):
+                return len(value)
+            if isinstance(value, int):
+                return value
+        return 1
+    return 0 if result is None else 1
+
+
+# -------------------- Ngữ cảnh dữ liệu --------------------
+def build_context() -> Dict:
+    """Đọc phạm vi id / kỳ lương / tên mẫu từ database để sinh tham số cho các case"""
+    conn = DatabaseConnection.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        ctx = {}
+        for table, key in (("employees", "employee_id"), ("projects", "project_id"),
+                           ("departments", "department_id")):
+            cursor.execute(f"SELECT MIN({key}) AS lo, MAX({key}) AS hi, COUNT(*) AS n FROM {table}")
+            row = cursor.fetchone()
+            if not row["n"]:
+                raise SystemExit(f"Table {table} is empty; load data first (--load)")
+            ctx[table] = (row["lo"], row["hi"], row["n"])
+
+        cursor.execute("SELECT MIN(period_key) AS lo, MAX(period_key) AS hi FROM salary_payments")
+        row = cursor.fetchone()
+        ctx["periods"] = _periods(row["lo"], row["hi"]) if row["lo"] else []
+        cursor.execute("SELECT MAX(work_date) AS last_day FROM attendance")
+        ctx["last_attendance"] = cursor.fetchone()["last_day"] or date.today() - timedelta(days=1)
+
+        # Tên mẫu cho case tìm kiếm (mỗi dòng cách nhau đều trong bảng)
+        lo, hi, n = ctx["employees"]
+        step = max(1, n // 200)
+        cursor.execute("SELECT full_name FROM employees WHERE MOD(employee_id, %s) = 0 LIMIT 200", (step,))
+        names = [r["full_name"] for r in cursor.fetchall()] or ["Nguyễn"]
+        ctx["search_terms"] = sorted({part for name in names for part in name.split()})
+
+        cursor.execute("SELECT VERSION() AS v")
+        ctx["mysql_version"] = cursor.fetchone()["v"]
+        ctx["run_tag"] = f"{int(time.time()) % 100000:05d}"
+        ctx["counter"] = 0
+        ctx["created_bd"] = []
+        return ctx
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _periods(lo: int, hi: int) -> List[tuple]:
+    """[(month_name, year), ...] từ period_key lo -> hi"""
+    out = []
+    y, m = divmod(lo, 100)
+    while y * 100 + m <= hi:
+        out.append((month_number_to_name(m), y))
+        y, m = (y, m + 1) if m < 12 else (y + 1, 1)
+    return out
+
+
+def _emp(rng, ctx):
+    lo, hi, _ = ctx["employees"]
+    return rng.randint(lo, hi)
+
+
+def _period(rng, ctx):
+    return rng.choice(ctx["periods"]) if ctx["periods"] else (month_number_to_name(1), date.today().year)
+
+
+def _next(ctx) -> int:
+    ctx["counter"] += 1
+    return ctx["counter"]
+
+
+# -------------------- Case --------------------
+def _new_employee_args(rng, ctx):
+    n = _next(ctx)
+    tag = f"{ctx['run_tag']}{n:03d}"
+    lo, hi, _ = ctx["departments"]
+    return (f"Bench Employee {tag}", "M", date(1990, 1, 1), f"08{tag[-8:]:0>8}",
+            f"bench{tag}@161Corp.com", "Hà Nội", date(2024, 1, 1),
+            rng.randint(lo, hi), "Staff", 1000)
+
+
+def _update_employee_args(rng, ctx):
+    e = EmployeeManager.get_employee_by_id(_emp(rng, ctx))
+    return (e["employee_id"], e["full_name"], e["phone_number"], e["email"],
+            e.get("address") or "", e.get("position") or "", float(e["base_salary"]) + 10)
+
+
+def _attendance_args(rng, ctx):
+    d = ctx["last_attendance"] - timedelta(days=rng.randint(0, 60))
+    return (_emp(rng, ctx), d, dtime(8, 30), dtime(17, 30), "Present")
+
+
+def _import_args(rng, ctx, size=1000):
+    last = ctx["last_attendance"]
+    records = [{
+        "employee_id": _emp(rng, ctx),
+        "work_date": last - timedelta(days=rng.randint(0, 90)),
+        "check_in": "08:15", "check_out": "17:45", "status": "Present",
+    } for _ in range(size)]
+    return (records,)
+
+
+def _bd_create_args(rng, ctx):
+    month, year = _period(rng, ctx)
+    return (_emp(rng, ctx), rng.choice(("Bonus", "Deduction")), 50, "Benchmark",
+            date(year, month_name_to_number(month), 10))
+
+
+def _keyset_deep(rng, ctx):
+    # Trang "sâu": con trỏ ở giữa bảng (keyset không phải quét lại các trang trước)
+    emp_id = _emp(rng, ctx)
+    return ((emp_id, emp_id), 15)
+
+
+def build_cases(ctx: Dict, export_dir: str) -> List[Case]:
+    # update / delete dùng lại các dòng thưởng/phạt mà case create vừa tạo
+    def remember_bd(*args):
+        result = BonusDeductionManager.create_bonus_deduction(*args)
+        ctx["created_bd"].append(result["bd_id"])
+        return result
+
+    def pop_bd(rng, c):
+        return (c["created_bd"].pop(),) if c["created_bd"] else None
+
+    def some_bd(rng, c):
+        return (rng.choice(c["created_bd"]), "Benchmark (edited)", 60) if c["created_bd"] else None
+
+    open_month = ctx["periods"][-1] if ctx["periods"] else None
+    if open_month:
+        # Tháng ngay sau kỳ lương cuối đã chốt = tháng datagen để trống
+        m, y = month_name_to_number(open_month[0]), open_month[1]
+        open_month = (month_number_to_name(m % 12 + 1), y + (m == 12))
+
+    cases = [
+        # ---- Employee ----
+        Case("employee.get_employees_after.first", "read", EmployeeManager.get_employees_after),
+        Case("employee.get_employees_after.deep", "read", EmployeeManager.get_employees_after, _keyset_deep),
+        Case("employee.get_employees_after.by_name", "read",
+             lambda: EmployeeManager.get_employees_after(None, 15, "full_name", "ASC")),
+        Case("employee.get_employee_by_id", "read", EmployeeManager.get_employee_by_id,
+             lambda r, c: (_emp(r, c),)),
+        Case("employee.search_employees_page", "read", EmployeeManager.search_employees_page,
+             lambda r, c: (r.choice(c["search_terms"]),)),
+        Case("employee.get_directory_rows", "read", EmployeeManager.get_directory_rows, repeat=5),
+        # ---- Department / project / assignment ----
+        Case("department.get_all_departments", "read", DepartmentManager.get_all_departments),
+        Case("project.get_all_projects", "read", ProjectManager.get_all_projects),
+        Case("assignment.get_assignments_by_employee", "read", AssignmentManager.get_assignments_by_employee,
+             lambda r, c: (_emp(r, c),)),
+        Case("assignment.get_assignments_by_project", "read", AssignmentManager.get_assignments_by_project,
+             lambda r, c: (r.randint(*c["projects"][:2]),)),
+        # ---- Attendance ----
+        Case("attendance.get_attendance_by_employee", "read", AttendanceManager.get_attendance_by_employee,
+             lambda r, c: (_emp(r, c), c["last_attendance"].month, c["last_attendance"].year)),
+        Case("attendance.get_monthly_attendance_summary", "read",
+             AttendanceManager.get_monthly_attendance_summary,
+             lambda r, c: (c["last_attendance"].month, c["last_attendance"].year), repeat=5),
+        # ---- Salary / bonus ----
+        Case("salary.calculate_salary", "read", SalaryManager.calculate_salary,
+             lambda r, c: (_emp(r, c), *_period(r, c))),
+        Case("salary.get_salary_by_employee", "read", SalaryManager.get_salary_by_employee,
+             lambda r, c: (_emp(r, c),)),
+        Case("salary.get_salary_after", "read", SalaryManager.get_salary_after,
+             lambda r, c: (*_period(r, c), None, 15)),
+        Case("salary.get_payroll_trend", "read", SalaryManager.get_payroll_trend,
+             lambda r, c: (*c["periods"][0], *c["periods"][-1]) if c["periods"] else None, repeat=5),
+        Case("bonus.get_bonus_deduction_by_employee", "read",
+             BonusDeductionManager.get_bonus_deduction_by_employee, lambda r, c: (_emp(r, c),)),
+        # ---- Report / dashboard ----
+        *[Case(f"query.{name}", "read", getattr(QueryManager, method), repeat=3)
+          for name, method in (("query1", "query_employee_project_roles"),
+                               ("query2", "query_all_employees_with_roles"),
+                               ("query3", "query_employee_project_manager"),
+                               ("query4", "query_above_average_salary"))],
+        *[Case(f"query.export_report_csv.{report}", "read", QueryManager.export_report_csv,
+               lambda r, c, report=report: (report, os.path.join(export_dir, f"{report}.csv")), repeat=3)
+          for report in REPORT_QUERIES],
+        Case("dashboard.get_dashboard_stats", "read", DashboardManager.get_dashboard_stats, repeat=5),
+        Case("versions.get_versions", "read", VersionManager.get_versions),
+        # ---- Ghi ----
+        Case("employee.create_employee", "write", EmployeeManager.create_employee, _new_employee_args),
+        Case("employee.update_employee", "write", EmployeeManager.update_employee, _update_employee_args),
+        Case("attendance.mark_attendance", "write", AttendanceManager.mark_attendance, _attendance_args),
+        Case("attendance.bulk_import_attendance", "write", AttendanceManager.bulk_import_attendance,
+             _import_args, repeat=5, warmup=1),
+        Case("bonus.create_bonus_deduction", "write", remember_bd, _bd_create_args),
+        Case("bonus.update_bonus_deduction", "write", BonusDeductionManager.update_bonus_deduction, some_bd),
+        Case("bonus.delete_bonus_deduction", "write", BonusDeductionManager.delete_bonus_deduction, pop_bd),
+        Case("salary.rebuild_payroll_rollup", "write", SalaryManager.rebuild_payroll_rollup, repeat=3, warmup=0),
+    ]
+    if open_month:
+        # Chỉ chốt được 1 lần cho mỗi bộ dữ liệu
+        cases.append(Case("salary.close_payroll_month", "write", SalaryManager.close_payroll_month,
+                          lambda r, c: open_month, repeat=1, warmup=0))
+    return cases
+
+
+# -------------------- Chạy --------------------
+def run_case(case: Case, rng: random.Random, ctx: Dict, repeat: int, warmup: int) -> Optional[Dict]:
+    repeat = case.repeat if case.repeat is not None else repeat
+    warmup = case.warmup if case.warmup is not None else min(warmup, repeat)
+    timings, rows = [], 0
+    for i in range(warmup + repeat):
+        args = case.make_args(rng, ctx)
+        if args is None:
+            return None                 # không đủ dữ liệu cho case này
+        start = time.perf_counter()
+        result = case.fn(*args)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+            rows += count_rows(result)
+
+    timings.sort()
+    total = sum(timings)
+    ms = [t * 1000 for t in timings]
+    return {
+        "kind": case.kind,
+        "n": len(timings),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(total * 1000 / len(timings), 3),
+        "min_ms": round(ms[0], 3),
+        "max_ms": round(ms[-1], 3),
+        "rows": rows,
+        "rows_per_sec": round(rows / total, 1) if total else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _table_counts() -> Dict[str, int]:
+    conn = DatabaseConnection.get_connection()
+    cursor = conn.cursor()
+    try:
+        counts = {}
+        for table in datagen.TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0]
+        return counts
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark manager read/write paths")
+    datagen.add_connection_args(parser)
+    datagen.add_dataset_args(parser)
+    parser.add_argument("--load", action="store_true", help="generate and load data before running")
+    parser.add_argument("--force", action="store_true",
+                        help="allow --load or write cases against employee_manager")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--only", action="append", default=[],
+                        help="run cases whose name contains this text (repeatable)")
+    parser.add_argument("--reads-only", action="store_true", help="skip cases that modify data")
+    parser.add_argument("--output", help=f"JSON result file (default {RESULTS_DIR}/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    datagen.configure_connection(args)
+    query_cache.enabled = False
+
+    load_report = None
+    if args.load:
+        if not datagen.guard_database(args):
+            return 2
+        dataset = datagen.dataset_from_args(args)
+        print(f"Loading {dataset.employees:,} employees (seed {args.seed})...", file=sys.stderr)
+        load_report = datagen.load(dataset)
+
+    ctx = build_context()
+    export_dir = tempfile.mkdtemp(prefix="eim_bench_")
+    cases = build_cases(ctx, export_dir)
+    if args.only:
+        cases = [c for c in cases if any(o in c.name for o in args.only)]
+    if args.reads_only:
+        cases = [c for c in cases if c.kind == "read"]
+    # Case ghi thêm / sửa / xóa dữ liệu thật (nhân viên, chấm công, chốt lương)
+    if any(c.kind != "read" for c in cases) and not datagen.guard_database(args, "run write cases against"):
+        return 2
+
+    results = {}
+    print(f"{'case':<46} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rows/s':>12}")
+    for case in cases:
+        # RNG riêng cho mỗi case: thêm / bớt case không làm đổi tham số của case khác
+        case_rng = random.Random(f"{args.seed}:{case.name}")
+        try:
+            r = run_case(case, case_rng, ctx, args.repeat, args.warmup)
+        except Exception as e:
+            print(f"{case.name:<46} ERROR {e}")
+            results[case.name] = {"kind": case.kind, "error": str(e)}
+            continue
+        if r is None:
+            print(f"{case.name:<46} skipped (no data)")
+            continue
+        results[case.name] = r
+        print(f"{case.name:<46} {r['n']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+              f"{r['rows_per_sec'] or 0:>12,.0f}")
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mysql_version": ctx["mysql_version"],
+        "database": args.database,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "table_counts": _table_counts(),
+        "load": load_report,
+        "pool": DatabaseConnection.pool_stats(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    print(f"Results written to {output}")
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
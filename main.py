@@ -1,3 +1,8 @@
+import time
+_T0 = time.perf_counter()  # mốc đo thời gian khởi động
+
+import importlib
+import os
 import tkinter as tk
 from tkinter import ttk
 import ttkbootstrap as ttk
@@ -11,18 +16,30 @@ from app.models.manager.attendance import AttendanceManager
 from app.models.manager.salary import SalaryManager
 from app.models.manager.bonus_deduction import BonusDeductionManager
 from app.models.manager.query import QueryManager
- 
-
-from app.ui.employee_screen import EmployeeScreen
-from app.ui.department_screen import DepartmentScreen
-from app.ui.project_screen import ProjectScreen
-from app.ui.attendance_screen import AttendanceScreen
-from app.ui.salary_screen import SalaryScreen
-from app.ui.queries_screen import QueriesScreen
-from app.ui.dashboard import Dashboard 
-
-import mysql.connector
-import random
+from app.models.manager.dashboard import DashboardManager
+from app.models.manager.versions import VersionManager
+from app.models.utils.cache import query_cache
+from app.ui.async_loader import get_loader
+from app.ui.stall_detector import StallDetector
+
+_T_IMPORTS = time.perf_counter()
+
+# Screen chỉ được import + khởi tạo ở lần show() đầu tiên.
+# (Dashboard kéo theo Matplotlib nên không import lúc khởi động)
+SCREENS = {
+    "dashboard": ("app.ui.dashboard", "Dashboard"),
+    "employee": ("app.ui.employee_screen", "EmployeeScreen"),
+    "department": ("app.ui.department_screen", "DepartmentScreen"),
+    "project": ("app.ui.project_screen", "ProjectScreen"),
+    "attendance": ("app.ui.attendance_screen", "AttendanceScreen"),
+    "salary": ("app.ui.salary_screen", "SalaryScreen"),
+    "queries": ("app.ui.queries_screen", "QueriesScreen"),
+    # Màn hình ẩn: Ctrl+Shift+D, hoặc hiện trên menu khi đặt EIM_DIAGNOSTICS=1
+    "diagnostics": ("app.ui.diagnostics_screen", "DiagnosticsScreen"),
+}
+
+# Chu kỳ đọc table_versions để tự tải lại khi dữ liệu bị sửa (kể cả từ máy khác); 0 = tắt
+VERSION_POLL_MS = int(os.environ.get("EIM_POLL_MS", 5000))
 
 class App(ttk.Window):
     def __init__(self):
@@ -30,19 +47,16 @@ class App(ttk.Window):
         super().__init__(themename="litera")
 
         style = ttk.Style()
-        style.configure("Treeview", 
-                        font=("Segoe UI", 11), 
+        style.configure("Treeview",
+                        font=("Segoe UI", 11),
                         rowheight=53)
-        
-        style.configure("Treeview.Heading", 
+
+        style.configure("Treeview.Heading",
                         font=("Segoe UI", 12, "bold"))
 
         self.title("Employee Information Manager - 161Corp")
         self.geometry("1280x800")
 
-        
-
-        # 7 managers
         self.managers = {
             "employee": EmployeeManager(),
             "department": DepartmentManager(),
@@ -52,6 +66,7 @@ class App(ttk.Window):
             "salary": SalaryManager(),
             "bonus_deduction": BonusDeductionManager(),
             "query": QueryManager(),
+            "dashboard": DashboardManager(),
         }
 
         self._build_menu()
@@ -59,9 +74,24 @@ class App(ttk.Window):
         self.container.pack(fill="both", expand=True)
 
         self.screens = {}
-        self._init_screens()
+        self.current_screen = None
+        self._seen_versions = {}    # screen -> query_cache.versions(TABLES) lúc rời màn hình
+        self._poll_failed = False
+        self.loader = get_loader(self)
+        self.startup_report = {
+            "imports_ms": (_T_IMPORTS - _T0) * 1000,
+            "screens_ms": {},
+        }
 
         self.show("dashboard")
+        self.after_idle(self._report_startup)
+
+        # Ghi lại các lần UI bị đơ (stack + màn hình đang mở) vào logs/ui_stalls.log
+        self.stall_detector = StallDetector(self, screen_name=lambda: self.current_screen)
+        self.stall_detector.start()
+
+        if VERSION_POLL_MS > 0:
+            self.after(VERSION_POLL_MS, self._poll_versions)
 
     def _build_menu(self):
         menubar = tk.Menu(self)
@@ -77,29 +107,74 @@ class App(ttk.Window):
         add("Attendance", "attendance")
         add("Salary", "salary")
         add("Queries", "queries")
+        if os.environ.get("EIM_DIAGNOSTICS"):
+            add("Diagnostics", "diagnostics")
+        self.bind_all("<Control-Shift-D>", lambda e: self.show("diagnostics"))
 
-    def _init_screens(self):
-        
-        
-        self.screens["dashboard"] = Dashboard(self.container, self.managers) 
-
-
-        self.screens["employee"] = EmployeeScreen(self.container, self.managers)
-        self.screens["department"] = DepartmentScreen(self.container, self.managers)
-        self.screens["project"] = ProjectScreen(self.container, self.managers)
-        self.screens["attendance"] = AttendanceScreen(self.container, self.managers)
-        self.screens["salary"] = SalaryScreen(self.container, self.managers)
-        self.screens["queries"] = QueriesScreen(self.container, self.managers)
-
-        for f in self.screens.values():
-            f.place(relx=0, rely=0, relwidth=1, relheight=1)
+    def _get_screen(self, key: str):
+        """Tạo screen ở lần đầu được mở"""
+        screen = self.screens.get(key)
+        if screen is None and key in SCREENS:
+            t = time.perf_counter()
+            module_name, class_name = SCREENS[key]
+            screen_cls = getattr(importlib.import_module(module_name), class_name)
+            screen = screen_cls(self.container, self.managers)
+            screen.place(relx=0, rely=0, relwidth=1, relheight=1)
+            self.screens[key] = screen
+            self.startup_report["screens_ms"][key] = (time.perf_counter() - t) * 1000
+        return screen
+
+    def _report_startup(self):
+        r = self.startup_report
+        r["window_ready_ms"] = (time.perf_counter() - _T0) * 1000
+        built = ", ".join(f"{k} {v:.0f}ms" for k, v in r["screens_ms"].items())
+        print(f"Startup: window ready in {r['window_ready_ms']:.0f}ms "
+              f"(imports {r['imports_ms']:.0f}ms; screens: {built})")
 
     def show(self, key: str):
-        screen = self.screens.get(key)
+        is_new = key not in self.screens
+        screen = self._get_screen(key)
         if screen:
+            self._remember_versions(self.current_screen)
             screen.tkraise()
-            if key == "dashboard" and hasattr(screen, "refresh_dashboard"):
-                screen.refresh_dashboard()
+            self.current_screen = key
+            # Screen mới tạo đã tự tải dữ liệu trong __init__;
+            # screen cũ chỉ tải lại khi bảng nó đọc đã bị ghi từ lúc rời màn hình
+            tables = getattr(screen, "TABLES", None)
+            if not is_new and tables and query_cache.versions(tables) != self._seen_versions.get(key):
+                screen.refresh()
+
+    # -------------------- Theo dõi thay đổi dữ liệu --------------------
+    def _remember_versions(self, key):
+        tables = getattr(self.screens.get(key), "TABLES", None)
+        if tables:
+            self._seen_versions[key] = query_cache.versions(tables)
+
+    def _poll_versions(self):
+        """Đọc table_versions ở background; bảng nào đổi thì cache tự invalidate"""
+        self.loader.submit(
+            "table_versions", self._check_versions,
+            on_success=self._on_tables_changed,
+            on_error=self._on_poll_error,
+            on_done=lambda: self.after(VERSION_POLL_MS, self._poll_versions)
+        )
+
+    @staticmethod
+    def _check_versions():
+        return query_cache.sync(VersionManager.get_versions())
+
+    def _on_tables_changed(self, changed):
+        self._poll_failed = False
+        screen = self.screens.get(self.current_screen)
+        tables = getattr(screen, "TABLES", None)
+        # Màn hình đang mở tự tải lại; màn hình khác tải lại khi được show()
+        if changed and tables and set(tables) & set(changed):
+            screen.refresh()
+
+    def _on_poll_error(self, e):
+        if not self._poll_failed:
+            print(f"Change polling failed (run app/db/06_migrations.sql on older databases): {e}")
+        self._poll_failed = True
 
 if __name__ == "__main__":
-    App().mainloop()
\ No newline at end of file
+    App().mainloop()
@@ -0,0 +1,165 @@
+import importlib.util
+import inspect
+import os
+import re
+import unittest
+
+from app.models.utils.cache import QueryCache, query_cache, cached, invalidates
+from app.models.utils.instrumentation import Instrumentation
+
+DB_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "db")
+
+
+def _has_mysql_connector() -> bool:
+    try:
+        return importlib.util.find_spec("mysql.connector") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+class QueryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        query_cache.clear()
+        query_cache.enabled = True
+        self.calls = 0
+        # Import manager sẽ gắn VersionManager.bump_versions (cần DB) -> tạm bỏ khi test
+        self._write_listeners, query_cache._write_listeners = query_cache._write_listeners, []
+
+    def tearDown(self):
+        query_cache._write_listeners = self._write_listeners
+
+    def _reader(self, *tables):
+        def read(x):
+            self.calls += 1
+            return [{"x": x, "call": self.calls}]
+        read.__qualname__ = f"read_{'_'.join(tables)}"     # key cache theo tên hàm
+        return cached(*tables)(read)
+
+    def test_cached_returns_stored_result(self):
+        read = self._reader("employees")
+        self.assertEqual(read(1), read(1))
+        self.assertEqual(self.calls, 1)
+        read(2)
+        self.assertEqual(self.calls, 2)
+
+    def test_result_is_copied(self):
+        read = self._reader("employees")
+        read(1)[0]["x"] = "changed"
+        self.assertEqual(read(1)[0]["x"], 1)
+
+    def test_invalidates_clears_only_tagged_tables(self):
+        read_emp = self._reader("employees", "departments")
+        read_proj = self._reader("projects")
+
+        @invalidates("departments")
+        def write():
+            pass
+
+        read_emp(1)
+        read_proj(1)
+        write()
+        read_emp(1)
+        read_proj(1)
+        self.assertEqual(self.calls, 3)     # chỉ read_emp bị query lại
+
+    def test_invalidates_runs_even_when_write_fails(self):
+        read = self._reader("employees")
+
+        @invalidates("employees")
+        def write():
+            raise ValueError("boom")
+
+        read(1)
+        with self.assertRaises(ValueError):
+            write()
+        read(1)
+        self.assertEqual(self.calls, 2)
+
+    def test_result_not_stored_when_table_written_during_query(self):
+        cache = QueryCache()
+        versions = cache.versions(("employees",))
+        cache.invalidate("employees")
+        cache.put("key", 1, ("employees",), versions)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_sync_invalidates_tables_changed_in_db(self):
+        cache = QueryCache()
+        seen = []
+        cache.add_listener(seen.append)
+        self.assertEqual(cache.sync({"employees": 1, "projects": 1}), ())
+        self.assertEqual(cache.sync({"employees": 2, "projects": 1}), ("employees",))
+        self.assertEqual(seen, [("employees",)])
+        self.assertEqual(cache.versions(("employees", "projects")), (1, 0))
+
+    def test_write_listener_runs_once_per_write_not_on_sync(self):
+        cache = QueryCache()
+        writes = []
+        cache.add_write_listener(writes.append)
+        cache.add_write_listener(lambda tables: 1 / 0)     # lỗi listener không làm hỏng lệnh ghi
+        cache.notify_write(("attendance",))
+        cache.sync({"attendance": 1})
+        cache.sync({"attendance": 2})
+        self.assertEqual(writes, [("attendance",)])
+
+    def test_instrumentation_counts_only_real_cache_hits(self):
+        stats = Instrumentation(log_path=None)
+        read = stats.wrap("read", self._reader("employees"))
+
+        def broken():
+            raise ValueError("boom")
+        fail = stats.wrap("fail", broken)
+
+        read(1)                 # miss: không mở connection nhưng không phải hit
+        read(1)
+        with self.assertRaises(ValueError):
+            fail()
+        methods = stats.snapshot()["methods"]
+        self.assertEqual(methods["read"]["cache_hits"], 1)
+        self.assertEqual(methods["fail"]["cache_hits"], 0)
+
+
+@unittest.skipUnless(_has_mysql_connector(), "mysql-connector-python not installed")
+class ManagerCacheTagsTest(unittest.TestCase):
+    """Mỗi hàm @cached phải gắn tag mọi bảng mà SQL của nó đọc, nếu không ghi vào bảng đó sẽ không xóa cache"""
+
+    # Bảng được trigger dựng từ bảng khác: đọc bảng này cần tag ít nhất 1 bảng nguồn
+    DERIVED = {
+        "payroll_monthly_rollup": {"bonus_deductions", "salary_payments"},
+        "bonus_deduction_log": {"bonus_deductions"},
+    }
+    TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+([a-z_]+)")
+
+    @classmethod
+    def _view_tables(cls) -> dict:
+        with open(os.path.join(DB_DIR, "03_views.sql"), encoding="utf-8") as f:
+            sql = f.read()
+        views = {}
+        for name, body in re.findall(r"CREATE VIEW (\w+) AS(.*?);", sql, re.S):
+            views[name] = set(cls.TABLE_RE.findall(body))
+        return views
+
+    def test_cached_tags_cover_tables_read(self):
+        import app.models.manager as managers
+
+        views = self._view_tables()
+        problems = []
+        for cls_name in managers.__all__:
+            cls = getattr(managers, cls_name)
+            for name in vars(cls):
+                fn = getattr(cls, name)
+                tags = getattr(fn, "cache_tables", None)
+                if tags is None:
+                    continue
+                read = set()
+                for table in self.TABLE_RE.findall(inspect.getsource(inspect.unwrap(fn))):
+                    read |= views.get(table, {table})
+                for table in read:
+                    sources = self.DERIVED.get(table, {table})
+                    if not sources & set(tags):
+                        problems.append(f"{cls_name}.{name} reads {table} but is tagged {tags}")
+        self.assertEqual(problems, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
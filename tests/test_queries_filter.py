@@ -0,0 +1,62 @@
+import unittest
+from types import SimpleNamespace
+
+from app.ui.queries_screen import QueriesScreen
+
+
+class _Tree:
+    """Giả lập VirtualTreeview: giữ list được đưa vào và sort tại chỗ khi bấm header"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rows = []
+
+    def set_rows(self, rows, formatter=None):
+        self.rows = rows
+
+    def sort_by(self, column):
+        idx = self.columns.index(column)
+        self.rows.sort(key=lambda r: r[idx])
+
+
+class QueriesFilterTest(unittest.TestCase):
+
+    def _screen(self, rows):
+        screen = QueriesScreen.__new__(QueriesScreen)     # không cần Tk: chỉ test dữ liệu
+        screen.tree = _Tree(list(rows[0].keys()))
+        screen.search = SimpleNamespace(get=lambda: screen.text)
+        screen.text = ""
+        screen._filter_job = None
+        screen._raw = rows
+        screen._index = QueriesScreen._build_index(rows)
+        screen.render(rows)
+        return screen
+
+    def test_filter_after_sort_returns_matching_rows(self):
+        screen = self._screen([
+            {"employee_id": 1, "full_name": "Zed"},
+            {"employee_id": 2, "full_name": "Anh"},
+            {"employee_id": 3, "full_name": "Minh"},
+        ])
+        screen.tree.sort_by("full_name")
+        screen.text = "zed"
+        screen.apply_filter()
+        self.assertEqual(screen.tree.rows, [(1, "Zed")])
+
+        screen.tree.sort_by("full_name")
+        screen.text = ""
+        screen.apply_filter()
+        self.assertEqual(screen.tree.rows, [(1, "Zed"), (2, "Anh"), (3, "Minh")])
+
+    def test_column_filter_ignores_accents(self):
+        screen = self._screen([
+            {"employee_id": 1, "position": "Kế toán"},
+            {"employee_id": 2, "position": "Developer"},
+        ])
+        screen.text = "position:ke"
+        screen.apply_filter()
+        self.assertEqual(screen.tree.rows, [(1, "Kế toán")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from app.ui.widgets import _display_sort_key, _typed_sort_key
+
+
+class SortKeyTest(unittest.TestCase):
+
+    def test_display_numbers_and_money(self):
+        self.assertEqual(_display_sort_key("15,000,000 VND"), (1, 15000000.0))
+        self.assertEqual(_display_sort_key("-1.5"), (1, -1.5))
+
+    def test_display_separators_without_digits_are_text(self):
+        for text in (",", "-,", ",,, VND"):
+            self.assertEqual(_display_sort_key(text)[0], 3)
+
+    def test_display_dates_and_times(self):
+        self.assertLess(_display_sort_key("31/12/2023"), _display_sort_key("01/01/2024"))
+        self.assertLess(_display_sort_key("08:30"), _display_sort_key("17:05"))
+
+    def test_typed_keys_mix_types(self):
+        values = ["Zed", None, Decimal("2"), 1, date(2024, 1, 1), "anh"]
+        ordered = sorted(values, key=_typed_sort_key)
+        self.assertEqual(ordered, [None, 1, Decimal("2"), date(2024, 1, 1), "anh", "Zed"])
+
+
+if __name__ == "__main__":
+    unittest.main()